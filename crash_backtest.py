@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Walk-forward backtests of next-round predictors and trading signals
+
+Round t is predicted from the `window` rounds before it only. The windows
+are strided views (sliding_window_view) over a chunk of the history, so a
+predictor sees a (rounds, window) array and is evaluated for a whole chunk
+at once without copying or re-slicing.
+
+A predictor maps windows to predicted crash points; a signal function maps
+predictions to 0 (skip), 1 (moderate buy) or 2 (strong buy). On a buy the
+strategy stakes one unit and cashes out at the prediction, which pays if the
+round reaches it. Baselines are never betting and betting every round, or
+only the signalled rounds, at a fixed cash-out.
+
+Parameter grids run on a process pool that reads the history from shared
+memory.
+"""
+
+import itertools
+import os
+from functools import partial
+from multiprocessing import shared_memory
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from crash_jobs import checkpoint, process_map
+
+WINDOW = 5
+FACTOR = 1.1
+MIN_PREDICTION = 1.01
+MODERATE = 1.8
+STRONG = 2.5
+HOUSE_EDGE = 0.01
+BASELINE_CASHOUTS = (1.5, 2.0)
+CALIBRATION_EDGES = (1.0, 1.5, 1.8, 2.5, 5.0, np.inf)
+GRID = {'window': (3, 5, 10, 20), 'factor': (1.0, 1.1, 1.25), 'moderate': (1.5, 1.8, 2.2)}
+CHUNK = 1 << 18
+GRID_ROUNDS = 100_000  # most recent rounds the parameter grid is tested on (about 0.7 s)
+PARALLEL_MIN_ROUNDS = 5_000_000  # grid rounds below which a pool costs more than it saves
+
+
+def scaled_mean(windows, factor=FACTOR):
+    """smart_prediction for every window: mean * factor, at least MIN_PREDICTION"""
+    return np.maximum(MIN_PREDICTION, windows.mean(axis=1) * factor)
+
+
+def threshold_signals(predictions, moderate=MODERATE, strong=STRONG):
+    """trading_signal for every prediction as 0 (avoid), 1 (moderate) or 2 (strong buy)"""
+    return (predictions > moderate).astype(np.int8) + (predictions > strong)
+
+
+def backtest(values, predictor=scaled_mean, signals=threshold_signals, window=WINDOW,
+             stake=10.0, cashouts=BASELINE_CASHOUTS, chunk=CHUNK):
+    """Replay the history and score a predictor/signal pair; None if too short"""
+    n = len(values)
+    if n <= window:
+        return None
+    edges = np.asarray(CALIBRATION_EDGES)
+    bins = edges.size - 1
+    totals = {'bets': np.zeros(3, dtype=np.int64), 'hits': np.zeros(3, dtype=np.int64),
+              'profit': np.zeros(3)}
+    calibration = {'rounds': np.zeros(bins, dtype=np.int64), 'hits': np.zeros(bins),
+                   'predicted': np.zeros(bins), 'chance': np.zeros(bins)}
+    every_round = np.zeros(len(cashouts))
+    signalled = np.zeros(len(cashouts))
+    targets = np.asarray(cashouts, dtype=np.float64)
+
+    for start in range(window, n, chunk):
+        end = min(start + chunk, n)
+        data = np.asarray(values[start - window:end], dtype=np.float64)
+        predictions = predictor(sliding_window_view(data[:-1], window))
+        actual = data[window:]
+        hit = actual >= predictions
+        codes = signals(predictions)
+
+        for level in (1, 2):
+            taken = codes == level
+            totals['bets'][level] += np.count_nonzero(taken)
+            totals['hits'][level] += np.count_nonzero(hit & taken)
+            totals['profit'][level] += stake * float(
+                np.where(hit[taken], predictions[taken] - 1, -1.0).sum())
+
+        which = np.clip(np.searchsorted(edges, predictions, side='right') - 1, 0, bins - 1)
+        calibration['rounds'] += np.bincount(which, minlength=bins)
+        calibration['hits'] += np.bincount(which, weights=hit, minlength=bins)
+        calibration['predicted'] += np.bincount(which, weights=predictions, minlength=bins)
+        calibration['chance'] += np.bincount(
+            which, weights=np.minimum(1.0, (1 - HOUSE_EDGE) / predictions), minlength=bins)
+
+        # Fixed cash-out baselines on every round and on the signalled rounds only
+        paid = np.where(actual[:, None] >= targets, targets - 1, -1.0) * stake
+        every_round += paid.sum(axis=0)
+        signalled += paid[codes > 0].sum(axis=0)
+
+    rounds = n - window
+    bets = int(totals['bets'].sum())
+    hits = int(totals['hits'].sum())
+    return {
+        'rounds': rounds,
+        'window': window,
+        'bets': bets,
+        'hit_rate': hits / bets * 100 if bets else 0.0,
+        'profit': float(totals['profit'].sum()),
+        'levels': {name: {'bets': int(totals['bets'][level]),
+                          'hit_rate': (int(totals['hits'][level]) / int(totals['bets'][level]) * 100
+                                       if totals['bets'][level] else 0.0),
+                          'profit': float(totals['profit'][level])}
+                   for level, name in ((1, 'moderate'), (2, 'strong'))},
+        'calibration': [{'low': float(edges[i]),
+                         'high': float(edges[i + 1]) if np.isfinite(edges[i + 1]) else None,
+                         'rounds': int(calibration['rounds'][i]),
+                         'mean_prediction': float(calibration['predicted'][i] / calibration['rounds'][i]),
+                         'hit_rate': float(calibration['hits'][i] / calibration['rounds'][i] * 100),
+                         'chance_rate': float(calibration['chance'][i] / calibration['rounds'][i] * 100)}
+                        for i in range(bins) if calibration['rounds'][i]],
+        'baselines': {'skip': 0.0,
+                      **{f"every round at {c:g}x": float(p) for c, p in zip(cashouts, every_round)},
+                      **{f"signalled rounds at {c:g}x": float(p) for c, p in zip(cashouts, signalled)}}
+    }
+
+
+def grid_task(task):
+    """Backtest one parameter combination on the shared history"""
+    name, size, params, stake = task
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        values = np.ndarray(size, dtype=np.float64, buffer=block.buf)
+        result = backtest(values, partial(scaled_mean, factor=params['factor']),
+                          partial(threshold_signals, moderate=params['moderate'],
+                                  strong=max(STRONG, params['moderate'])),
+                          params['window'], stake)
+        del values
+    finally:
+        block.close()
+    return {**params, **{key: result[key] for key in ('bets', 'hit_rate', 'profit')}}
+
+
+def grid_search(values, grid=GRID, stake=10.0, workers=None, chunk=CHUNK):
+    """Backtest every combination of `grid`, best profit first"""
+    names = list(grid)
+    combos = [dict(zip(names, combo)) for combo in itertools.product(*grid.values())]
+    if len(values) <= max(grid['window']):
+        return []
+    size = len(values)
+    block = shared_memory.SharedMemory(create=True, size=size * 8)
+    try:
+        shared = np.ndarray(size, dtype=np.float64, buffer=block.buf)
+        for start in range(0, size, chunk):
+            shared[start:start + chunk] = values[start:start + chunk]
+        del shared
+        tasks = [(block.name, size, params, stake) for params in combos]
+
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(combos) * size >= PARALLEL_MIN_ROUNDS:
+            results = process_map(grid_task, tasks, workers)
+        else:
+            results = []
+            for task in tasks:
+                checkpoint()
+                results.append(grid_task(task))
+    finally:
+        block.close()
+        block.unlink()
+    return sorted(results, key=lambda r: r['profit'], reverse=True)
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmarks for Ghost Crash Analyzer Pro
+
+    python crash_bench.py suite --sizes 1e3,1e4,1e5,1e6 -o bench.json
+    python crash_bench.py suite --baseline bench.json      # exit 1 on regressions
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+HOUSE_EDGE = 0.01
+SUITE_SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)
+GENERATE_CHUNK = 1 << 20
+APPENDS = 100  # appends timed per size
+APPEND_ROUNDS = 10  # rounds per append
+DASHBOARD_REFRESHES = 1000
+SUITE_DASHBOARD_REFRESHES = 1000  # Tk dashboard refreshes in the suite (needs a display)
+REGRESSION_TOLERANCE = 0.25  # slowdown (fraction of the baseline) reported as a regression
+NOISE_FLOOR_MS = 1.0  # slowdowns smaller than this are never reported
+PLOTS = (('plot_points_chart', 'points'), ('plot_moving_average', 'moving_average'),
+         ('plot_distribution', 'distribution'), ('plot_profit_trend', 'profit'),
+         ('plot_risk_analysis', 'risk'))
+
+
+def max_rss_kb():
+    """Peak resident memory of this process in KiB (0 when unknown)"""
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def bench_dashboard(refreshes=10000, block=1000, size=0, house_edge=HOUSE_EDGE, seed=0):
+    """Time and memory of repeated dashboard refreshes over a stored history of `size` rounds
+
+    Needs a display; without one the result says it was skipped and why.
+    """
+    try:
+        import tkinter as tk
+    except ImportError as e:
+        return {'benchmark': 'dashboard_refresh', 'skipped': f"needs Tk: {e}"}
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return {'benchmark': 'dashboard_refresh', 'skipped': f"needs a display: {e}"}
+    from elegant_crash_analywer import ElegantCrashAnalyzer
+
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix='crash_bench_')
+    if size:  # the app loads crash_data.bin from the working directory
+        write_history(os.path.join(workdir, 'crash_data.bin'), size, house_edge, seed)
+    os.chdir(workdir)
+    try:
+        root.withdraw()
+        app = ElegantCrashAnalyzer(root)
+        app.auto_update_var.set(False)
+
+        tracemalloc.start()
+        blocks = []
+        for b in range(max(1, refreshes // block)):
+            start = time.perf_counter()
+            for _ in range(block):
+                app.session_profit += 1  # force a changed card every refresh
+                app.update_dashboard()
+                root.update_idletasks()
+            elapsed = time.perf_counter() - start
+            current, _ = tracemalloc.get_traced_memory()
+            blocks.append({
+                'refreshes': (b + 1) * block,
+                'ms_per_refresh': elapsed / block * 1000,
+                'python_bytes': current,
+                'max_rss_kb': max_rss_kb()
+            })
+        tracemalloc.stop()
+        root.destroy()
+        app.jobs.shutdown()
+        app.sessions.close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    first, last = blocks[0], blocks[-1]
+    return {
+        'benchmark': 'dashboard_refresh',
+        'size': size,
+        'blocks': blocks,
+        'time_growth': last['ms_per_refresh'] / first['ms_per_refresh'],
+        'python_bytes_growth': last['python_bytes'] - first['python_bytes'],
+        'rss_growth_kb': last['max_rss_kb'] - first['max_rss_kb']
+    }
+
+
+def synthetic_history(size, house_edge=HOUSE_EDGE, seed=0, chunk=GENERATE_CHUNK):
+    """Crash points from the standard crash distribution, a chunk at a time
+
+    P(crash >= x) = (1 - house_edge) / x for x >= 1, floored to cents (the
+    instant crashes read 1.00). The rounds depend only on the seed, not on
+    the chunk size.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    for start in range(0, size, chunk):
+        uniform = rng.random(min(chunk, size - start))
+        yield np.floor(np.maximum(1.0, (1 - house_edge) / (1 - uniform)) * 100) / 100
+
+
+def write_history(path, size, house_edge=HOUSE_EDGE, seed=0):
+    """Store a synthetic history of `size` rounds at `path`, a chunk at a time"""
+    import numpy as np
+
+    from crash_store import HistoryStore
+
+    store = HistoryStore(path, legacy_path=None)
+    store.rewrite(np.empty(0), 0.0)
+    for chunk in synthetic_history(size, house_edge, seed):
+        store.extend(chunk, 0.0, {'times': np.arange(chunk.size, dtype=np.int64)})
+    store.close()
+
+
+def best_of(func, repeat, calls=1):
+    """Best milliseconds per call over `repeat` timings of `calls` calls, and every timing"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        runs.append((time.perf_counter() - start) * 1000 / calls)
+    return min(runs), runs
+
+
+def load_working_history(path):
+    """What the app's load_data builds from a stored history, without Tk"""
+    import crash_engine
+    from crash_store import HistoryStore
+
+    store = HistoryStore(path, legacy_path=None)
+    return {'store': store, **crash_engine.load_working_state(store)}
+
+
+def chart_input(name, app, bins=None, window=10):
+    """Data the app hands a chart view (the background charts' jobs included)"""
+    import crash_engine
+
+    if name in ('distribution', 'risk'):
+        return crash_engine.background_chart(name, app['rounds'].values, app['stats'], bins)
+    return crash_engine.chart_series(name, app['rounds'], app['rolling'], app['pnl'], window,
+                                     app['store'].blocks)
+
+
+def bench_size(size, workdir, house_edge=HOUSE_EDGE, seed=0, repeat=3, plots=True,
+               report=None):
+    """Time the core operations on a synthetic history of `size` rounds"""
+    import numpy as np
+
+    import crash_engine
+    from crash_import import import_file
+
+    results = []
+    report = report or (lambda line: None)
+
+    def record(operation, func, calls=1, runs=repeat):
+        ms, timings = best_of(func, runs, calls)
+        results.append({'size': size, 'operation': operation, 'ms': ms, 'runs_ms': timings})
+        report(f"{size:>11} {operation:<22} {ms:10.3f} ms")
+
+    def generate():
+        for _ in synthetic_history(size, house_edge, seed):
+            pass
+
+    record('generate', generate, runs=1)
+    path = os.path.join(workdir, f'crash_{size}.bin')
+
+    # Generated chunks go straight to the store, so memory stays at one chunk
+    record('save', lambda: write_history(path, size, house_edge, seed))
+
+    app = {}
+    record('load', lambda: app.update(load_working_history(path)))
+    extra = np.full(APPEND_ROUNDS, 2.0)
+
+    def append():
+        columns = app['rounds'].make_columns(extra, source='manual')
+        app['rounds'].extend(columns)
+        app['stats'].extend(extra)
+        app['rolling'].extend(extra)
+        app['pnl'].extend(extra)
+        app['store'].extend(extra, app['pnl'].total, columns)
+
+    record('append', append, calls=APPENDS, runs=1)
+
+    record('dashboard_stats', lambda: crash_engine.dashboard(
+        app['stats'], app['rounds'].total, app['pnl'].total, app['rounds'].tail(5)),
+        calls=DASHBOARD_REFRESHES)
+    record('statistical_analysis', lambda: crash_engine.format_statistical_report(
+        crash_engine.statistical_report(app['rounds'].values, app['stats'], app['pnl'],
+                                        sketch=app['store'].sketch)))
+
+    if plots:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        from crash_charts import make_chart
+
+        for operation, name in PLOTS:
+            view = make_chart(name)
+            canvas = FigureCanvasAgg(view.figure)
+            view.attach(canvas)
+
+            def render(view=view, canvas=canvas, name=name):
+                view.refresh(chart_input(name, app, getattr(view, 'bins', None)))
+                canvas.draw()
+
+            record(operation, render)
+
+    csv_path = os.path.join(workdir, f'crash_{size}.csv')
+    # Only the generated rounds, not the ones appended above
+    values = app['store'].column('values')[:size]
+    with open(csv_path, 'w', encoding='utf-8') as f:
+        f.write('point\n')
+        for start in range(0, len(values), GENERATE_CHUNK):
+            np.savetxt(f, values[start:start + GENERATE_CHUNK], fmt='%.2f')
+    del values
+    app['store'].close()
+    record('import', lambda: import_file(csv_path))
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    return results
+
+
+def bench_suite(sizes=SUITE_SIZES, house_edge=HOUSE_EDGE, seed=0, repeat=3, plots=True,
+                report=None, dashboard=True):
+    """Core operations at every size, with what is needed to compare runs
+
+    The dashboard refresh benchmark runs at every size too, on an app
+    loading that size's history; it needs a display, and without one it is
+    listed once under 'skipped' with the reason.
+    """
+    import matplotlib
+    import numpy as np
+
+    report = report or (lambda line: None)
+    results, skipped = [], []
+    workdir = tempfile.mkdtemp(prefix='crash_bench_')
+    try:
+        for size in sizes:
+            results += bench_size(size, workdir, house_edge, seed, repeat, plots, report)
+            if not dashboard or skipped:
+                continue
+            refresh = bench_dashboard(SUITE_DASHBOARD_REFRESHES, SUITE_DASHBOARD_REFRESHES,
+                                      size, house_edge, seed)
+            if 'skipped' in refresh:
+                skipped.append(refresh)
+                report(f"{'':>11} {'dashboard_refresh':<22} skipped ({refresh['skipped']})")
+            else:
+                ms = refresh['blocks'][-1]['ms_per_refresh']
+                results.append({'size': size, 'operation': 'dashboard_refresh', 'ms': ms,
+                                'runs_ms': [ms]})
+                report(f"{size:>11} {'dashboard_refresh':<22} {ms:10.3f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'benchmark': 'suite',
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {'python': platform.python_version(), 'numpy': np.__version__,
+                    'matplotlib': matplotlib.__version__, 'platform': platform.platform(),
+                    'cpus': os.cpu_count()},
+        'house_edge': house_edge,
+        'seed': seed,
+        'repeat': repeat,
+        'results': results,
+        'skipped': skipped
+    }
+
+
+def compare(result, baseline, tolerance=REGRESSION_TOLERANCE, floor_ms=NOISE_FLOOR_MS):
+    """Annotate results with their baseline timings; returns the regressions found"""
+    before = {(row['size'], row['operation']): row['ms'] for row in baseline['results']}
+    regressions = []
+    for row in result['results']:
+        old = before.get((row['size'], row['operation']))
+        if old is None:
+            continue
+        row['baseline_ms'] = old
+        row['ratio'] = row['ms'] / old if old else None
+        if row['ms'] > old * (1 + tolerance) and row['ms'] - old > floor_ms:
+            regressions.append(f"{row['operation']} at {row['size']} rounds: "
+                               f"{old:.2f} -> {row['ms']:.2f} ms")
+    return regressions
+
+
+def parse_sizes(text):
+    """Round counts from '1e3,1e4,100000'"""
+    return [int(float(size)) for size in text.split(',') if size.strip()]
+
+
+def parse_importtime(stderr):
+    """(cumulative microseconds, module) pairs from `python -X importtime`"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((int(cumulative), name.strip()))
+    return modules
+
+
+def bench_import(module='elegant_crash_analywer', runs=5):
+    """Import time of a module in fresh interpreters (best of `runs`)"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                              cwd=here, capture_output=True, text=True, check=True)
+        modules = parse_importtime(proc.stderr)
+        total = next(cumulative for cumulative, name in modules if name == module)
+        if best is None or total < best[0]:
+            best = (total, modules)
+
+    total, modules = best
+    heaviest = sorted(modules, reverse=True)[:10]
+    return {
+        'import_ms': total / 1000,
+        'heaviest': [{'module': name, 'cumulative_ms': cumulative / 1000}
+                     for cumulative, name in heaviest]
+    }
+
+
+def bench_first_frame(runs=3):
+    """Time from process launch to the first drawn window (needs a display)"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, CRASH_ANALYZER_STARTUP_PROBE='1', CRASH_ANALYZER_PREWARM='0')
+    times = []
+    for _ in range(runs):
+        workdir = tempfile.mkdtemp(prefix='crash_bench_')
+        start = time.time()
+        proc = subprocess.run([sys.executable, os.path.join(here, 'elegant_crash_analywer.py')],
+                              cwd=workdir, env=env, capture_output=True, text=True, check=True)
+        stamp = next(line.split()[1] for line in proc.stdout.splitlines()
+                     if line.startswith('first_frame'))
+        times.append((float(stamp) - start) * 1000)
+    return {'first_frame_ms': min(times), 'runs_ms': times}
+
+
+def bench_startup(import_budget_ms=None, frame_budget_ms=None, runs=5, frame=True):
+    """Import time and time-to-first-frame, checked against optional budgets"""
+    result = {'benchmark': 'startup'}
+    result.update(bench_import(runs=runs))
+    if frame:
+        result.update(bench_first_frame(runs=min(runs, 3)))
+
+    over = []
+    if import_budget_ms is not None and result['import_ms'] > import_budget_ms:
+        over.append(f"import {result['import_ms']:.0f} ms > {import_budget_ms:.0f} ms")
+    if frame and frame_budget_ms is not None and result['first_frame_ms'] > frame_budget_ms:
+        over.append(f"first frame {result['first_frame_ms']:.0f} ms > {frame_budget_ms:.0f} ms")
+    result['over_budget'] = over
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ghost Crash Analyzer Pro benchmarks")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    dashboard = sub.add_parser('dashboard', help="repeated dashboard refreshes")
+    dashboard.add_argument('--refreshes', type=int, default=10000)
+    dashboard.add_argument('--block', type=int, default=1000)
+    dashboard.add_argument('--size', type=float, default=0,
+                           help="rounds in the stored history the app loads, e.g. 1e6")
+
+    startup = sub.add_parser('startup', help="import time and time to first frame")
+    startup.add_argument('--runs', type=int, default=5)
+    startup.add_argument('--import-budget-ms', type=float, default=300)
+    startup.add_argument('--frame-budget-ms', type=float, default=1500)
+    startup.add_argument('--no-frame', action='store_true', help="skip the GUI launch (no display)")
+
+    suite = sub.add_parser('suite', help="core operations on synthetic histories (headless)")
+    suite.add_argument('--sizes', type=parse_sizes, default=list(SUITE_SIZES),
+                       help="comma-separated round counts, e.g. 1e3,1e6,1e8")
+    suite.add_argument('--house-edge', type=float, default=HOUSE_EDGE)
+    suite.add_argument('--seed', type=int, default=0)
+    suite.add_argument('--repeat', type=int, default=3, help="timings per operation (best is kept)")
+    suite.add_argument('--no-plots', action='store_true', help="skip the chart renders")
+    suite.add_argument('--no-dashboard', action='store_true',
+                       help="skip the Tk dashboard refreshes (skipped anyway without a display)")
+    suite.add_argument('-o', '--output', help="also write the results to this JSON file")
+    suite.add_argument('--baseline', help="results of an earlier run to compare against")
+    suite.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE,
+                       help="slowdown flagged as a regression (0.25 = 25%%)")
+
+    args = parser.parse_args(argv)
+    if args.command == 'dashboard':
+        result = bench_dashboard(args.refreshes, args.block, int(args.size))
+    elif args.command == 'startup':
+        result = bench_startup(args.import_budget_ms, args.frame_budget_ms,
+                               args.runs, not args.no_frame)
+    elif args.command == 'suite':
+        import matplotlib
+        matplotlib.use('Agg')
+        warnings.filterwarnings('ignore', 'Glyph .* missing')  # emoji in titles
+        result = bench_suite(args.sizes, args.house_edge, args.seed, args.repeat,
+                             not args.no_plots, lambda line: print(line, file=sys.stderr),
+                             not args.no_dashboard)
+        if args.baseline:
+            with open(args.baseline, encoding='utf-8') as f:
+                result['regressions'] = compare(result, json.load(f), args.tolerance)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=2)
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    return 1 if result.get('over_budget') or result.get('regressions') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Per-block summaries of a crash history
+
+Every BLOCK_SIZE rounds are reduced to one record (count, mean, central
+moments M2..M4, min, max, wins and the sum of winning points). Full-history
+statistics and profit combine the records instead of rescanning the rounds,
+so they cost O(N / BLOCK_SIZE) memory and time.
+
+A tree of pairwise merged records over the blocks answers statistics for
+any round range from O(log N) nodes plus at most two partial blocks.
+"""
+
+import os
+
+import numpy as np
+
+from crash_stats import RunningStats, round_profits
+
+BLOCK_SIZE = 4096
+SCAN_BLOCKS = 256  # blocks summarized per pass when building from a file
+SUMMARY = np.dtype([('count', '<i8'), ('mean', '<f8'), ('m2', '<f8'), ('m3', '<f8'),
+                    ('m4', '<f8'), ('min', '<f8'), ('max', '<f8'), ('wins', '<i8'),
+                    ('win_sum', '<f8')])
+
+
+def summarize(values, block_size=BLOCK_SIZE):
+    """Summary records of consecutive blocks (the last one may be partial)"""
+    values = np.asarray(values, dtype=np.float64).ravel()
+    full = values.size // block_size * block_size
+    parts = [values[:full].reshape(-1, block_size)]
+    if full < values.size:
+        parts.append(values[full:].reshape(1, -1))
+
+    records = []
+    for rows in parts:
+        if not rows.size:
+            continue
+        record = np.empty(rows.shape[0], dtype=SUMMARY)
+        record['count'] = rows.shape[1]
+        record['mean'] = rows.mean(axis=1)
+        centered = rows - record['mean'][:, None]
+        squared = centered * centered
+        record['m2'] = squared.sum(axis=1)
+        record['m3'] = (squared * centered).sum(axis=1)
+        record['m4'] = (squared * squared).sum(axis=1)
+        record['min'] = rows.min(axis=1)
+        record['max'] = rows.max(axis=1)
+        wins = rows > 1.0
+        record['wins'] = np.count_nonzero(wins, axis=1)
+        record['win_sum'] = np.where(wins, rows, 0.0).sum(axis=1)
+        records.append(record)
+    return np.concatenate(records) if records else np.empty(0, dtype=SUMMARY)
+
+
+def shifted_moments(records, mean):
+    """Central moments M2..M4 of each record taken about another mean
+
+    Moments of a union are the sums of its members' shifted moments, which
+    vectorizes over any number of records at once.
+    """
+    n = records['count'].astype(np.float64)
+    delta = records['mean'] - mean
+    delta2 = delta * delta
+    m2 = records['m2'] + n * delta2
+    m3 = records['m3'] + 3 * delta * records['m2'] + n * delta2 * delta
+    m4 = (records['m4'] + 4 * delta * records['m3']
+          + 6 * delta2 * records['m2'] + n * delta2 * delta2)
+    return m2, m3, m4
+
+
+def merge_pairs(left, right):
+    """Records of left[i] and right[i] merged element-wise"""
+    merged = np.empty(left.size, dtype=SUMMARY)
+    merged['count'] = left['count'] + right['count']
+    merged['mean'] = ((left['count'] * left['mean'] + right['count'] * right['mean'])
+                      / merged['count'])
+    moments = [a + b for a, b in zip(shifted_moments(left, merged['mean']),
+                                     shifted_moments(right, merged['mean']))]
+    merged['m2'], merged['m3'], merged['m4'] = moments
+    merged['min'] = np.minimum(left['min'], right['min'])
+    merged['max'] = np.maximum(left['max'], right['max'])
+    merged['wins'] = left['wins'] + right['wins']
+    merged['win_sum'] = left['win_sum'] + right['win_sum']
+    return merged
+
+
+def combine(records):
+    """RunningStats of the rounds behind several summary records"""
+    stats = RunningStats()
+    records = records[records['count'] > 0]
+    if not records.size:
+        return stats
+    n = records['count'].astype(np.float64)
+    total = n.sum()
+    mean = float((n * records['mean']).sum() / total)
+    m2, m3, m4 = shifted_moments(records, mean)
+    stats.count = int(total)
+    stats.mean = mean
+    stats.m2, stats.m3, stats.m4 = float(m2.sum()), float(m3.sum()), float(m4.sum())
+    stats.wins = int(records['wins'].sum())
+    stats.min = float(records['min'].min())
+    stats.max = float(records['max'].max())
+    return stats
+
+
+class BlockIndex:
+    """Summaries of complete blocks plus the rounds of the open block"""
+
+    def __init__(self, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self.reset()
+
+    @classmethod
+    def from_values(cls, values, block_size=BLOCK_SIZE, cache=None):
+        """Build from a (memory-mapped) history, reusing summaries cached at `cache`
+
+        Cached records are trusted only if the last one matches a fresh
+        summary of its block; anything missing is summarized a few blocks
+        at a time so the history is never copied whole.
+        """
+        index = cls(block_size)
+        complete = len(values) // block_size
+        cached = np.empty(0, dtype=SUMMARY)
+        if cache and os.path.exists(cache):
+            cached = np.fromfile(cache, dtype=SUMMARY)[:complete]
+            if cached.size:
+                last = cached.size - 1
+                check = summarize(values[last * block_size:(last + 1) * block_size], block_size)
+                if not np.array_equal(check, cached[last:]):
+                    cached = np.empty(0, dtype=SUMMARY)
+        index._append_blocks(cached)
+
+        step = SCAN_BLOCKS * block_size
+        for start in range(cached.size * block_size, complete * block_size, step):
+            end = min(start + step, complete * block_size)
+            index._append_blocks(summarize(values[start:end], block_size))
+        index._open = np.array(values[complete * block_size:], dtype=np.float64)
+        index._open_count = index._open.size
+        index._open = np.resize(index._open, block_size)
+        return index
+
+    def reset(self):
+        """Forget every round"""
+        self.blocks = 0
+        self._records = np.empty(64, dtype=SUMMARY)
+        self._levels = []  # level k merges 2 ** k blocks per node
+        self._open = np.empty(self.block_size, dtype=np.float64)
+        self._open_count = 0
+
+    @property
+    def count(self):
+        """Number of rounds summarized"""
+        return self.blocks * self.block_size + self._open_count
+
+    @property
+    def records(self):
+        """Summaries of the complete blocks"""
+        return self._records[:self.blocks]
+
+    def extend(self, values):
+        """Add rounds; returns the records of blocks completed by them"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        first = self.blocks
+        while values.size:
+            take = min(values.size, self.block_size - self._open_count)
+            self._open[self._open_count:self._open_count + take] = values[:take]
+            self._open_count += take
+            values = values[take:]
+            if self._open_count == self.block_size:
+                self._append_blocks(summarize(self._open, self.block_size))
+                self._open_count = 0
+            if values.size >= self.block_size:
+                # Whole blocks go straight to the summaries
+                full = values.size // self.block_size * self.block_size
+                self._append_blocks(summarize(values[:full], self.block_size))
+                values = values[full:]
+        return self._records[first:self.blocks]
+
+    def stats(self):
+        """RunningStats of every round"""
+        records = self.records
+        if self._open_count:
+            records = np.concatenate([records, summarize(self._open[:self._open_count],
+                                                         self.block_size)])
+        return combine(records)
+
+    def range_stats(self, values, start, end):
+        """RunningStats of rounds [start, end) of `values` in O(log N)"""
+        start, end = max(0, start), min(end, self.count)
+        if end <= start:
+            return RunningStats()
+        size = self.block_size
+        first = -(-start // size)
+        last = min(end // size, self.blocks)
+        if first >= last:
+            # Less than one whole block in between: at most two blocks to read
+            return combine(summarize(values[start:end], size))
+
+        self._update_levels()
+        parts = [summarize(values[start:first * size], size),
+                 summarize(values[last * size:end], size)]
+        level, low, high = 0, first, last
+        while low < high:
+            nodes = self._levels[level - 1] if level else self.records
+            if low & 1:
+                parts.append(nodes[low:low + 1])
+                low += 1
+            if high & 1:
+                high -= 1
+                parts.append(nodes[high:high + 1])
+            low, high, level = low >> 1, high >> 1, level + 1
+        return combine(np.concatenate(parts))
+
+    def block_profits(self, stake=10.0):
+        """Net profit of every complete block"""
+        records = self.records
+        # Wins pay (x - 1) * stake and losses cost the stake: stake * (sum of wins - rounds)
+        return stake * (records['win_sum'] - records['count'])
+
+    def profit(self, values, end, stake=10.0):
+        """Net profit of rounds [0, end) of `values`, reading at most one block of them"""
+        records = self.records[:min(end // self.block_size, self.blocks)]
+        rounds = int(records['count'].sum())
+        wins = int(records['wins'].sum())
+        # Each win pays (x - 1) * stake, each loss costs the stake
+        profit = stake * (float(records['win_sum'].sum()) - wins) - stake * (rounds - wins)
+        return profit + float(round_profits(values[rounds:end], stake).sum())
+
+    def _update_levels(self):
+        """Extend the tree over blocks completed since the last query"""
+        lower = self.records
+        level = 0
+        while lower.size >= 2:
+            if level == len(self._levels):
+                self._levels.append(np.empty(0, dtype=SUMMARY))
+            built = self._levels[level].size
+            pairs = lower.size // 2
+            if pairs > built:
+                merged = merge_pairs(lower[2 * built:2 * pairs:2], lower[2 * built + 1:2 * pairs:2])
+                self._levels[level] = np.concatenate([self._levels[level], merged])
+            lower = self._levels[level]
+            level += 1
+
+    def _append_blocks(self, records):
+        end = self.blocks + records.size
+        if end > self._records.size:
+            grown = np.empty(max(end, self._records.size * 2), dtype=SUMMARY)
+            grown[:self.blocks] = self._records[:self.blocks]
+            self._records = grown
+        self._records[self.blocks:end] = records
+        self.blocks = end
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Long-lived chart figures that update their artists in place"""
+
+import matplotlib
+import numpy as np
+from matplotlib.figure import Figure
+
+from crash_jobs import checkpoint
+from crash_lod import downsample
+from crash_trace import timed
+
+# Configure fonts for better rendering
+matplotlib.rcParams['font.family'] = 'DejaVu Sans'
+matplotlib.rcParams['font.sans-serif'] = ['DejaVu Sans']
+
+BACKGROUND = '#1a1a2e'
+HISTOGRAM_CHUNK = 1 << 20
+
+
+def fit_limits(current, low, high, margin=0.1):
+    """New axis limits covering [low, high], or None if current ones still fit"""
+    lo, hi = current
+    span = high - low
+    if lo <= low and high <= hi and span >= 0.5 * (hi - lo):
+        return None
+    pad = span * margin if span else max(abs(high), 1.0) * margin
+    return low - pad, high + pad
+
+
+@timed()
+def histogram(values, bins, low, high, chunk=HISTOGRAM_CHUNK):
+    """np.histogram of a (memory-mapped) history over [low, high], a chunk at a time"""
+    edges = np.histogram_bin_edges(np.empty(0), bins, range=(low, high))
+    counts = np.zeros(bins, dtype=np.int64)
+    for start in range(0, len(values), chunk):
+        checkpoint()
+        counts += np.histogram(values[start:start + chunk], bins=edges)[0]
+    return counts, edges
+
+
+class ChartView:
+    """One figure/axes pair that is reused for every redraw of a chart type"""
+
+    def __init__(self, title, xlabel, ylabel, min_points=2):
+        self.title = title
+        self.min_points = min_points
+        self.figure = Figure(figsize=(10, 6), facecolor=BACKGROUND)
+        self.ax = self.figure.add_subplot(111)
+        self.ax.set_facecolor(BACKGROUND)
+        self.ax.set_xlabel(xlabel, color='white', fontsize=12)
+        self.ax.set_ylabel(ylabel, color='white', fontsize=12)
+        self.ax.set_title(title, color='white', fontsize=14, fontweight='bold')
+        self.ax.grid(True, alpha=0.3)
+        self.ax.tick_params(colors='white')
+
+        self.canvas = None
+        self.background = None
+        self.first = 1
+        self.x_range = None  # x limits fixed by the user; None follows the data
+        self.artists = self.create_artists()
+        for artist in self.artists:
+            artist.set_animated(True)
+
+    def create_artists(self):
+        """Create the data artists (drawn with blitting)"""
+        return []
+
+    def update_data(self, values):
+        """Push new data into the artists; True when limits changed"""
+        return False
+
+    def attach(self, canvas):
+        """Bind the view to the canvas that displays it"""
+        self.canvas = canvas
+        canvas.mpl_connect('draw_event', self.on_draw)
+
+    def on_draw(self, event):
+        # Full redraw happened (resize, new limits): grab the static background
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_artists()
+
+    def draw_artists(self):
+        for artist in self.artists:
+            self.ax.draw_artist(artist)
+
+    @timed('chart_refresh')
+    def refresh(self, values, first=1):
+        """Update the chart, blitting when the axes did not change
+
+        `first` is the round number of the first value (series charts).
+        """
+        self.first = first
+        limits_changed = self.update_data(values)
+        if limits_changed or self.background is None:
+            self.canvas.draw_idle()
+        else:
+            self.canvas.restore_region(self.background)
+            self.draw_artists()
+            self.canvas.blit(self.figure.bbox)
+
+    def set_x_range(self, x_range):
+        """Fix the x limits to (low, high), or follow the data again with None"""
+        self.x_range = x_range
+        if x_range is not None:
+            self.ax.set_xlim(x_range)
+
+    def fit(self, x_low, x_high, y_low, y_high):
+        """Adjust axis limits only when the data no longer fits them"""
+        changed = False
+        axes = [(self.ax.get_ylim, self.ax.set_ylim, y_low, y_high)]
+        if self.x_range is None:
+            axes.insert(0, (self.ax.get_xlim, self.ax.set_xlim, x_low, x_high))
+        for get_lim, set_lim, low, high in axes:
+            limits = fit_limits(get_lim(), low, high)
+            if limits is not None:
+                set_lim(limits)
+                changed = True
+        return changed
+
+
+class SeriesChart(ChartView):
+    """Line plots of one or more series against their 1-based index
+
+    Only the visible x range is drawn, reduced to min/max points per pixel
+    column, so render time depends on the axes width rather than the data.
+    """
+
+    def __init__(self, title, xlabel, ylabel, styles, markersize=6, min_points=2):
+        self.styles = styles  # (label, color, linewidth, alpha) per series
+        self.markersize = markersize
+        self.x = np.empty(0)
+        self.ys = [np.empty(0) for _ in styles]
+        super().__init__(title, xlabel, ylabel, min_points)
+        if len(styles) > 1:
+            self.ax.legend(facecolor=BACKGROUND, labelcolor='white')
+        self.ax.callbacks.connect('xlim_changed', self.resample)
+
+    def create_artists(self):
+        self.lines = []
+        for label, color, linewidth, alpha in self.styles:
+            line, = self.ax.plot([], [], 'o-', color=color, linewidth=linewidth, alpha=alpha,
+                                 markersize=self.markersize, label=label)
+            self.lines.append(line)
+        return list(self.lines)
+
+    def attach(self, canvas):
+        super().attach(canvas)
+        canvas.mpl_connect('resize_event', self.resample)
+
+    def update_data(self, values):
+        x = None
+        if isinstance(values, dict):  # {'x': round numbers, 'ys': series}
+            x, values = values['x'], values['ys']
+        self.ys = [np.asarray(series, dtype=float) for series in values]
+        size = max((y.size for y in self.ys), default=0)
+        self.x = np.arange(self.first, self.first + size) if x is None else np.asarray(x)
+        finite = [y[np.isfinite(y)] for y in self.ys]
+        finite = [y for y in finite if y.size]
+        if not finite:
+            for line in self.lines:
+                line.set_data([], [])
+            return False
+        y_low = min(float(y.min()) for y in finite)
+        y_high = max(float(y.max()) for y in finite)
+        limits_changed = self.fit(self.x[0], self.x[size - 1], y_low, y_high)
+        self.resample()
+        return limits_changed
+
+    def resample(self, *args):
+        """Re-aggregate the visible range for the current zoom and size"""
+        width = self.ax.bbox.width
+        x_low, x_high = self.ax.get_xlim()
+        for line, y in zip(self.lines, self.ys):
+            x, y = downsample(self.x[:y.size], y, width, x_low, x_high)
+            line.set_data(x, y)
+            # Markers only help while individual rounds are distinguishable
+            line.set_marker('o' if len(x) * 4 <= width else '')
+
+
+class LineChart(SeriesChart):
+    """Single series line chart; data is the series or {'x': round numbers, 'y': series}"""
+
+    def __init__(self, title, xlabel, ylabel, color, markersize=6, min_points=2):
+        super().__init__(title, xlabel, ylabel, [(None, color, 2, 1.0)],
+                         markersize, min_points)
+
+    def update_data(self, values):
+        if isinstance(values, dict):
+            return super().update_data({'x': values['x'], 'ys': [values['y']]})
+        return super().update_data([values])
+
+
+class HistogramChart(ChartView):
+    """Histogram with a fixed number of bars whose geometry is updated in place
+
+    Its data is the (counts, edges) pair from histogram().
+    """
+
+    def __init__(self, title, xlabel, ylabel, color, bins=15, min_points=5):
+        self.color = color
+        self.bins = bins
+        super().__init__(title, xlabel, ylabel, min_points)
+
+    def create_artists(self):
+        self.bars = self.ax.bar(np.arange(self.bins), np.zeros(self.bins), width=1.0,
+                                align='edge', color=self.color, alpha=0.7,
+                                edgecolor='white')
+        self.edges = None
+        return list(self.bars)
+
+    def update_data(self, values):
+        counts, edges = values
+        if not counts.sum():
+            return False
+        widths = np.diff(edges)
+        for patch, left, width, count in zip(self.bars, edges[:-1], widths, counts):
+            patch.set_x(left)
+            patch.set_width(width)
+            patch.set_height(count)
+
+        edges_changed = self.edges is None or not np.array_equal(edges, self.edges)
+        self.edges = edges
+        limits_changed = self.fit(float(edges[0]), float(edges[-1]), 0, float(counts.max()))
+        return edges_changed or limits_changed
+
+
+class SurvivalChart(ChartView):
+    """Empirical P(crash >= x) with its confidence band against the theoretical curve"""
+
+    def __init__(self, title, xlabel, ylabel, color, min_points=5):
+        self.color = color
+        super().__init__(title, xlabel, ylabel, min_points)
+        self.ax.set_xscale('log')
+        self.ax.set_yscale('log')
+        self.ax.legend(facecolor=BACKGROUND, labelcolor='white')
+
+    def create_artists(self):
+        self.band = self.ax.fill_between([], [], [], color=self.color, alpha=0.25,
+                                         label="Bootstrap band")
+        self.line, = self.ax.plot([], [], color=self.color, linewidth=2, label="Observed")
+        self.theory, = self.ax.plot([], [], '--', color='#F39C12', linewidth=1.5,
+                                    label="House edge")
+        return [self.band, self.line, self.theory]
+
+    def update_data(self, curve):
+        if curve is None:
+            return False
+        # The band is a polygon, so it is replaced rather than reshaped
+        self.band.remove()
+        self.band = self.ax.fill_between(curve['x'], curve['lower'], curve['upper'],
+                                         color=self.color, alpha=0.25, animated=True)
+        self.artists[0] = self.band
+        self.line.set_data(curve['x'], curve['survival'])
+        self.theory.set_data(curve['x'], curve['theoretical'])
+
+        observed = curve['lower'][curve['lower'] > 0]
+        floor = float(observed.min()) if observed.size else 1 / curve['count']
+        limits = (curve['x'][0], curve['x'][-1]), (10 ** np.floor(np.log10(floor)), 1.5)
+        changed = limits != (tuple(self.ax.get_xlim()), tuple(self.ax.get_ylim()))
+        if changed:
+            self.ax.set_xlim(limits[0])
+            self.ax.set_ylim(limits[1])
+        return changed
+
+
+def make_chart(name):
+    """The view of a chart type: points, distribution, risk, profit or moving_average"""
+    if name == 'points':
+        return LineChart('📊 Crash Points History', 'Round Number', 'Crash Point (x)',
+                         '#00b4d8', markersize=4)
+    elif name == 'distribution':
+        return HistogramChart('📈 Points Distribution', 'Crash Point (x)', 'Frequency',
+                              '#00b4d8')
+    elif name == 'risk':
+        return SurvivalChart('🎯 Survival Curve P(crash ≥ x)', 'Cash-out Target (x)',
+                             'Probability', '#00b4d8')
+    elif name == 'profit':
+        return LineChart('💰 Cumulative Profit Trend', 'Round Number', 'Cumulative Profit',
+                         '#27AE60')
+    return SeriesChart('📈 Moving Averages', 'Round Number', 'Crash Point (x)', [
+        ("SMA (window)", '#00b4d8', 2, 1.0),
+        ("EMA (window)", '#F39C12', 2, 1.0),
+        ("SMA (50 rounds)", '#E74C3C', 2, 0.8)
+    ], min_points=5)
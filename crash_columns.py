@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Per-round metadata in typed columns
+
+Each round is a float64 crash point, an int64 epoch-ns timestamp (0 when
+unknown), a uint8 stake code and a uint8 source code: 18 bytes per round,
+no per-round Python objects.
+
+With an archive (e.g. HistoryStore.column) only the most recent rounds stay
+in memory; older ones are read from the memory-mapped store on demand.
+"""
+
+import time
+
+import numpy as np
+
+SOURCES = ('unknown', 'manual', 'bulk', 'import', 'feed')
+COLUMNS = (('values', np.float64), ('times', np.int64),
+           ('stakes', np.uint8), ('sources', np.uint8))
+NS_PER_HOUR = 3600 * 10**9
+HOUR_CHUNK = 1 << 20
+RECENT_ROUNDS = 1 << 16  # rounds kept in memory once older ones are archived
+
+
+def _utc_offsets(times):
+    """Local UTC offset in ns at each epoch-ns time (looked up once per distinct hour)
+
+    The offset in force at each time, so rounds on either side of a daylight
+    saving change land in their own local hours.
+    """
+    utc_hours, index = np.unique(times // NS_PER_HOUR, return_inverse=True)
+    offsets = np.array([time.localtime(int(hour) * 3600).tm_gmtoff for hour in utc_hours],
+                       dtype=np.int64)
+    return offsets[index] * 10**9
+
+
+def hourly_win_rate(times, values):
+    """Win rate by local hour of day (streamed, so memory-mapped columns stay on disk)"""
+    rounds = np.zeros(24, dtype=np.int64)
+    wins = np.zeros(24)
+    for start in range(0, len(values), HOUR_CHUNK):
+        chunk_times = np.asarray(times[start:start + HOUR_CHUNK])
+        known = chunk_times > 0
+        hours = (chunk_times[known] + _utc_offsets(chunk_times[known])) // NS_PER_HOUR % 24
+        rounds += np.bincount(hours, minlength=24)
+        wins += np.bincount(hours, weights=np.asarray(values[start:start + HOUR_CHUNK])[known] > 1.0,
+                            minlength=24)
+    hours = np.flatnonzero(rounds)
+    return hours, rounds[hours], wins[hours] / rounds[hours] * 100
+
+
+class RoundColumns:
+    """Growable typed columns for the working history
+
+    `limit` bounds the rounds held in memory when an `archive` (a callable
+    returning the full column by name) can serve the older ones: the buffer
+    holds at most 2 * limit rounds and drops the oldest half when full.
+    """
+
+    def __init__(self, limit=None, archive=None):
+        self.limit = limit
+        self.archive = archive
+        self.stake_table = [0.0]  # code 0 = stake not recorded
+        self.codes_changed = False
+        self.reset()
+
+    @classmethod
+    def from_columns(cls, columns, stake_table=None, limit=None, archive=None):
+        """Build from arrays (missing columns are filled with 'unknown')
+
+        With an archive only the last `limit` rounds are copied into memory.
+        """
+        rounds = cls(limit, archive)
+        if stake_table:
+            rounds.stake_table = list(stake_table)
+        size = len(columns['values'])
+        start = max(0, size - limit) if limit and archive is not None else 0
+        rounds.offset = start
+        rounds.extend({name: None if column is None else column[start:]
+                       for name, column in columns.items()})
+        return rounds
+
+    def reset(self):
+        """Forget every round (the stake table is kept)"""
+        self.offset = 0  # rounds before the in-memory ones (archived)
+        self.count = 0
+        self._columns = {name: np.empty(1024, dtype=dtype) for name, dtype in COLUMNS}
+
+    def encode_stake(self, stake):
+        """Code of a stake value, added to the table when new"""
+        if stake is None:
+            return 0
+        stake = float(stake)
+        if stake not in self.stake_table:
+            if len(self.stake_table) > 255:
+                return 0
+            self.stake_table.append(stake)
+            self.codes_changed = True
+        return self.stake_table.index(stake)
+
+    def make_columns(self, values, times=None, stake=None, source='unknown'):
+        """Columns for new rounds; times default to now, 0 means unknown"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if times is None:
+            times = time.time_ns()
+        return {
+            'values': values,
+            'times': np.broadcast_to(np.asarray(times, dtype=np.int64), values.shape),
+            'stakes': np.full(values.size, self.encode_stake(stake), dtype=np.uint8),
+            'sources': np.full(values.size, SOURCES.index(source), dtype=np.uint8)
+        }
+
+    def extend(self, columns):
+        """Append rounds given as a dict of column arrays"""
+        size = len(columns['values'])
+        start, end = self.count, self.count + size
+        capacity = self._columns['values'].size
+        if end > capacity:
+            capacity = max(end, capacity * 2)
+            for name, dtype in COLUMNS:
+                grown = np.empty(capacity, dtype=dtype)
+                grown[:start] = self._columns[name][:start]
+                self._columns[name] = grown
+        for name, _ in COLUMNS:
+            column = columns.get(name)
+            self._columns[name][start:end] = 0 if column is None else column
+        self.count = end
+
+        if self.limit and self.archive is not None and self.count > 2 * self.limit:
+            drop = self.count - self.limit
+            for name, _ in COLUMNS:
+                self._columns[name][:self.limit] = self._columns[name][drop:self.count]
+            self.offset += drop
+            self.count = self.limit
+
+    @property
+    def total(self):
+        """Rounds in the history, archived ones included"""
+        return self.offset + self.count
+
+    def column(self, name):
+        """View of one column's in-memory (most recent) rounds"""
+        return self._columns[name][:self.count]
+
+    def full(self, name):
+        """One column over every round (memory-mapped when partly archived)"""
+        if not self.offset:
+            return self.column(name)
+        return self.archive(name)[:self.total]
+
+    def frozen(self, name='values'):
+        """Read-only column over the current rounds that later appends leave as is
+
+        Appends only write past the current rounds (or into a new, larger
+        buffer), so a view is enough unless the buffer can compact, which
+        needs an archive; archived columns are read-only memory maps.
+        """
+        column = self.full(name)
+        if self.archive is not None and not isinstance(column, np.memmap):
+            column = column.copy()
+        column.flags.writeable = False
+        return column
+
+    def tail(self, n, name='values'):
+        """Last n rounds of a column, from memory whenever they are there"""
+        if n <= self.count or not self.offset:
+            return self.column(name)[-n:] if n else self.column(name)[:0]
+        return np.asarray(self.full(name)[-n:])
+
+    @property
+    def values(self):
+        return self.full('values')
+
+    @property
+    def times(self):
+        return self.full('times')
+
+    def stake_values(self):
+        """Stake of every round (NaN when not recorded)"""
+        table = np.array(self.stake_table, dtype=np.float64)
+        table[0] = np.nan
+        return table[self.full('stakes')]
+
+    def source_names(self):
+        """Source label of every round"""
+        return np.array(SOURCES)[self.full('sources')]
+
+    @property
+    def nbytes(self):
+        """Bytes of memory used by the in-memory rounds"""
+        return self.count * sum(np.dtype(dtype).itemsize for _, dtype in COLUMNS)
@@ -0,0 +1,698 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Headless analysis engine and command line interface
+
+Everything here works on plain sequences/arrays and returns plain data, so
+it can run without Tk, e.g. to batch-process session files on a server:
+
+    python crash_engine.py crash_data.bin other_session.csv -o report.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from crash_columns import RECENT_ROUNDS, RoundColumns, hourly_win_rate
+from crash_import import import_file
+from crash_patterns import (ALPHA, MAX_LAG, STREAK_THRESHOLDS, autocorrelation, ljung_box,
+                            runs_test, streak_counts)
+from crash_rolling import RollingStats
+from crash_sketch import ACCURACY, PERCENTILES, THRESHOLDS, QuantileSketch
+from crash_stats import ProfitSeries, RunningStats
+from crash_survival import SurvivalCounts, curve_at
+from crash_store import HistoryStore, StoreError
+from crash_trace import timed
+
+
+def smart_prediction(history):
+    """Next-round estimate (mean of the last 5 points + 10%), None below 3 points"""
+    if len(history) < 3:
+        return None
+    recent = np.asarray(history[-5:], dtype=np.float64)
+    return max(1.01, float(recent.mean()) * 1.1)
+
+
+def trading_signal(prediction):
+    """Signal for a prediction"""
+    if prediction is None:
+        return "N/A"
+    if prediction > 2.5:
+        return "🟢 STRONG BUY"
+    elif prediction > 1.8:
+        return "🟡 MODERATE BUY"
+    else:
+        return "🔴 AVOID"
+
+
+def risk_analysis(volatility, count):
+    """Risk level for a volatility"""
+    if count < 3:
+        return {"level": "Low", "icon": "🟢", "volatility": 0, "recommendation": "Add more data"}
+
+    if volatility < 0.5:
+        return {"level": "Low", "icon": "🟢", "volatility": volatility, "recommendation": "Safe to bet"}
+    elif volatility < 1.0:
+        return {"level": "Medium", "icon": "🟡", "volatility": volatility, "recommendation": "Bet with caution"}
+    else:
+        return {"level": "High", "icon": "🔴", "volatility": volatility, "recommendation": "Avoid betting"}
+
+
+def volatility(stats):
+    """Volatility (population std) or 0 below 2 points"""
+    return stats.std if stats.count >= 2 else 0
+
+
+def dashboard(stats, total, profit, recent):
+    """Values behind the dashboard cards and live predictions
+
+    `recent` holds the last rounds (at least 5 when there are that many).
+    """
+    level = volatility(stats)
+    prediction = smart_prediction(recent)
+    return {
+        'rounds': total,
+        'profit': profit,
+        'win_rate': stats.win_rate,
+        'highest': stats.highest,
+        'lowest': stats.lowest,
+        'volatility': level,
+        'prediction': prediction,
+        'risk': risk_analysis(level, total),
+        'signal': trading_signal(prediction)
+    }
+
+
+def quantile_report(sketch):
+    """Percentiles and threshold fractions from a quantile sketch"""
+    return {
+        'percentiles': {str(p): sketch.quantile(p / 100) for p in PERCENTILES},
+        'below': {str(t): sketch.fraction_below(t) * 100 for t in THRESHOLDS}
+    }
+
+
+def format_quantile_report(report):
+    """Text of the percentile and threshold sections"""
+    below = "\n".join(
+        f"{'└─' if i == len(report['below']) - 1 else '├─'} {float(t):g}x: {share:.1f}%"
+        for i, (t, share) in enumerate(report['below'].items()))
+    return f"""
+Percentiles (±{ACCURACY * 100:.1f}%):
+├─ P90: {report['percentiles']['90']:.3f}x
+├─ P99: {report['percentiles']['99']:.3f}x
+└─ P99.9: {report['percentiles']['99.9']:.3f}x
+
+Rounds Below:
+{below}
+"""
+
+
+@timed()
+def statistical_report(history, stats=None, pnl=None, stake=10.0, sketch=None):
+    """Data behind the Statistical Analysis report, None below 3 points"""
+    if len(history) < 3:
+        return None
+    if stats is None:
+        stats = RunningStats.from_values(history)
+    if pnl is None:
+        pnl = ProfitSeries.from_values(history, stake)
+    if sketch is None:
+        sketch = QuantileSketch.from_values(history)
+
+    return {
+        'total_points': stats.count,
+        'mean': stats.mean,
+        'median': sketch.quantile(0.5),
+        'std': stats.std,
+        'variance': stats.variance,
+        'range': stats.value_range,
+        'win_rate': stats.win_rate,
+        'profit_factor': pnl.total / stats.count,
+        'risk_reward': stats.mean / stats.std if stats.std else 0,
+        'skewness': stats.skewness,
+        'kurtosis': stats.kurtosis,
+        'volatility': volatility(stats),
+        **quantile_report(sketch)
+    }
+
+
+def format_statistical_report(report):
+    """Text of the Statistical Analysis report"""
+    if report is None:
+        return "Add at least 3 points for analysis"
+    return f"""
+📊 Statistical Analysis Report
+{'='*40}
+
+Basic Statistics:
+├─ Total Points: {report['total_points']}
+├─ Mean: {report['mean']:.3f}x
+├─ Median: {report['median']:.3f}x
+├─ Standard Deviation: {report['std']:.3f}
+├─ Variance: {report['variance']:.3f}
+└─ Range: {report['range']:.3f}
+
+Performance Metrics:
+├─ Win Rate: {report['win_rate']:.1f}%
+├─ Profit Factor: {report['profit_factor']:.3f}
+└─ Risk/Reward Ratio: {report['risk_reward']:.3f}
+
+Distribution Analysis:
+├─ Skewness: {report['skewness']:.3f}
+├─ Kurtosis: {report['kurtosis']:.3f}
+└─ Volatility Index: {report['volatility']:.3f}
+""" + format_quantile_report(report)
+
+
+@timed()
+def range_report(blocks, history, start, end, stake=10.0):
+    """Statistics of rounds [start, end) from block summaries, None when empty
+
+    `blocks` is the crash_blocks.BlockIndex of `history`; only the partial
+    blocks at both ends are read, so this is instant on any history size.
+    """
+    stats = blocks.range_stats(history, start, end)
+    if not stats.count:
+        return None
+    start = max(0, start)
+    vol = volatility(stats)
+    return {
+        'first': start + 1,
+        'last': start + stats.count,
+        'points': stats.count,
+        'mean': stats.mean,
+        'std': stats.std,
+        'win_rate': stats.win_rate,
+        'lowest': stats.lowest,
+        'highest': stats.highest,
+        'profit': blocks.profit(history, start + stats.count, stake) - blocks.profit(history, start, stake),
+        'volatility': vol,
+        'risk': risk_analysis(vol, stats.count)
+    }
+
+
+def format_range_report(report):
+    """One-line summary of a round range"""
+    if report is None:
+        return "No rounds in this range"
+    return (f"Rounds {report['first']}–{report['last']}: Mean {report['mean']:.3f}x | "
+            f"Std {report['std']:.3f} | Win Rate {report['win_rate']:.1f}% | "
+            f"Low {report['lowest']:.2f}x High {report['highest']:.2f}x | "
+            f"Profit {report['profit']:+.2f} | Risk {report['risk']['icon']} {report['risk']['level']}")
+
+
+def streak_report(history, threshold):
+    """Streak lengths and runs test of the rounds above / at or below a threshold"""
+    below, above = streak_counts(history, threshold)
+    runs, expected, z, p = runs_test([below, above])
+    n = len(history)
+    share = float((above * np.arange(above.size)).sum()) / n
+    longest_above, longest_below = above.size - 1, below.size - 1
+    # Under independence streak lengths are geometric: length k with q^(k-1) * (1 - q)
+    below = np.pad(below, (0, max(0, 9 - below.size)))
+    losing = np.append(below[1:8], below[8:].sum())
+    lengths = np.arange(1, 9)
+    expected_losing = below.sum() * (1 - share) ** (lengths - 1) * share
+    expected_losing[-1] = below.sum() * (1 - share) ** 7
+    return {
+        'threshold': threshold,
+        'share_above': share,
+        'runs': runs,
+        'expected_runs': expected,
+        'z': z,
+        'p_value': p,
+        'longest_above': int(longest_above),
+        'longest_below': int(longest_below),
+        'losing_streaks': [int(c) for c in losing],
+        'expected_losing_streaks': [float(c) for c in expected_losing]
+    }
+
+
+@timed()
+def pattern_report(history, max_lag=MAX_LAG, alpha=ALPHA):
+    """Streak, autocorrelation and independence tests, None below 30 points"""
+    n = len(history)
+    if n < 30:
+        return None
+    streaks = [streak_report(history, threshold) for threshold in STREAK_THRESHOLDS]
+    acf = autocorrelation(history, max_lag)
+    q, q_p = ljung_box(acf, n)
+    band = 1.96 / np.sqrt(n)
+    # Bonferroni: each test must pass alpha / tests for the verdict to hold at alpha
+    p_values = [s['p_value'] for s in streaks] + [q_p]
+    return {
+        'points': n,
+        'streaks': streaks,
+        'autocorrelation': [float(r) for r in acf],
+        'band': float(band),
+        'lags_outside_band': [int(lag) for lag in np.flatnonzero(np.abs(acf) > band) + 1],
+        'ljung_box': q,
+        'ljung_box_p': q_p,
+        'alpha': alpha,
+        'pattern': bool(min(p_values) < alpha / len(p_values))
+    }
+
+
+def format_pattern_report(report):
+    """Text of the Pattern Analysis report"""
+    if report is None:
+        return "Add at least 30 points for pattern analysis"
+    streaks = "\n".join(f"""
+{'Win/Loss' if s['threshold'] == 1.0 else f"Above/Below {s['threshold']:g}x"} ({s['share_above'] * 100:.1f}% above):
+├─ Runs: {s['runs']:,} (expected {s['expected_runs']:,.1f}, z = {s['z']:+.2f}, p = {s['p_value']:.3f})
+├─ Longest streak above: {s['longest_above']}
+├─ Longest streak at or below: {s['longest_below']}
+└─ Losing streaks by length (observed / expected):
+   {'  '.join(f"{k + 1}{'+' if k == 7 else ''}: {o} / {e:.0f}" for k, (o, e) in
+              enumerate(zip(s['losing_streaks'], s['expected_losing_streaks'])))}"""
+                         for s in report['streaks'])
+    acf = " ".join(f"{r:+.3f}" for r in report['autocorrelation'][:10])
+    outside = ", ".join(str(lag) for lag in report['lags_outside_band']) or "none"
+    if report['pattern']:
+        verdict = (f"⚠️ Rounds are NOT consistent with independent draws "
+                   f"(a test failed at {report['alpha'] * 100:g}% after correction for multiple tests).")
+    else:
+        verdict = ("✅ No pattern beyond chance: streaks and autocorrelation are what "
+                   "independent rounds produce.\nPast rounds carry no information about the next one, "
+                   "so predictions built on them have no edge.")
+    return f"""
+🔍 Pattern Analysis
+{'='*40}
+
+{report['points']:,} rounds
+{streaks}
+
+Autocorrelation of log crash points (lags 1-10):
+{acf}
+├─ 95% band: ±{report['band']:.3f}, lags outside: {outside}
+└─ Ljung-Box ({len(report['autocorrelation'])} lags): Q = {report['ljung_box']:.1f}, p = {report['ljung_box_p']:.3f}
+
+{verdict}
+"""
+
+
+@timed()
+def backtest_report(history, stake=10.0, workers=None):
+    """Walk-forward backtest of smart_prediction/trading_signal and a parameter grid"""
+    import crash_backtest  # the process pool machinery is only loaded when needed
+
+    result = crash_backtest.backtest(history, stake=stake)
+    if result is None:
+        return None
+    recent = history[-crash_backtest.GRID_ROUNDS:]
+    return {
+        **result,
+        'stake': stake,
+        'grid_rounds': len(recent),
+        'grid': crash_backtest.grid_search(recent, stake=stake, workers=workers)
+    }
+
+
+def format_backtest_report(report, top=5):
+    """Text of the signal backtest report"""
+    if report is None:
+        return "Add more points to backtest the signals"
+    levels = "\n".join(
+        f"{'└─' if name == 'strong' else '├─'} {name.title()} buy: {level['bets']:,} bets, "
+        f"hit rate {level['hit_rate']:.1f}%, P&L {level['profit']:+,.2f}"
+        for name, level in report['levels'].items())
+    calibration = "\n".join(
+        f"{c['low']:>5g}x – {format(c['high'], 'g') + 'x' if c['high'] else '∞':<6}{c['rounds']:>10,} "
+        f"{c['mean_prediction']:>8.2f}x {c['hit_rate']:>8.1f}% {c['chance_rate']:>8.1f}%"
+        for c in report['calibration'])
+    baselines = "\n".join(
+        f"{'└─' if i == len(report['baselines']) - 1 else '├─'} {name}: {profit:+,.2f}"
+        for i, (name, profit) in enumerate(report['baselines'].items()))
+    best, best_profit = max(report['baselines'].items(), key=lambda item: item[1])
+    if report['profit'] > best_profit:
+        verdict = f"✅ The signals beat every baseline (best: {best}, {best_profit:+,.2f})"
+    else:
+        verdict = f"❌ The signals do not beat the best baseline ({best}, {best_profit:+,.2f})"
+    grid = "\n".join(
+        f"window {g['window']:>2}, ×{g['factor']:<4g} buy above {g['moderate']:g}x: "
+        f"{g['bets']:,} bets, hit {g['hit_rate']:.1f}%, P&L {g['profit']:+,.2f}"
+        for g in report['grid'][:top])
+    return f"""
+🧪 Signal Backtest (walk-forward)
+{'='*40}
+
+Each round predicted from the {report['window']} rounds before it; buys cash out
+at the prediction with stake {report['stake']:g}. {report['rounds']:,} rounds replayed.
+
+Smart signals: {report['bets']:,} bets, hit rate {report['hit_rate']:.1f}%, P&L {report['profit']:+,.2f}
+{levels}
+
+Calibration (how often the round reached the prediction):
+ Prediction       Rounds     Mean  Observed  By chance
+{calibration}
+
+Baselines:
+{baselines}
+{verdict}
+
+Best of {len(report['grid'])} parameter sets on the last {report['grid_rounds']:,} rounds
+(picked on the same rounds, so expect them to do worse on new ones):
+{grid}
+"""
+
+
+@timed()
+def probability_report(history, survival=None):
+    """Empirical vs theoretical P(crash >= x) with bootstrap bands, None below 5 points"""
+    if len(history) < 5:
+        return None
+    if survival is None:
+        survival = SurvivalCounts.from_values(history)
+    curve = survival.curve()
+    outside = (curve['theoretical'] < curve['lower']) | (curve['theoretical'] > curve['upper'])
+    return {
+        'points': curve['count'],
+        'confidence': curve['confidence'],
+        'house_edge': curve['house_edge'],
+        'grid_points': int(curve['x'].size),
+        'outside_band': int(np.count_nonzero(outside)),
+        'targets': curve_at(curve)
+    }
+
+
+def format_probability_report(report):
+    """Text of the Probability Analysis report"""
+    if report is None:
+        return "Add at least 5 points for probability analysis"
+    rows = "\n".join(
+        f"{r['multiplier']:>7g}x  {r['survival'] * 100:>7.3f}%  "
+        f"[{r['lower'] * 100:>6.3f}% – {r['upper'] * 100:>6.3f}%]  "
+        f"{r['theoretical'] * 100:>7.3f}%  {r['implied_edge'] * 100:>+6.2f}%"
+        for r in report['targets'])
+    return f"""
+🎲 Probability Analysis
+{'='*40}
+
+P(crash ≥ x) over {report['points']:,} rounds, {report['confidence'] * 100:g}% bootstrap band,
+against an honest game with a {report['house_edge'] * 100:g}% house edge.
+
+ Target   Observed   Band                     Theory   Implied edge
+{rows}
+
+Theory outside the band at {report['outside_band']} of {report['grid_points']} grid points (1.01x – 1000x)
+"""
+
+
+@timed()
+def profitability_report(history, stake=10.0, sessions=None, seed=0):
+    """Monte Carlo bankroll outcomes per cash-out target and stake, None below 10 points"""
+    import crash_montecarlo  # the process pool machinery is only loaded when needed
+
+    if len(history) < 10:
+        return None
+    sessions = sessions or crash_montecarlo.SESSIONS
+    bankroll = crash_montecarlo.BANKROLL_STAKES * stake
+    return {
+        'sessions': sessions,
+        'rounds': crash_montecarlo.SESSION_ROUNDS,
+        'bankroll': bankroll,
+        'seed': seed,
+        'results': crash_montecarlo.simulate(history, stake, bankroll, sessions=sessions, seed=seed)
+    }
+
+
+def format_profitability_report(report):
+    """Text of the Profitability Analysis report"""
+    if report is None:
+        return "Add at least 10 points for profitability analysis"
+    rows = "\n".join(
+        f"{r['cashout']:>5.1f}x {r['stake']:>8.2f} {r['win_probability'] * 100:>6.1f}% "
+        f"{r['ev_per_round']:>+9.3f} {r['expected_loss']:>+10.2f} ±{r['expected_loss_error']:<7.2f}"
+        f"{r['ruin_probability'] * 100:>6.2f}% "
+        f"{r['profit_probability'] * 100:>7.1f}%   "
+        f"{r['drawdown']['50']:.0f} / {r['drawdown']['90']:.0f} / {r['drawdown']['99']:.0f}"
+        for r in report['results'])
+    best = min(report['results'], key=lambda r: r['expected_loss'])
+    worst = max(max(r['ruin_error'], r['profit_error']) for r in report['results'])
+    return f"""
+💰 Profitability Analysis (Monte Carlo)
+{'='*40}
+
+{report['sessions']:,} sessions × {report['rounds']} rounds per setting, starting bankroll {report['bankroll']:.2f}
+Rounds are bootstrapped from the recorded multipliers (seed {report['seed']}).
+
+Target    Stake   Win%   EV/round  Exp. loss (95%)      Ruin%  Profit%   Drawdown p50 / p90 / p99
+{rows}
+
+Ruin% and Profit% are within ±{worst * 100:.2f} percentage points (95%) at this many sessions.
+
+Smallest expected loss: cash out at {best['cashout']:g}x with stake {best['stake']:.2f} ({best['expected_loss']:+.2f} per session)
+"""
+
+
+def trend_direction(change):
+    """Label for a relative change in percent"""
+    if change > 5:
+        return "📈 Rising"
+    elif change < -5:
+        return "📉 Falling"
+    else:
+        return "➡️ Flat"
+
+
+@timed()
+def trend_report(rolling, window=10):
+    """Data behind the Trend Analysis report, None below 5 points"""
+    if rolling.count < 5:
+        return None
+    windows = [{'window': w, **rolling.latest(w)}
+               for w in sorted(set(rolling.windows) | {window}) if rolling.count >= w]
+    if not windows:
+        return None
+
+    short = next((w for w in windows if w['window'] == window), windows[0])
+    long = windows[-1]
+    sma = rolling.series(short['window'])['sma']
+    previous = sma[-1 - short['window']] if rolling.count >= 2 * short['window'] else np.nan
+
+    def change(new, old):
+        return (new / old - 1) * 100 if old and np.isfinite(old) else 0.0
+
+    return {
+        'points': rolling.total,
+        'windows': windows,
+        'short_window': short['window'],
+        'long_window': long['window'],
+        'short_vs_long': change(short['sma'], long['sma']),
+        'momentum': change(short['sma'], previous),
+        'volatility_change': change(short['std'], long['std']),
+        'win_rate_change': short['win_rate'] - long['win_rate']
+    }
+
+
+def format_trend_report(report):
+    """Text of the Trend Analysis report"""
+    if report is None:
+        return "Add at least 5 points for trend analysis"
+    rows = "\n".join(
+        f"{'└─' if i == len(report['windows']) - 1 else '├─'} Window {w['window']}: "
+        f"SMA {w['sma']:.3f}x | EMA {w['ema']:.3f}x | Std {w['std']:.3f} | "
+        f"Win Rate {w['win_rate']:.1f}%"
+        for i, w in enumerate(report['windows']))
+    return f"""
+📈 Trend Analysis Report
+{'='*40}
+
+Rolling Windows (latest):
+{rows}
+
+Trend ({report['short_window']} vs {report['long_window']} rounds):
+├─ Average vs long run: {report['short_vs_long']:+.1f}% {trend_direction(report['short_vs_long'])}
+├─ Momentum (vs {report['short_window']} rounds ago): {report['momentum']:+.1f}% {trend_direction(report['momentum'])}
+├─ Volatility vs long run: {report['volatility_change']:+.1f}%
+└─ Win Rate vs long run: {report['win_rate_change']:+.1f} pts
+"""
+
+
+@timed()
+def hourly_report(times, history):
+    """Rounds and win rate per local hour of day, None without timestamps"""
+    hours, rounds, win_rates = hourly_win_rate(times, history)
+    if not hours.size:
+        return None
+    return [{'hour': int(h), 'rounds': int(n), 'win_rate': float(r)}
+            for h, n, r in zip(hours, rounds, win_rates)]
+
+
+def format_hourly_report(report):
+    """Text of the win-rate-by-hour section"""
+    if report is None:
+        return "\nWin Rate by Hour: no timestamped rounds yet\n"
+    rows = "\n".join(
+        f"{'└─' if i == len(report) - 1 else '├─'} {h['hour']:02d}:00  "
+        f"{h['rounds']:>6} rounds | Win Rate {h['win_rate']:.1f}%"
+        for i, h in enumerate(report))
+    return f"""
+Win Rate by Hour:
+{rows}
+"""
+
+
+def analyze(history, stake=10.0, sketch=None):
+    """Full headless analysis of one history"""
+    history = np.asarray(history, dtype=np.float64)
+    stats = RunningStats.from_values(history)
+    pnl = ProfitSeries.from_values(history, stake)
+    if sketch is None:
+        sketch = QuantileSketch.from_values(history)
+    rolling = RollingStats.from_values(history)
+    prediction = smart_prediction(history)
+    return {
+        'points': stats.count,
+        'stake': pnl.stake,
+        'net_profit': pnl.total,
+        'statistics': statistical_report(history, stats, pnl, sketch=sketch),
+        'probability': probability_report(history),
+        'patterns': pattern_report(history),
+        'trend': trend_report(rolling),
+        'risk': risk_analysis(volatility(stats), stats.count),
+        'prediction': prediction,
+        'signal': trading_signal(prediction)
+    }
+
+
+def working_state(values, meta=None, stake_table=None, stake=10.0, store=None):
+    """Rounds, statistics, rolling and profit state the app keeps for a history
+
+    With the history's store only the recent rounds are copied into memory;
+    older ones stay memory-mapped and full-history statistics come from its
+    block summaries.
+    """
+    rounds = RoundColumns.from_columns({'values': values, **(meta or {})}, stake_table,
+                                       RECENT_ROUNDS, store.column if store else None)
+    blocks = store.blocks if store is not None and len(values) else None
+    return {
+        'rounds': rounds,
+        'stats': store.blocks.stats() if store is not None else RunningStats.from_values(values),
+        'rolling': RollingStats.from_values(values, limit=RECENT_ROUNDS),
+        # Profit is always derived from the history so it cannot drift
+        'pnl': ProfitSeries.from_values(values, stake, RECENT_ROUNDS, blocks)
+    }
+
+
+def load_working_state(store, stake=10.0):
+    """working_state of a history store; raises StoreError or OSError when unreadable"""
+    values, _ = store.load()
+    meta, stake_table = store.load_meta()
+    return working_state(values, meta, stake_table, stake, store)
+
+
+def profit_curve(pnl, blocks=None):
+    """Cumulative profit over the whole history as {'x': round numbers, 'y': profit}
+
+    Rounds before the ones `pnl` keeps come from the per-block profit of the
+    history's BlockIndex, one point per block; the kept rounds follow one
+    point each.
+    """
+    x = np.arange(pnl.offset + 1, pnl.offset + pnl.count + 1, dtype=np.float64)
+    y = pnl.cumulative
+    if blocks is not None and pnl.offset:
+        head = min(pnl.offset // blocks.block_size, blocks.blocks)
+        block_x = np.arange(1, head + 1, dtype=np.float64) * blocks.block_size
+        block_y = np.cumsum(blocks.block_profits(pnl.stake)[:head])
+        x, y = np.concatenate([block_x, x]), np.concatenate([block_y, y])
+    return {'x': x, 'y': y}
+
+
+def chart_series(name, rounds, rolling, pnl, window=10, blocks=None):
+    """Series the points, profit and moving average charts show
+
+    'distribution' and 'risk' read the whole history, so the app computes them
+    on a worker (see background_chart). The profit trend covers the whole
+    history through `blocks` (see profit_curve); the others use the recent
+    rounds.
+    """
+    if name == 'points':
+        return rounds.tail(50)
+    elif name == 'profit':
+        return profit_curve(pnl, blocks)
+    elif name == 'moving_average':
+        return [rolling.series(window)['sma'], rolling.ema(window), rolling.series(50)['sma']]
+    return []
+
+
+def background_chart(name, history, stats, bins=None, survival=None):
+    """Data of the distribution (histogram) or risk (survival curve) chart"""
+    if name == 'distribution':
+        from crash_charts import histogram  # matplotlib is only loaded for charts
+
+        return histogram(history, bins, stats.lowest, stats.highest)
+    if survival is None:
+        survival = SurvivalCounts.from_values(history)
+    return survival.curve()
+
+
+def load_history(path):
+    """Read a history file (.bin store, or anything crash_import understands)"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path}: no such file")
+    if path.endswith('.bin'):
+        values, _ = HistoryStore(path, legacy_path=None).load()
+        return np.array(values)
+    values, _ = import_file(path)
+    return values
+
+
+def load_session(path):
+    """(history, quantile sketch) of a file; .bin stores reuse their saved sketch"""
+    if path.endswith('.bin') and os.path.exists(path):
+        store = HistoryStore(path, legacy_path=None)
+        values, _ = store.load()
+        return np.array(values), store.sketch
+    history = load_history(path)
+    return history, QuantileSketch.from_values(history)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze crash history files without the GUI")
+    parser.add_argument('files', nargs='+', help="history files (.bin, .json, .csv, .txt)")
+    parser.add_argument('--stake', type=float, default=10.0, help="stake per round")
+    parser.add_argument('-o', '--output', help="write JSON here instead of stdout")
+    parser.add_argument('--text', action='store_true', help="print the text report instead of JSON")
+    parser.add_argument('--backtest', action='store_true',
+                        help="also backtest the trading signals (slower)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    merged = QuantileSketch()
+    for path in args.files:
+        try:
+            history, sketch = load_session(path)
+            results[path] = analyze(history, args.stake, sketch)
+            if args.backtest:
+                results[path]['backtest'] = backtest_report(history, args.stake)
+            merged.merge(sketch)
+        except (OSError, ValueError, StoreError) as e:
+            results[path] = {'error': str(e)}
+    failed = any('error' in result for result in results.values())
+    # Percentiles over every file come from the merged sketches, not the raw rounds
+    if merged.count and len(args.files) > 1:
+        results['(all files)'] = {'points': merged.count, **quantile_report(merged)}
+
+    if args.text:
+        for path, result in results.items():
+            print(f"# {os.path.basename(path)}")
+            if 'statistics' in result:
+                print(format_statistical_report(result['statistics']))
+                if 'backtest' in result:
+                    print(format_backtest_report(result['backtest']))
+            else:
+                print(result.get('error') or format_quantile_report(result))
+    elif args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
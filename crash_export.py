@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Columnar export of the history to Parquet, Arrow IPC or CSV
+
+Rows are streamed a chunk at a time from the (memory-mapped) history
+columns, all of them or the ranges the session index selects, so memory
+stays bounded whatever the history size. Parquet and Arrow need pyarrow; without it only CSV (plain
+or gzip) is offered.
+
+History rows carry the round number, crash point, time, recorded stake and
+source; session rows carry session, table and time instead. Both include
+the profit of every round at the export stake and its running total.
+
+    python crash_export.py crash_data.bin -o rounds.parquet --start 1000
+    python crash_export.py --session 2024-01-31 --table main -o evening.csv.gz
+"""
+
+import argparse
+import gzip
+import os
+import sqlite3
+import sys
+
+import numpy as np
+
+from crash_columns import SOURCES
+from crash_jobs import checkpoint
+from crash_sessions import pieces
+from crash_stats import round_profits
+
+CHUNK = 1 << 18  # rows per written chunk
+GZIP_LEVEL = 6  # the default 9 is several times slower for little gain
+HISTORY_COLUMNS = (('round', 'int'), ('point', 'float'), ('time', 'time'), ('stake', 'float'),
+                   ('source', 'text'), ('profit', 'float'), ('cumulative_profit', 'float'))
+SESSION_COLUMNS = (('round', 'int'), ('session', 'text'), ('table', 'text'), ('time', 'time'),
+                   ('point', 'float'), ('profit', 'float'), ('cumulative_profit', 'float'))
+COMPRESSION = {'parquet': ('zstd', 'snappy', 'gzip', 'none'),
+               'arrow': ('zstd', 'lz4', 'none'),
+               'csv': ('none', 'gzip')}  # first is the default
+EXTENSIONS = {'.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow',
+              '.csv': 'csv', '.gz': 'csv'}
+
+
+def _pyarrow():
+    """pyarrow (with its parquet module loaded), or None when not installed"""
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def available_formats():
+    """Formats this installation can write"""
+    return ['parquet', 'arrow', 'csv'] if _pyarrow() is not None else ['csv']
+
+
+def detect_format(path):
+    """Export format from a file name (csv when unknown)"""
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower(), 'csv')
+
+
+def snapshot_rounds(rounds):
+    """Frozen columns of a RoundColumns, safe to export while rounds keep arriving"""
+    return {'values': rounds.frozen('values'), 'times': rounds.frozen('times'),
+            'stakes': rounds.frozen('stakes'), 'sources': rounds.frozen('sources'),
+            'stake_table': list(rounds.stake_table)}
+
+
+def profit_before(values, start, stake, chunk=CHUNK):
+    """Total profit of rounds [0, start)"""
+    return sum(float(round_profits(values[i:min(i + chunk, start)], stake).sum())
+               for i in range(0, start, chunk))
+
+
+def stake_values(stakes, codes):
+    """Stakes of the given stake codes; NaN for codes the stake table does not cover"""
+    codes = np.asarray(codes)
+    known = codes < len(stakes)
+    return np.where(known, stakes[np.where(known, codes, 0)], np.nan)
+
+
+def history_chunks(columns, stake=10.0, start=0, end=None, chunk=CHUNK):
+    """Column chunks of history rounds [start, end) (0-based, end exclusive)"""
+    values = columns['values']
+    end = len(values) if end is None else min(end, len(values))
+    start = max(0, start)
+    stakes = np.array(columns['stake_table'], dtype=np.float64)
+    stakes[0] = np.nan  # code 0: not recorded
+    sources = np.array(SOURCES, dtype=object)
+    cumulative = profit_before(values, start, stake)
+    for first in range(start, end, chunk):
+        last = min(first + chunk, end)
+        points = np.asarray(values[first:last], dtype=np.float64)
+        profit = round_profits(points, stake)
+        running = cumulative + np.cumsum(profit)
+        cumulative = float(running[-1])
+        yield {'round': np.arange(first + 1, last + 1, dtype=np.int64),
+               'point': points,
+               'time': np.asarray(columns['times'][first:last], dtype=np.int64),
+               'stake': stake_values(stakes, columns['stakes'][first:last]),
+               'source': sources[np.asarray(columns['sources'][first:last])],
+               'profit': profit,
+               'cumulative_profit': running}
+
+
+def session_chunks(columns, ranges, start=None, end=None, stake=10.0, first_round=0,
+                   last_round=None, chunk=CHUNK):
+    """Column chunks of the history rounds a session index selects
+
+    `columns` holds the history's 'values' and 'times' and `ranges` comes
+    from SessionStore.ranges. start/end are epoch seconds; first_round/
+    last_round select rows of the matching rounds (0-based, end exclusive)
+    the way history_chunks does.
+    """
+    cumulative = 0.0
+    row = 0
+    for first, last, keep, session, table in pieces(ranges, columns['times'], start, end, chunk):
+        points = np.asarray(columns['values'][first:last], dtype=np.float64)
+        times = np.asarray(columns['times'][first:last], dtype=np.int64)
+        if keep is not None:
+            points, times = points[keep], times[keep]
+        if not points.size:
+            continue
+        profit = round_profits(points, stake)
+        running = cumulative + np.cumsum(profit)
+        cumulative = float(running[-1])
+        # Rows before the range are read only for the running profit
+        low = max(first_round - row, 0)
+        high = points.size if last_round is None else min(points.size, last_round - row)
+        if high > low:
+            keep = slice(low, high)
+            yield {'round': np.arange(row + low + 1, row + high + 1, dtype=np.int64),
+                   'session': np.full(high - low, session, dtype=object),
+                   'table': np.full(high - low, table, dtype=object),
+                   'time': times[keep],
+                   'point': points[keep],
+                   'profit': profit[keep],
+                   'cumulative_profit': running[keep]}
+        row += points.size
+        if last_round is not None and row >= last_round:
+            return
+
+
+def export(path, columns, chunks, fmt=None, compression=None, progress=None):
+    """Stream column chunks to `path`; returns the number of rows written
+
+    `columns` is HISTORY_COLUMNS or SESSION_COLUMNS, `progress(rows)` is
+    called after every chunk. Raises ValueError for a format or codec this
+    installation cannot write. When writing fails (or is interrupted) the
+    partial file is removed.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in available_formats():
+        raise ValueError(f"{fmt} export needs pyarrow (pip install pyarrow)")
+    if compression is None:
+        gzipped = fmt == 'csv' and path.lower().endswith('.gz')
+        compression = 'gzip' if gzipped else COMPRESSION[fmt][0]
+    if compression not in COMPRESSION[fmt]:
+        raise ValueError(f"{fmt} cannot be compressed with {compression}")
+    writer = {'parquet': _write_parquet, 'arrow': _write_arrow, 'csv': _write_csv}[fmt]
+    try:
+        return writer(path, columns, chunks, None if compression == 'none' else compression,
+                      progress or (lambda rows: None))
+    except BaseException:
+        # A half-written file would look like a complete, shorter export
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+
+
+def _arrow_schema(pa, columns):
+    types = {'int': pa.int64(), 'float': pa.float64(), 'time': pa.timestamp('ns', tz='UTC'),
+             'text': pa.string()}
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+
+def _arrow_batch(pa, schema, columns, chunk):
+    arrays = []
+    for (name, kind), field in zip(columns, schema):
+        data = chunk[name]
+        if kind == 'time':
+            arrays.append(pa.array(data, type=field.type, mask=data == 0))  # 0: unknown
+        else:
+            arrays.append(pa.array(data, type=field.type, from_pandas=True))  # NaN: null
+    return pa.record_batch(arrays, schema=schema)
+
+
+def _write_parquet(path, columns, chunks, compression, progress):
+    pa = _pyarrow()
+    schema = _arrow_schema(pa, columns)
+    rows = 0
+    with pa.parquet.ParquetWriter(path, schema, compression=compression or 'none') as writer:
+        for chunk in chunks:
+            checkpoint()
+            writer.write_batch(_arrow_batch(pa, schema, columns, chunk))
+            rows += len(chunk['round'])
+            progress(rows)
+    return rows
+
+
+def _write_arrow(path, columns, chunks, compression, progress):
+    pa = _pyarrow()
+    schema = _arrow_schema(pa, columns)
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    rows = 0
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, schema, options=options) as writer:
+        for chunk in chunks:
+            checkpoint()
+            writer.write_batch(_arrow_batch(pa, schema, columns, chunk))
+            rows += len(chunk['round'])
+            progress(rows)
+    return rows
+
+
+def _csv_text(value):
+    """A text cell, quoted the way the csv module does when it has to be"""
+    value = '' if value is None else str(value)
+    if any(c in value for c in ',"\r\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def _csv_column(kind, data):
+    """Cells of one column: empty for unknown times and missing numbers"""
+    if kind == 'time':
+        cells = np.datetime_as_string(data.astype('datetime64[ns]'), unit='ms', timezone='UTC')
+        return np.where(data == 0, '', cells).tolist()
+    if kind == 'float':
+        return ['%.12g' % value if value == value else '' for value in data.tolist()]
+    if kind == 'int':
+        return list(map(str, data.tolist()))
+    return [_csv_text(value) for value in data.tolist()]
+
+
+def _write_csv(path, columns, chunks, compression, progress):
+    # Rows are joined a chunk at a time; csv.writer is several times slower
+    if compression == 'gzip':
+        f = gzip.open(path, 'wt', compresslevel=GZIP_LEVEL, encoding='utf-8', newline='')
+    else:
+        f = open(path, 'w', encoding='utf-8', newline='')
+    rows = 0
+    with f:
+        f.write(','.join(name for name, _ in columns) + '\n')
+        for chunk in chunks:
+            checkpoint()
+            cells = [_csv_column(kind, chunk[name]) for name, kind in columns]
+            if cells[0]:
+                f.write('\n'.join(map(','.join, zip(*cells))) + '\n')
+            rows += len(chunk['round'])
+            progress(rows)
+    return rows
+
+
+def main(argv=None):
+    from crash_sessions import DEFAULT_PATH as SESSIONS_PATH, SessionStore
+    from crash_store import DEFAULT_PATH as HISTORY_PATH, HistoryStore, StoreError
+
+    parser = argparse.ArgumentParser(description="Export crash rounds to Parquet, Arrow or CSV")
+    parser.add_argument('history', nargs='?', default=HISTORY_PATH)
+    parser.add_argument('-o', '--output', required=True,
+                        help="file to write; the extension picks the format")
+    parser.add_argument('--format', choices=('parquet', 'arrow', 'csv'))
+    parser.add_argument('--compression', help="codec, or 'none'")
+    parser.add_argument('--stake', type=float, default=10.0, help="stake behind the profit columns")
+    parser.add_argument('--start', type=int, default=1, help="first round (1-based)")
+    parser.add_argument('--end', type=int, help="last round (inclusive)")
+    parser.add_argument('--session', help="export this session from the session index")
+    parser.add_argument('--table', help="export this table from the session index")
+    parser.add_argument('--sessions-db', default=SESSIONS_PATH)
+    args = parser.parse_args(argv)
+
+    try:
+        store = HistoryStore(args.history, legacy_path=None)
+        values, _ = store.load()
+        meta, stake_table = store.load_meta()
+        if args.session or args.table:
+            sessions = SessionStore(args.sessions_db)
+            ranges = sessions.ranges(args.session, args.table)
+            sessions.close()
+            columns = SESSION_COLUMNS
+            chunks = session_chunks({'values': values, 'times': meta['times']}, ranges,
+                                    stake=args.stake, first_round=args.start - 1,
+                                    last_round=args.end)
+        else:
+            columns = HISTORY_COLUMNS
+            chunks = history_chunks({'values': values, **meta, 'stake_table': stake_table or [0.0]},
+                                    args.stake, args.start - 1, args.end)
+        rows = export(args.output, columns, chunks, args.format, args.compression)
+    except (OSError, StoreError, ValueError, sqlite3.Error) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(f"✅ Exported {rows} rounds to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
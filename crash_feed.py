@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Live round feed: an asyncio NDJSON endpoint and a stand-in recorder
+
+Recorders connect over TCP (or a Unix socket) and write one JSON object per
+line, e.g. {"point": 2.31, "table": "T1", "session": "evening", "ts": 1.7e9}.
+The value may use any of crash_import.VALUE_COLUMNS, `ts` is epoch seconds
+(receipt time when missing) and bare numbers are accepted as well.
+
+The server runs its own event loop on a daemon thread. Every read of a
+connection becomes one validated batch of columns on a bounded queue.Queue
+that the GUI drains from root.after ticks; while the queue is full the
+connection is not read, so TCP flow control slows the sender down instead
+of memory growing.
+
+    python crash_feed.py --rate 2000 --tables 4      # replay a stand-in feed
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+
+from crash_import import VALUE_COLUMNS, ImportReport, parse_tokens
+
+FEED_HOST = '127.0.0.1'
+FEED_PORT = 8765
+READ_BYTES = 1 << 16
+QUEUE_BATCHES = 256  # batches waiting for the GUI before senders are paused
+BACKOFF = 0.005  # seconds between attempts to queue a batch while the queue is full
+HOUSE_EDGE = 0.01
+
+
+def parse_records(lines, report, first_line=1, received=None):
+    """Columns of NDJSON round lines (bytes): values, times (epoch ns), sessions, tables
+
+    Invalid rounds are counted in `report` (with their line numbers counted
+    from `first_line`) and dropped; None if nothing is left.
+    """
+    numbers = [n for n, line in enumerate(lines, first_line) if line.strip()]
+    lines = [line for line in lines if line.strip()]
+    if not lines:
+        return None
+    try:
+        # One parse for the whole batch; a bad line sends it through the slow path
+        records = json.loads(b'[' + b','.join(lines) + b']')
+    except ValueError:
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                records.append(line.decode('utf-8', errors='replace').strip())
+
+    tokens, times, sessions, tables = [], [], [], []
+    for record in records:
+        if isinstance(record, dict):
+            value = next((record[key] for key in VALUE_COLUMNS if key in record), '')
+            times.append(record.get('ts'))
+            sessions.append(record.get('session'))
+            tables.append(record.get('table'))
+        else:
+            value = record
+            times.append(None)
+            sessions.append(None)
+            tables.append(None)
+        tokens.append(value if isinstance(value, str) else json.dumps(value))
+
+    rejected = report.rejected
+    values = parse_tokens(tokens, numbers, report)
+    keep = slice(None)
+    if report.rejected > rejected:
+        with np.errstate(invalid='ignore'):
+            parsed = np.array([_number(token) for token in tokens])
+            keep = np.flatnonzero(np.isfinite(parsed) & (parsed > 0))
+    if not values.size:
+        return None
+
+    seconds = np.array([np.nan if t is None or isinstance(t, str) else t for t in times],
+                       dtype=np.float64)[keep]
+    received = time.time_ns() if received is None else received
+    return {
+        'values': values,
+        'times': np.where(np.isfinite(seconds), seconds * 1e9, received).astype(np.int64),
+        'sessions': np.array(sessions, dtype=object)[keep],
+        'tables': np.array(tables, dtype=object)[keep]
+    }
+
+
+def _number(token):
+    try:
+        return float(token.strip().rstrip('xX'))
+    except (AttributeError, ValueError):
+        return np.nan
+
+
+def drain(batches, limit=QUEUE_BATCHES):
+    """Up to `limit` queued batches merged into one (None when the queue is empty)"""
+    taken = []
+    while len(taken) < limit:
+        try:
+            taken.append(batches.get_nowait())
+        except queue.Empty:
+            break
+    if not taken:
+        return None
+    return {name: np.concatenate([batch[name] for batch in taken]) for name in taken[0]}
+
+
+def runs(batch):
+    """(start, stop, session, table) for each run of consecutive rows from one session/table
+
+    In arrival order, so a batch can be stored as received and every run
+    indexed under its own session/table.
+    """
+    sessions, tables = batch['sessions'], batch['tables']
+    if not sessions.size:
+        return []
+    change = np.flatnonzero((sessions[1:] != sessions[:-1]) | (tables[1:] != tables[:-1])) + 1
+    starts, stops = np.r_[0, change], np.r_[change, sessions.size]
+    return [(int(start), int(stop), sessions[start], tables[start])
+            for start, stop in zip(starts, stops)]
+
+
+class FeedServer:
+    """NDJSON round endpoint on a background event loop"""
+
+    def __init__(self, host=FEED_HOST, port=FEED_PORT, path=None, maxsize=QUEUE_BATCHES):
+        self.host = host
+        self.port = port
+        self.path = path  # Unix socket path instead of TCP
+        self.batches = queue.Queue(maxsize)
+        self.report = ImportReport()
+        self.connections = 0
+        self.address = None
+        self._loop = None
+        self._stopped = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+        self._writers = set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start serving; raises OSError when the address cannot be bound"""
+        self._ready.clear()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='crash-feed', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            self._thread.join()
+            raise self._error
+
+    def stop(self):
+        """Close the endpoint and every connection"""
+        if self.running:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+            self._thread.join()
+
+    def _run(self):
+        try:
+            asyncio.run(self._serve())
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        if self.path:
+            server = await asyncio.start_unix_server(self._handle, self.path, limit=READ_BYTES)
+            self.address = self.path
+        else:
+            server = await asyncio.start_server(self._handle, self.host, self.port,
+                                                limit=READ_BYTES)
+            self.address = '%s:%d' % server.sockets[0].getsockname()[:2]
+        self._ready.set()
+        async with server:
+            await self._stopped.wait()
+            # Closing the transports ends every handler at its next read
+            handlers = list(self._writers)
+            for writer, _ in handlers:
+                writer.close()
+            await asyncio.gather(*(task for _, task in handlers), return_exceptions=True)
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def _handle(self, reader, writer):
+        handler = (writer, asyncio.current_task())
+        self._writers.add(handler)
+        self.connections += 1
+        pending = b''
+        line_no = 1
+        try:
+            while not self._stopped.is_set():
+                chunk = await reader.read(READ_BYTES)
+                if not chunk:
+                    break
+                lines = (pending + chunk).split(b'\n')
+                pending = lines.pop()
+                await self._put(parse_records(lines, self.report, line_no))
+                line_no += len(lines)
+            await self._put(parse_records([pending], self.report, line_no))
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            self._writers.discard(handler)
+            writer.close()
+
+    async def _put(self, batch):
+        """Queue a batch, holding the connection unread while the GUI catches up"""
+        if batch is None:
+            return
+        while True:
+            try:
+                self.batches.put_nowait(batch)
+                return
+            except queue.Full:
+                if self._stopped.is_set():
+                    return
+                await asyncio.sleep(BACKOFF)
+
+
+def stand_in_rounds(count=None, tables=4, rate=None, seed=0, start=None):
+    """NDJSON lines of a simulated recorder (honest game with HOUSE_EDGE)
+
+    Deterministic for a seed, so a replay can be compared with what arrived.
+    `rate` paces the rounds per second; None yields them as fast as possible.
+    """
+    rng = np.random.default_rng(seed)
+    start = time.time() if start is None else start
+    sent = 0
+    while count is None or sent < count:
+        size = 1024 if count is None else min(1024, count - sent)
+        points = np.floor(np.maximum(1.0, (1 - HOUSE_EDGE) / (1 - rng.random(size))) * 100) / 100
+        table = rng.integers(0, tables, size)
+        for i in range(size):
+            n = sent + i
+            if rate:
+                # Hold each round until the wall clock reaches its time
+                time.sleep(max(0.0, start + n / rate - time.time()))
+            yield (f'{{"point": {points[i]:.2f}, "table": "T{table[i] + 1}", '
+                   f'"ts": {start + n / (rate or 1000):.3f}}}\n').encode()
+        sent += size
+
+
+def replay(lines, host=FEED_HOST, port=FEED_PORT, path=None, batch=1024):
+    """Send NDJSON lines to a feed endpoint; returns the number of lines sent"""
+    if path:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+    else:
+        sock = socket.create_connection((host, port))
+    sent = 0
+    buffer = []
+    with sock:
+        for line in lines:
+            buffer.append(line)
+            if len(buffer) >= batch:
+                sock.sendall(b''.join(buffer))
+                sent += len(buffer)
+                buffer.clear()
+        sock.sendall(b''.join(buffer))
+        sent += len(buffer)
+    return sent
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a stand-in round feed to the analyzer")
+    parser.add_argument('--host', default=FEED_HOST)
+    parser.add_argument('--port', type=int, default=FEED_PORT)
+    parser.add_argument('--unix', help="Unix socket path instead of TCP")
+    parser.add_argument('--rate', type=float, default=1.0, help="rounds per second (0: no pacing)")
+    parser.add_argument('--count', type=int, help="rounds to send (default: until interrupted)")
+    parser.add_argument('--tables', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    try:
+        sent = replay(stand_in_rounds(args.count, args.tables, args.rate or None, args.seed),
+                      args.host, args.port, args.unix, batch=1 if args.rate else 1024)
+    except KeyboardInterrupt:
+        return 0
+    except OSError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(f"✅ Sent {sent} rounds")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Streaming import of crash round logs (CSV, plain text, JSON)"""
+
+import csv
+import json
+import os
+import re
+
+import numpy as np
+
+CHUNK_BYTES = 4 << 20
+MAX_BAD_SAMPLES = 20
+VALUE_COLUMNS = ('crash', 'crash_point', 'multiplier', 'point', 'value', 'history')
+SEPARATORS = re.compile(r'[\s,;]+')
+
+
+class ImportReport:
+    """Counts of accepted/rejected rows plus a few bad examples"""
+
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0
+        self.bad_rows = []  # (row number, original text)
+
+    def summary(self):
+        """Human readable result"""
+        text = f"✅ Imported: {self.accepted} points\n❌ Rejected: {self.rejected} rows"
+        if self.bad_rows:
+            samples = "\n".join(f"  Row {row}: {value!r}" for row, value in self.bad_rows)
+            text += f"\n\nFirst rejected rows:\n{samples}"
+        return text
+
+
+def detect_format(path):
+    """Guess the format from the file extension"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        return 'csv'
+    if ext == '.json':
+        return 'json'
+    if ext in ('.jsonl', '.ndjson'):
+        return 'ndjson'
+    return 'text'
+
+
+def _to_float(token):
+    try:
+        return float(token)
+    except ValueError:
+        return np.nan
+
+
+def parse_tokens(tokens, rows, report):
+    """Convert tokens to floats, rejecting non-numbers, NaN/inf and values <= 0
+
+    `rows` holds the row number of each token, or is a callable producing
+    them, so clean chunks never pay for the bookkeeping.
+    """
+    if not tokens:
+        return np.empty(0)
+    try:
+        values = np.array(tokens, dtype=np.float64)
+    except ValueError:
+        cleaned = [token.strip().rstrip('xX') for token in tokens]
+        values = np.array([_to_float(token) for token in cleaned], dtype=np.float64)
+
+    with np.errstate(invalid='ignore'):
+        valid = np.isfinite(values) & (values > 0)
+    if not valid.all():
+        bad = np.flatnonzero(~valid)
+        report.rejected += int(bad.size)
+        if callable(rows):
+            rows = rows()
+        room = MAX_BAD_SAMPLES - len(report.bad_rows)
+        for i in bad[:max(room, 0)]:
+            report.bad_rows.append((rows[i], tokens[i].strip()))
+        values = values[valid]
+    report.accepted += int(values.size)
+    return values
+
+
+def _read_lines(f, chunk_bytes):
+    """Yield (first line number, decoded lines) per chunk"""
+    line_no = 1
+    while True:
+        lines = f.readlines(chunk_bytes)
+        if not lines:
+            return
+        encoding = 'utf-8-sig' if line_no == 1 else 'utf-8'
+        yield line_no, b''.join(lines).decode(encoding, errors='replace').splitlines(True)
+        line_no += len(lines)
+
+
+def _split_lines(lines, line_no):
+    """Tokens of each non-comment line with their line numbers"""
+    tokens, rows = [], []
+    for n, line in enumerate(lines, line_no):
+        line = line.strip()
+        if line and not line.startswith('#'):
+            parts = SEPARATORS.split(line)
+            tokens.extend(parts)
+            rows.extend([n] * len(parts))
+    return tokens, rows
+
+
+def _text_tokens(f, chunk_bytes):
+    for line_no, lines in _read_lines(f, chunk_bytes):
+        text = ''.join(lines)
+        if '#' in text:
+            yield _split_lines(lines, line_no)
+            continue
+        # Fast path: split the whole chunk at once, line numbers only on demand
+        stripped = text.strip()
+        tokens = SEPARATORS.split(stripped) if stripped else []
+        yield tokens, lambda lines=lines, line_no=line_no: _split_lines(lines, line_no)[1]
+
+
+def _csv_tokens(f, chunk_bytes):
+    column = None
+    for line_no, lines in _read_lines(f, chunk_bytes):
+        tokens, rows = [], []
+        for n, row in enumerate(csv.reader(lines), line_no):
+            if not row or not any(cell.strip() for cell in row):
+                continue
+            if column is None:
+                # First row: a header names the value column, data means column 0
+                names = [cell.strip().lower() for cell in row]
+                column = next((i for i, name in enumerate(names) if name in VALUE_COLUMNS), None)
+                if column is not None:
+                    continue
+                if np.isnan(_to_float(row[0].strip().rstrip('xX'))):
+                    raise ValueError(f"CSV header {','.join(row)!r} has no value column "
+                                     f"(expected one of {', '.join(VALUE_COLUMNS)})")
+                column = 0
+            tokens.append(row[column] if column < len(row) else '')
+            rows.append(n)
+        yield tokens, rows
+
+
+def _ndjson_tokens(f, chunk_bytes):
+    for line_no, lines in _read_lines(f, chunk_bytes):
+        tokens, rows = [], []
+        for n, line in enumerate(lines, line_no):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('{'):
+                try:
+                    record = json.loads(line)
+                    line = str(next(record[key] for key in VALUE_COLUMNS if key in record))
+                except (ValueError, StopIteration):
+                    pass
+            tokens.append(line)
+            rows.append(n)
+        yield tokens, rows
+
+
+def _json_tokens(f, chunk_bytes):
+    """Stream the elements of the history array without parsing the whole file"""
+    buf = ''
+    first = True
+    while True:
+        chunk = f.read(chunk_bytes)
+        if not chunk:
+            return
+        buf += chunk.decode('utf-8-sig' if first else 'utf-8', errors='replace')
+        first = False
+        # {"history": [...]} as written by older versions, or a bare [...]
+        key = buf.find('"history"') if buf.lstrip().startswith('{') else 0
+        start = buf.find('[', key) if key >= 0 else -1
+        if start >= 0:
+            buf = buf[start + 1:]
+            break
+
+    index = 1
+    done = False
+    while not done:
+        end = buf.find(']')
+        if end >= 0:
+            body, done = buf[:end], True
+            buf = ''
+        else:
+            cut = buf.rfind(',')
+            body, buf = (buf[:cut], buf[cut + 1:]) if cut >= 0 else ('', buf)
+        tokens = [token for token in body.split(',') if token.strip()]
+        yield tokens, list(range(index, index + len(tokens)))
+        index += len(tokens)
+        if not done:
+            chunk = f.read(chunk_bytes)
+            if not chunk:
+                # Unterminated array: whatever is left is the last element
+                tokens = [buf] if buf.strip() else []
+                yield tokens, list(range(index, index + len(tokens)))
+                return
+            buf += chunk.decode('utf-8', errors='replace')
+
+
+TOKENIZERS = {
+    'text': _text_tokens,
+    'csv': _csv_tokens,
+    'json': _json_tokens,
+    'ndjson': _ndjson_tokens
+}
+
+
+class StreamingImporter:
+    """Parse a round log chunk by chunk with bounded working memory
+
+    Every parsed chunk is passed to `sink` (e.g. straight into the history
+    store) as soon as it is parsed; without one the chunks are kept for
+    `values`. Raises ValueError for a CSV header without a value column.
+    """
+
+    def __init__(self, path, fmt=None, chunk_bytes=CHUNK_BYTES, sink=None):
+        self.path = path
+        self.fmt = fmt or detect_format(path)
+        self.chunk_bytes = chunk_bytes
+        self.report = ImportReport()
+        self.size = os.path.getsize(path)
+        self.chunks = []
+        self.sink = sink or self.chunks.append
+
+    def run(self):
+        """Generator that parses one chunk per step and yields the fraction done"""
+        tokenize = TOKENIZERS[self.fmt]
+        with open(self.path, 'rb') as f:
+            for tokens, rows in tokenize(f, self.chunk_bytes):
+                values = parse_tokens(tokens, rows, self.report)
+                if values.size:
+                    self.sink(values)
+                yield f.tell() / self.size if self.size else 1.0
+
+    @property
+    def values(self):
+        """Every accepted value, in file order (only kept without a sink)"""
+        if not self.chunks:
+            return np.empty(0)
+        return np.concatenate(self.chunks)
+
+
+def import_file(path, fmt=None, chunk_bytes=CHUNK_BYTES):
+    """Import a whole file; returns (values, report)"""
+    importer = StreamingImporter(path, fmt, chunk_bytes)
+    for _ in importer.run():
+        pass
+    return importer.values, importer.report
+
+
+def parse_text(text):
+    """Parse pasted values separated by newlines, commas or spaces"""
+    report = ImportReport()
+    tokens, rows = _split_lines(text.splitlines(), 1)
+    return parse_tokens(tokens, rows, report), report
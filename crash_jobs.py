@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Background analysis jobs for the Tk interface
+
+Jobs run on worker threads (NumPy releases the GIL for the heavy work) and
+their results are handed back on the Tk loop, polled with root.after while
+anything is outstanding; Tk itself is only ever touched from its own thread.
+Analyses and charts share a small pool; exports get a worker of their own so
+a long export never holds up the charts.
+
+Each job has a kind ('analysis', 'chart', ...) and only the latest job of a
+kind is current: submitting another one supersedes it. A superseded job is
+cancelled if it has not started yet; if it is already running, the next
+checkpoint() it reaches raises JobCancelled, and whatever it returns is
+dropped.
+
+CPU-bound jobs can fan out to worker processes with process_map. Those are
+started by a fork server: forking the multi-threaded GUI process directly
+could copy a lock some other thread holds (Tk, SQLite, the job threads) into
+a child that then never gets it back.
+"""
+
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+POLL_MS = 50
+WORKERS = 2  # analyses and charts can run side by side
+OWN_WORKER = ('export',)  # kinds with a dedicated worker thread
+START_METHOD = 'forkserver'  # how process_map starts its worker processes
+
+_job = threading.local()
+
+
+class JobCancelled(Exception):
+    """Raised by checkpoint() inside a job that has been superseded"""
+
+
+def checkpoint():
+    """Stop the job running on this thread if it was cancelled (no-op outside jobs)
+
+    Long loops call this once per chunk.
+    """
+    flag = getattr(_job, 'cancelled', None)
+    if flag is not None and flag.is_set():
+        raise JobCancelled()
+
+
+def process_map(function, tasks, workers):
+    """[function(task) for task in tasks] on a pool of `workers` processes
+
+    `function` must be importable at module level. The calling job is checked
+    for cancellation while the tasks run; when cancelled, tasks that have not
+    started are dropped and JobCancelled is raised without waiting for the
+    running ones.
+    """
+    pool = ProcessPoolExecutor(max_workers=workers,
+                               mp_context=multiprocessing.get_context(START_METHOD))
+    futures = {pool.submit(function, task): i for i, task in enumerate(tasks)}
+    results = [None] * len(futures)
+    try:
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=POLL_MS / 1000, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]] = future.result()
+            checkpoint()
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return results
+
+
+class AnalysisExecutor:
+    """Run functions off the Tk thread and deliver their results on it"""
+
+    def __init__(self, root, workers=WORKERS):
+        self.root = root
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analysis')
+        self.own_pools = {kind: ThreadPoolExecutor(max_workers=1, thread_name_prefix=kind)
+                          for kind in OWN_WORKER}
+        self.finished = queue.Queue()
+        self.current = {}  # kind -> (job id, future, on_done, on_error, cancel flag)
+        self.last_job = 0
+        self.polling = False
+
+    def submit(self, kind, compute, on_done, on_error=None):
+        """Run compute() in the background, then on_done(result) on the Tk loop"""
+        self.cancel(kind)
+        self.last_job += 1
+        job = self.last_job
+        flag = threading.Event()
+
+        def run():
+            _job.cancelled = flag
+            try:
+                return compute()
+            finally:
+                _job.cancelled = None
+
+        future = self.own_pools.get(kind, self.pool).submit(run)
+        self.current[kind] = (job, future, on_done, on_error, flag)
+        future.add_done_callback(lambda f: self.finished.put((kind, job)))
+        if not self.polling:
+            self.polling = True
+            self.root.after(POLL_MS, self.poll)
+        return job
+
+    def cancel(self, kind=None):
+        """Supersede the current job of a kind (every kind when None)"""
+        kinds = list(self.current) if kind is None else [kind]
+        for name in kinds:
+            entry = self.current.pop(name, None)
+            if entry is not None:
+                entry[1].cancel()
+                entry[4].set()
+
+    def busy(self, kind=None):
+        """Whether a job (of a kind) is outstanding"""
+        return bool(self.current) if kind is None else kind in self.current
+
+    def poll(self):
+        """Deliver finished current jobs; reschedules itself while any are outstanding"""
+        while True:
+            try:
+                kind, job = self.finished.get_nowait()
+            except queue.Empty:
+                break
+            entry = self.current.get(kind)
+            if entry is None or entry[0] != job:
+                continue  # superseded
+            del self.current[kind]
+            _, future, on_done, on_error, _ = entry
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is None:
+                on_done(future.result())
+            elif on_error is not None:
+                on_error(error)
+            else:
+                raise error
+        if self.current:
+            self.root.after(POLL_MS, self.poll)
+        else:
+            self.polling = False
+
+    def shutdown(self):
+        """Drop every job and stop the workers once the running ones return"""
+        self.cancel()
+        for pool in [self.pool, *self.own_pools.values()]:
+            pool.shutdown(wait=False, cancel_futures=True)
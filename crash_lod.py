@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Level-of-detail downsampling for long line charts"""
+
+import numpy as np
+
+
+def visible_range(x, x_low, x_high):
+    """Index range of sorted x inside [x_low, x_high], one point of slack each side"""
+    start = max(int(np.searchsorted(x, x_low, side='left')) - 1, 0)
+    stop = min(int(np.searchsorted(x, x_high, side='right')) + 1, len(x))
+    return start, stop
+
+
+def minmax_downsample(x, y, buckets):
+    """Keep the first, min, max and last point of each of `buckets` equal slices
+
+    Every spike survives because each bucket keeps its extremes; the output
+    has at most 4 * buckets points, in the original order.
+    """
+    n = len(y)
+    if buckets < 1 or n <= 4 * buckets:
+        return x, y
+
+    size = -(-n // buckets)  # ceil
+    full = size * buckets
+    padded = np.empty(full, dtype=y.dtype)
+    padded[:n] = y
+    padded[n:] = y[-1]  # repeat the last value so padding never wins
+    blocks = padded.reshape(buckets, size)
+
+    base = np.arange(buckets) * size
+    picks = np.concatenate([
+        base,
+        base + blocks.argmin(axis=1),
+        base + blocks.argmax(axis=1),
+        np.minimum(base + size - 1, n - 1)
+    ])
+    picks = np.unique(np.minimum(picks, n - 1))
+    return x[picks], y[picks]
+
+
+def downsample(x, y, width, x_low=None, x_high=None):
+    """Reduce (x, y) to what `width` pixels can show between x_low and x_high"""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if x_low is not None and x_high is not None and len(x):
+        start, stop = visible_range(x, x_low, x_high)
+        x, y = x[start:stop], y[start:stop]
+    return minmax_downsample(x, y, max(int(width), 1))
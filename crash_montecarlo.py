@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Monte Carlo bankroll simulator bootstrapped from recorded crash points
+
+With a fixed cash-out target a bootstrapped round only matters through
+whether its multiplier reaches the target, so every session is a random walk
+of +(target - 1) / -1 stakes with the empirical win probability. Sessions
+are simulated in vectorized chunks, spread over a process pool that writes
+per-session results straight into shared memory. Every chunk has its own
+seed derived from one SeedSequence, so results do not depend on the number
+of workers.
+
+The default 10,000 sessions per combination run in under a second on one
+core. At that size a probability (ruin, profit) is known to within
+1.96 * sqrt(p(1 - p) / 10,000), at most ±1.0 percentage point at 95%, and
+each result carries the 95% error bar of its expected loss.
+"""
+
+import math
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from crash_jobs import checkpoint, process_map
+
+SESSIONS = 10_000  # simulated sessions per cash-out/stake combination
+Z95 = 1.96  # error bars are 95% normal intervals
+SESSION_ROUNDS = 200
+BANKROLL_STAKES = 100  # default starting bankroll, in stakes at the current stake
+CASHOUTS = (1.5, 2.0, 3.0, 5.0, 10.0)
+STAKE_FACTORS = (0.5, 1.0, 2.0)
+CHUNK_SESSIONS = 10_000
+SCAN_CHUNK = 1 << 20
+PARALLEL_MIN_STEPS = 20_000_000  # below this a pool costs more than it saves
+DRAWDOWN_PERCENTILES = (50, 90, 99)
+
+
+def win_probabilities(multipliers, cashouts=CASHOUTS):
+    """Share of recorded rounds reaching each cash-out target (one pass)"""
+    hits = np.zeros(len(cashouts), dtype=np.int64)
+    targets = np.asarray(cashouts, dtype=np.float64)
+    for start in range(0, len(multipliers), SCAN_CHUNK):
+        chunk = np.asarray(multipliers[start:start + SCAN_CHUNK], dtype=np.float64)
+        hits += np.count_nonzero(chunk[:, None] >= targets, axis=0)
+    return hits / max(len(multipliers), 1)
+
+
+def simulate_chunk(task):
+    """Simulate one chunk of sessions into the shared result arrays"""
+    names, shape, row, start, stop, probability, payout, bankroll, rounds, seed = task
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    try:
+        finals, drawdowns = (np.ndarray(shape, dtype=np.float32, buffer=block.buf)
+                             for block in blocks)
+        rng = np.random.default_rng(seed)
+        size = stop - start
+
+        # 16-bit draws resolve the win probability to 1/65536
+        wins = rng.integers(0, 1 << 16, size=(size, rounds), dtype=np.uint16)
+        steps = (wins < round(probability * (1 << 16))).astype(np.float32)
+        steps *= payout + 1
+        steps -= 1
+        balance = np.cumsum(steps, axis=1, dtype=np.float32)
+        balance += bankroll
+
+        # Ruin: the bankroll no longer covers a stake, and play stops there
+        broke = balance < 1
+        ruined = np.flatnonzero(broke.any(axis=1))
+        if ruined.size:
+            first = broke[ruined].argmax(axis=1)
+            after = np.arange(rounds) > first[:, None]
+            frozen = balance[ruined]
+            frozen[after] = np.broadcast_to(frozen[np.arange(ruined.size), first][:, None],
+                                            after.shape)[after]
+            balance[ruined] = frozen
+
+        peak = np.maximum.accumulate(balance, axis=1)
+        np.maximum(peak, bankroll, out=peak)
+        peak -= balance
+        finals[row, start:stop] = balance[:, -1]
+        drawdowns[row, start:stop] = peak.max(axis=1)
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def simulate(multipliers, stake=10.0, bankroll=None, cashouts=CASHOUTS,
+             stake_factors=STAKE_FACTORS, sessions=SESSIONS, rounds=SESSION_ROUNDS,
+             seed=0, workers=None):
+    """Bankroll outcomes for every cash-out target and stake size
+
+    Returns one dict per combination with money amounts in the bankroll's
+    currency, or None without recorded rounds. `*_error` entries are the
+    half-widths of 95% intervals from the sampling error of the simulation.
+    """
+    if not len(multipliers):
+        return None
+    if bankroll is None:
+        bankroll = BANKROLL_STAKES * stake
+    probabilities = win_probabilities(multipliers, cashouts)
+    combos = [(cashout, probability, stake * factor)
+              for cashout, probability in zip(cashouts, probabilities)
+              for factor in stake_factors]
+
+    shape = (len(combos), sessions)
+    nbytes = int(np.prod(shape)) * np.dtype(np.float32).itemsize
+    blocks = [shared_memory.SharedMemory(create=True, size=nbytes) for _ in range(2)]
+    try:
+        chunks = [(start, min(start + CHUNK_SESSIONS, sessions))
+                  for start in range(0, sessions, CHUNK_SESSIONS)]
+        seeds = np.random.SeedSequence(seed).spawn(len(combos) * len(chunks))
+        tasks = [([block.name for block in blocks], shape, row, start, stop, probability,
+                  cashout - 1, bankroll / combo_stake, rounds, seeds[row * len(chunks) + i])
+                 for row, (cashout, probability, combo_stake) in enumerate(combos)
+                 for i, (start, stop) in enumerate(chunks)]
+
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(combos) * sessions * rounds >= PARALLEL_MIN_STEPS:
+            process_map(simulate_chunk, tasks, workers)
+        else:
+            for task in tasks:
+                checkpoint()
+                simulate_chunk(task)
+
+        finals, drawdowns = (np.ndarray(shape, dtype=np.float32, buffer=block.buf).copy()
+                             for block in blocks)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    results = []
+    for row, (cashout, probability, combo_stake) in enumerate(combos):
+        final = finals[row].astype(np.float64) * combo_stake
+        drawdown = drawdowns[row].astype(np.float64) * combo_stake
+        ruin = float(np.mean(final < combo_stake))
+        profit = float(np.mean(final > bankroll))
+        results.append({
+            'cashout': cashout,
+            'stake': combo_stake,
+            'win_probability': float(probability),
+            'ev_per_round': float(combo_stake * (probability * cashout - 1)),
+            'expected_loss': bankroll - float(final.mean()),
+            'expected_loss_error': Z95 * float(final.std()) / math.sqrt(sessions),
+            'ruin_probability': ruin,
+            'ruin_error': Z95 * math.sqrt(ruin * (1 - ruin) / sessions),
+            'profit_probability': profit,
+            'profit_error': Z95 * math.sqrt(profit * (1 - profit) / sessions),
+            'drawdown': {str(p): float(v) for p, v in
+                         zip(DRAWDOWN_PERCENTILES, np.percentile(drawdown, DRAWDOWN_PERCENTILES))}
+        })
+    return results
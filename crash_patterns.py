@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Streaks, autocorrelation and independence tests for crash histories
+
+Everything is streamed a chunk at a time, so memory-mapped histories are
+never copied whole: streaks are run-length encoded with np.diff/flatnonzero
+(runs crossing a chunk boundary are joined), and autocorrelations come from
+overlapping FFT blocks that each cover max_lag rounds of the next block.
+"""
+
+import math
+
+import numpy as np
+
+from crash_jobs import checkpoint
+
+SCAN_CHUNK = 1 << 20
+FFT_SIZE = 1 << 14  # short transforms are faster per round than one long one
+MAX_LAG = 20
+STREAK_THRESHOLDS = (1.0, 2.0)  # win/loss and at least doubling
+ALPHA = 0.01  # family-wise significance level of the verdict
+
+
+def run_lengths(flags):
+    """(flag, length) of every run of equal flags"""
+    flags = np.asarray(flags, dtype=bool)
+    if not flags.size:
+        return flags, np.empty(0, dtype=np.int64)
+    starts = np.concatenate([[0], np.flatnonzero(flags[1:] != flags[:-1]) + 1])
+    return flags[starts], np.diff(np.append(starts, flags.size))
+
+
+def streak_counts(values, threshold, chunk=SCAN_CHUNK):
+    """Streak length histograms [at or below, above] a threshold (index = length)"""
+    hist = [np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64)]
+
+    def add(kind, lengths):
+        counts = np.bincount(lengths)
+        if counts.size > hist[kind].size:
+            hist[kind] = np.concatenate([hist[kind], np.zeros(counts.size - hist[kind].size,
+                                                              dtype=np.int64)])
+        hist[kind][:counts.size] += counts
+
+    current, length = None, 0
+    for start in range(0, len(values), chunk):
+        checkpoint()
+        kinds, lengths = run_lengths(np.asarray(values[start:start + chunk]) > threshold)
+        if current is not None:
+            if kinds[0] == current:
+                lengths[0] += length
+            else:
+                add(int(current), [length])
+        for kind in (0, 1):
+            add(kind, lengths[:-1][kinds[:-1] == kind])
+        current, length = kinds[-1], int(lengths[-1])
+    if current is not None:
+        add(int(current), [length])
+    return hist
+
+
+def two_sided_p(z):
+    """Two-sided p-value of a standard normal statistic"""
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+def chi2_sf(q, df):
+    """P(chi2(df) >= q) by the Wilson-Hilferty approximation"""
+    if df <= 0:
+        return 1.0
+    scale = 2 / (9 * df)
+    z = ((q / df) ** (1 / 3) - (1 - scale)) / math.sqrt(scale)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def runs_test(hist):
+    """Wald-Wolfowitz runs test from streak histograms; (runs, expected, z, p)"""
+    below, above = (int((h * np.arange(h.size)).sum()) for h in hist)
+    runs = int(hist[0].sum() + hist[1].sum())
+    n = below + above
+    if not below or not above:
+        return runs, float(runs), 0.0, 1.0
+    expected = 2 * below * above / n + 1
+    variance = (expected - 1) * (expected - 2) / (n - 1)
+    z = (runs - expected) / math.sqrt(variance) if variance > 0 else 0.0
+    return runs, expected, z, two_sided_p(z)
+
+
+def autocorrelation(values, max_lag=MAX_LAG, size=FFT_SIZE, chunk=SCAN_CHUNK):
+    """Autocorrelation of log crash points at lags 1..max_lag"""
+    n = len(values)
+    max_lag = min(max_lag, n - 1)
+    if max_lag < 1:
+        return np.empty(0)
+    mean = sum(float(np.log(np.asarray(values[start:start + chunk])).sum())
+               for start in range(0, n, chunk)) / n
+
+    size = max(size, 2 * max_lag)
+    step = size - max_lag
+    sums = np.zeros(max_lag + 1)
+    for start in range(0, n, step):
+        if start % chunk < step:
+            checkpoint()
+        block = np.log(np.asarray(values[start:start + size], dtype=np.float64)) - mean
+        # Products x[t] * x[t + k] for t in this step; the tail supplies x[t + k]
+        spectrum = np.conj(np.fft.rfft(block[:step], size)) * np.fft.rfft(block, size)
+        sums += np.fft.irfft(spectrum, size)[:max_lag + 1]
+    if sums[0] <= 0:
+        return np.zeros(max_lag)
+    return sums[1:] / sums[0]
+
+
+def ljung_box(acf, n):
+    """Ljung-Box statistic of autocorrelations at lags 1..len(acf); (Q, p)"""
+    lags = np.arange(1, acf.size + 1)
+    q = float(n * (n + 2) * np.sum(acf ** 2 / (n - lags)))
+    return q, chi2_sf(q, acf.size)
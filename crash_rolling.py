@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Rolling-window statistics (SMA, EMA, std, win rate) for several windows"""
+
+import numpy as np
+
+DEFAULT_WINDOWS = (5, 10, 15, 20, 25, 50)
+EMA_CHUNK = 256  # keeps (1 - alpha) ** -k finite for every window >= 2
+EMA_WARMUP = 1024  # extra rounds replayed so a truncated history gives the same EMAs
+
+
+def ema_extend(values, alpha, previous):
+    """EMA of `values` continuing from `previous` (NaN to seed with the first value)"""
+    out = np.empty(values.size)
+    decay = 1.0 - alpha
+    start = 0
+    if np.isnan(previous) and values.size:
+        previous = out[0] = values[0]
+        start = 1
+    # Closed form per chunk: ema_k = d^(k+1) * prev + alpha * d^k * sum_j x_j / d^j
+    for i in range(start, values.size, EMA_CHUNK):
+        chunk = values[i:i + EMA_CHUNK]
+        powers = decay ** np.arange(chunk.size)
+        acc = np.cumsum(chunk / powers)
+        out[i:i + chunk.size] = decay * powers * previous + alpha * powers * acc
+        previous = out[i + chunk.size - 1]
+    return out
+
+
+class RollingStats:
+    """Prefix sums and EMAs kept up to date on append
+
+    Any rolling mean/std/win rate is a difference of two prefix sums, so full
+    series are one vectorized pass and the latest values are O(1).
+    With a `limit` only the most recent rounds (between limit and
+    2 * limit) are kept, so memory stays bounded on long histories.
+    """
+
+    def __init__(self, windows=DEFAULT_WINDOWS, limit=None):
+        self.windows = tuple(windows)
+        self.limit = limit
+        self.reset()
+
+    @classmethod
+    def from_values(cls, values, windows=DEFAULT_WINDOWS, limit=None):
+        """Build from existing history (only the tail is read when limited)"""
+        rolling = cls(windows, limit)
+        start = max(0, len(values) - limit - EMA_WARMUP) if limit else 0
+        rolling.offset = start
+        rolling.extend(values[start:])
+        return rolling
+
+    def reset(self):
+        """Forget every value"""
+        self.offset = 0  # rounds dropped from the front
+        self.count = 0
+        self._sums = np.zeros((3, 1025))  # prefix sums of x, x^2 and wins
+        self._ema = {w: np.empty(1024) for w in self.windows}
+
+    def extend(self, values):
+        """Append values in amortized O(len(values))"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not values.size:
+            return
+        start, end = self.count, self.count + values.size
+        if end + 1 > self._sums.shape[1]:
+            capacity = max(end + 1, self._sums.shape[1] * 2)
+            sums = np.zeros((3, capacity))
+            sums[:, :start + 1] = self._sums[:, :start + 1]
+            self._sums = sums
+            for w, ema in self._ema.items():
+                grown = np.empty(capacity)
+                grown[:start] = ema[:start]
+                self._ema[w] = grown
+
+        batch = np.vstack([values, values * values, values > 1.0])
+        np.cumsum(batch, axis=1, out=self._sums[:, start + 1:end + 1])
+        self._sums[:, start + 1:end + 1] += self._sums[:, start:start + 1]
+
+        for w, ema in self._ema.items():
+            previous = ema[start - 1] if start else np.nan
+            ema[start:end] = ema_extend(values, 2.0 / (w + 1), previous)
+        self.count = end
+
+        if self.limit and self.count > 2 * self.limit:
+            drop = self.count - self.limit
+            # Rebased so the prefix sums do not grow without bound
+            self._sums[:, :self.limit + 1] = (self._sums[:, drop:self.count + 1]
+                                              - self._sums[:, drop:drop + 1])
+            for ema in self._ema.values():
+                ema[:self.limit] = ema[drop:self.count]
+            self.offset += drop
+            self.count = self.limit
+
+    @property
+    def total(self):
+        """Rounds seen, dropped ones included"""
+        return self.offset + self.count
+
+    def _window_sums(self, window):
+        """Sums of x, x^2 and wins over every full window"""
+        sums = self._sums[:, :self.count + 1]
+        return sums[:, window:] - sums[:, :self.count + 1 - window]
+
+    def series(self, window):
+        """Full SMA/EMA/std/win-rate series; index i covers rounds i-window+1..i
+
+        The first window-1 rounds have no full window and hold NaN (the EMA
+        is defined from the first round).
+        """
+        n = self.count
+        result = {name: np.full(n, np.nan) for name in ('sma', 'std', 'win_rate')}
+        if n >= window:
+            total, squares, wins = self._window_sums(window)
+            sma = total / window
+            result['sma'][window - 1:] = sma
+            result['std'][window - 1:] = np.sqrt(np.maximum(squares / window - sma * sma, 0))
+            result['win_rate'][window - 1:] = wins / window * 100
+        result['ema'] = self.ema(window)
+        return result
+
+    def ema(self, window):
+        """EMA series (windows outside `self.windows` are computed on demand)"""
+        if window in self._ema:
+            return self._ema[window][:self.count]
+        values = np.diff(self._sums[0, :self.count + 1])
+        return ema_extend(values, 2.0 / (window + 1), np.nan)
+
+    def latest(self, window):
+        """Most recent SMA/EMA/std/win rate in O(1), None without a full window"""
+        n = self.count
+        if n < window:
+            return None
+        total, squares, wins = self._sums[:, n] - self._sums[:, n - window]
+        sma = total / window
+        return {
+            'sma': sma,
+            'ema': float(self.ema(window)[-1]),
+            'std': float(np.sqrt(max(squares / window - sma * sma, 0))),
+            'win_rate': wins / window * 100
+        }
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Dirty-flag refresh scheduling on the Tk event loop
+
+Changes the user made are always drawn on the next tick. Automatic ones
+(e.g. rounds arriving from the live feed) only schedule a redraw while
+`enabled()` is true; otherwise they wait until it is turned back on or the
+next user change.
+"""
+
+
+class RefreshScheduler:
+    """Coalesce panel refreshes into one redraw per tick"""
+
+    def __init__(self, root, panels, delay=50, enabled=None):
+        self.root = root
+        self.panels = list(panels)  # (name, callback) in redraw order
+        self.delay = delay
+        self.enabled = enabled or (lambda: True)
+        self.dirty = set()
+        self._after_id = None
+
+    def mark_dirty(self, *names, automatic=False):
+        """Flag panels whose inputs changed (all panels when none given)"""
+        self.dirty.update(names or [name for name, _ in self.panels])
+        if not automatic or self.enabled():
+            self.schedule()
+
+    def schedule(self):
+        """Queue a flush unless one is already pending"""
+        if self._after_id is None and self.dirty:
+            self._after_id = self.root.after(self.delay, self.flush)
+
+    def flush(self):
+        """Redraw every dirty panel once"""
+        self._after_id = None
+        dirty, self.dirty = self.dirty, set()
+        for name, callback in self.panels:
+            if name in dirty:
+                callback()
+
+    def refresh_all(self):
+        """Redraw everything right now"""
+        self.cancel()
+        self.dirty.update(name for name, _ in self.panels)
+        self.flush()
+
+    def cancel(self):
+        """Drop the pending flush (dirty flags are kept)"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Multi-session / multi-table round index on SQLite (WAL mode)
+
+The index does not copy rounds: it stores ranges of round numbers of the
+history file (crash_store), each tagged with a session/table id and the
+earliest and latest time in it, and values and times are read back from the
+history columns. Consecutive appends to the same session/table extend one
+range, so the index stays a few rows per session however many rounds it
+covers.
+
+Writes are queued to a background thread that owns its own connection, so
+appending from the Tk loop costs a queue put; reads wait for the queue to
+drain first (flush), so they always see every append made before them.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_PATH = 'crash_sessions.db'
+DEFAULT_TABLE = 'main'
+IMPORTED_SESSION = 'imported'
+ROW_CHUNK = 1 << 16
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scopes (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    UNIQUE (session, table_name)
+);
+CREATE TABLE IF NOT EXISTS ranges (
+    first INTEGER PRIMARY KEY,
+    rounds INTEGER NOT NULL,
+    scope INTEGER NOT NULL REFERENCES scopes (id),
+    min_ts REAL NOT NULL,
+    max_ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ranges_scope ON ranges (scope, first);
+"""
+
+
+def default_session():
+    """Session name for today"""
+    return time.strftime('%Y-%m-%d')
+
+
+def _where(session=None, table=None, start=None, end=None):
+    clauses, params = [], []
+    for clause, param in (('session = ?', session), ('table_name = ?', table),
+                          ('max_ts >= ?', start), ('min_ts < ?', end)):
+        if param is not None:
+            clauses.append(clause)
+            params.append(param)
+    return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+
+def pieces(ranges, times=None, start=None, end=None, chunk=ROW_CHUNK):
+    """(first, last, keep, session, table) per piece of at most `chunk` history rounds
+
+    `ranges` comes from SessionStore.ranges and `times` is the history's
+    epoch-ns column, only read for ranges partly inside [start, end). keep
+    is None when every round of [first, last) matches, else a boolean mask
+    of the ones that do.
+    """
+    for first, rounds, session, table, low, high in ranges:
+        whole = (start is None or low >= start) and (end is None or high < end)
+        for piece in range(first, first + rounds, chunk):
+            last = min(piece + chunk, first + rounds)
+            keep = None
+            if not whole:
+                ts = np.asarray(times[piece:last], dtype=np.float64) / 1e9
+                keep = np.ones(last - piece, dtype=bool)
+                if start is not None:
+                    keep &= ts >= start
+                if end is not None:
+                    keep &= ts < end
+            yield piece, last, keep, session, table
+
+
+class SessionStore:
+    """Ranges of history rounds tagged with session, table and time"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.db = self._connect()
+        self.db.executescript(SCHEMA)
+        self.pending = queue.Queue()
+        self.writer = None
+        self.error = None
+        self._scope_ids = {}  # (session, table) -> id, used by the index thread only
+
+    def _connect(self):
+        db = sqlite3.connect(self.path)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        return db
+
+    def append(self, first, count, session, table=DEFAULT_TABLE, ts=None):
+        """Index history rounds [first, first + count) (queued)
+
+        ts: epoch seconds, one for all rounds or one per round, or None for now.
+        Raises the error of an earlier write that failed.
+        """
+        if not count:
+            return
+        self._raise_error()
+        if ts is None:
+            low = high = time.time()
+        else:
+            ts = np.asarray(ts, dtype=np.float64)
+            low, high = float(ts.min()), float(ts.max())
+        self._submit(lambda db: self._insert(db, first, count, session, table, low, high))
+
+    def sync(self, total, times=None):
+        """Fit the index to a history of `total` rounds (queued)
+
+        Ranges past the end are dropped or cut short (the history was cleared
+        or replaced) and rounds after the last range are indexed under
+        IMPORTED_SESSION, timed from the epoch-ns `times` column when given.
+        """
+        self._raise_error()
+        self._submit(lambda db: self._sync(db, total, times))
+
+    def flush(self):
+        """Wait for queued writes; raises the error of one that failed"""
+        self.pending.join()
+        self._raise_error()
+
+    def ranges(self, session=None, table=None, start=None, end=None):
+        """(first, rounds, session, table, min ts, max ts) of the ranges that may match
+
+        In history order; start/end are epoch seconds.
+        """
+        self.flush()
+        where, params = _where(session, table, start, end)
+        return self.db.execute(
+            'SELECT first, rounds, session, table_name, min_ts, max_ts '
+            f'FROM ranges JOIN scopes ON scopes.id = ranges.scope{where} ORDER BY first',
+            params).fetchall()
+
+    def query_times(self, values, times, session=None, table=None, start=None, end=None):
+        """(values, epoch-ns times) of the matching rounds of the history columns"""
+        parts = []
+        for first, last, keep, _, _ in pieces(self.ranges(session, table, start, end),
+                                             times, start, end):
+            part = (values[first:last], times[first:last])
+            parts.append(part if keep is None else (part[0][keep], part[1][keep]))
+        if not parts:
+            return np.empty(0), np.empty(0, dtype=np.int64)
+        return (np.concatenate([part[0] for part in parts]).astype(np.float64),
+                np.concatenate([part[1] for part in parts]).astype(np.int64))
+
+    def count(self, session=None, table=None):
+        """Number of indexed rounds"""
+        self.flush()
+        where, params = _where(session, table)
+        return self.db.execute('SELECT COALESCE(SUM(rounds), 0) FROM ranges '
+                               f'JOIN scopes ON scopes.id = ranges.scope{where}',
+                               params).fetchone()[0]
+
+    def sessions(self):
+        """(session, table, rounds, first ts, last ts) for every session/table"""
+        self.flush()
+        return self.db.execute(
+            'SELECT session, table_name, SUM(rounds), MIN(min_ts), MAX(max_ts) '
+            'FROM ranges JOIN scopes ON scopes.id = ranges.scope '
+            'GROUP BY session, table_name ORDER BY session, table_name').fetchall()
+
+    def delete(self):
+        """Forget every range (queued); the rounds stay in the history"""
+        self._submit(self._delete)
+
+    def close(self):
+        """Finish queued writes and close both connections"""
+        if self.writer is not None:
+            self.pending.put(None)
+            self.writer.join()
+            self.writer = None
+        self.db.close()
+
+    def _submit(self, task):
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._write, name='session-index', daemon=True)
+            self.writer.start()
+        self.pending.put(task)
+
+    def _raise_error(self):
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def _write(self):
+        db = self._connect()
+        try:
+            while True:
+                task = self.pending.get()
+                try:
+                    if task is None:
+                        return
+                    with db:
+                        task(db)
+                except Exception as e:  # raised by the next append or flush
+                    self._scope_ids.clear()
+                    self.error = self.error or e
+                finally:
+                    self.pending.task_done()
+        finally:
+            db.close()
+
+    def _scope_id(self, db, session, table):
+        key = (session, table)
+        if key not in self._scope_ids:
+            db.execute('INSERT OR IGNORE INTO scopes (session, table_name) VALUES (?, ?)', key)
+            self._scope_ids[key] = db.execute(
+                'SELECT id FROM scopes WHERE session = ? AND table_name = ?', key).fetchone()[0]
+        return self._scope_ids[key]
+
+    def _insert(self, db, first, count, session, table, low, high):
+        scope = self._scope_id(db, session, table)
+        last = db.execute('SELECT first, rounds, scope FROM ranges '
+                          'ORDER BY first DESC LIMIT 1').fetchone()
+        if last is not None and last[2] == scope and last[0] + last[1] == first:
+            db.execute('UPDATE ranges SET rounds = rounds + ?, min_ts = MIN(min_ts, ?), '
+                       'max_ts = MAX(max_ts, ?) WHERE first = ?', (count, low, high, last[0]))
+        else:
+            db.execute('INSERT INTO ranges VALUES (?, ?, ?, ?, ?)',
+                       (first, count, scope, low, high))
+
+    def _sync(self, db, total, times):
+        db.execute('DELETE FROM ranges WHERE first >= ?', (total,))
+        db.execute('UPDATE ranges SET rounds = ? - first WHERE first + rounds > ?', (total, total))
+        end = db.execute('SELECT COALESCE(MAX(first + rounds), 0) FROM ranges').fetchone()[0]
+        if end >= total:
+            return
+        low, high = 0.0, 0.0
+        if times is not None:
+            low, high = np.inf, -np.inf
+            for start in range(end, total, 1 << 20):
+                chunk = np.asarray(times[start:min(start + (1 << 20), total)])
+                low, high = min(low, chunk.min() / 1e9), max(high, chunk.max() / 1e9)
+        self._insert(db, end, total - end, IMPORTED_SESSION, DEFAULT_TABLE,
+                     float(low), float(high))
+
+    def _delete(self, db):
+        db.execute('DELETE FROM ranges')
+        db.execute('DELETE FROM scopes')
+        self._scope_ids.clear()
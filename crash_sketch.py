@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Mergeable streaming quantile sketch for crash points
+
+Log-spaced buckets (the DDSketch scheme): bucket i holds the points in
+(gamma^(i-1), gamma^i] and reports 2 * gamma^i / (gamma + 1), so every
+quantile is within ACCURACY relative error however heavy the tail is.
+Updates are one bincount, sketches merge by adding counts, and the state is
+a few thousand integers regardless of the history length.
+"""
+
+import math
+import os
+import struct
+
+import numpy as np
+
+ACCURACY = 0.005  # relative error of every quantile
+MIN_VALUE = 1e-3  # points outside [MIN_VALUE, MAX_VALUE] share the edge buckets
+MAX_VALUE = 1e9
+THRESHOLDS = (1.5, 2.0, 10.0)  # exact "rounds below" counters
+PERCENTILES = (50, 90, 99, 99.9)
+
+MAGIC = b'CRSK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHdQdd')
+
+
+class SketchError(Exception):
+    """Raised when a sketch cannot be read or merged"""
+
+
+class QuantileSketch:
+    """Quantiles with bounded relative error and exact threshold fractions"""
+
+    def __init__(self, accuracy=ACCURACY, thresholds=THRESHOLDS):
+        self.accuracy = float(accuracy)
+        self.gamma = (1 + self.accuracy) / (1 - self.accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._first = math.ceil(math.log(MIN_VALUE) / self._log_gamma)
+        size = math.ceil(math.log(MAX_VALUE) / self._log_gamma) - self._first + 1
+        self.thresholds = np.asarray(thresholds, dtype=np.float64)
+        self.counts = np.zeros(size, dtype=np.int64)
+        self.below = np.zeros(self.thresholds.size, dtype=np.int64)
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._cumulative = None
+
+    @classmethod
+    def from_values(cls, values, chunk=1 << 20):
+        """Build from a (memory-mapped) history a chunk at a time"""
+        sketch = cls()
+        for start in range(0, len(values), chunk):
+            sketch.extend(values[start:start + chunk])
+        return sketch
+
+    def extend(self, values):
+        """Add points in O(len(values))"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[values > 0]
+        if not values.size:
+            return
+        index = np.ceil(np.log(values) / self._log_gamma).astype(np.int64) - self._first
+        np.clip(index, 0, self.counts.size - 1, out=index)
+        if index.size < 64:
+            np.add.at(self.counts, index, 1)
+        else:
+            self.counts += np.bincount(index, minlength=self.counts.size)
+        self.below += np.count_nonzero(values[:, None] < self.thresholds, axis=0)
+        self.count += int(values.size)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._cumulative = None
+
+    def merge(self, other):
+        """Add another sketch's points (e.g. another session) without raw data"""
+        if (other.accuracy != self.accuracy or other.counts.size != self.counts.size
+                or not np.array_equal(other.thresholds, self.thresholds)):
+            raise SketchError("sketches with different settings cannot be merged")
+        self.counts += other.counts
+        self.below += other.below
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._cumulative = None
+
+    def quantile(self, q):
+        """Value at quantile q in [0, 1] (None when empty)"""
+        if not self.count:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        if self._cumulative is None:
+            self._cumulative = np.cumsum(self.counts)
+        rank = q * (self.count - 1)
+        index = int(np.searchsorted(self._cumulative, rank, side='right'))
+        value = 2 * self.gamma ** (index + self._first) / (self.gamma + 1)
+        return min(max(value, self.min), self.max)
+
+    def percentiles(self, percentiles=PERCENTILES):
+        """{percentile: value} for several percentiles"""
+        return {p: self.quantile(p / 100) for p in percentiles}
+
+    def fraction_below(self, threshold):
+        """Share of points below a value (exact for THRESHOLDS, else within one bucket)"""
+        if not self.count:
+            return 0.0
+        exact = np.flatnonzero(self.thresholds == threshold)
+        if exact.size:
+            return int(self.below[exact[0]]) / self.count
+        index = math.ceil(math.log(threshold) / self._log_gamma) - self._first
+        return int(self.counts[:max(0, min(index, self.counts.size))].sum()) / self.count
+
+    def to_bytes(self):
+        """Serialized state"""
+        header = HEADER.pack(MAGIC, VERSION, self.thresholds.size, self.accuracy,
+                             self.count, self.min, self.max)
+        return (header + self.thresholds.astype('<f8').tobytes()
+                + self.below.astype('<i8').tobytes() + self.counts.astype('<i8').tobytes())
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Sketch from to_bytes() output"""
+        if len(data) < HEADER.size:
+            raise SketchError("truncated sketch")
+        magic, version, thresholds, accuracy, count, low, high = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise SketchError("not a quantile sketch")
+        offset = HEADER.size
+        if len(data) < offset + thresholds * 16:
+            raise SketchError("truncated sketch")
+        limits = np.frombuffer(data, dtype='<f8', count=thresholds, offset=offset)
+        sketch = cls(accuracy, limits)
+        offset += limits.nbytes
+        below = np.frombuffer(data, dtype='<i8', count=thresholds, offset=offset)
+        offset += below.nbytes
+        if len(data) - offset != sketch.counts.nbytes:
+            raise SketchError("sketch size does not match its settings")
+        sketch.counts[:] = np.frombuffer(data, dtype='<i8', offset=offset)
+        sketch.below[:] = below
+        sketch.count, sketch.min, sketch.max = count, low, high
+        return sketch
+
+    def save(self, path):
+        """Atomically write the sketch to a file"""
+        with open(path + '.tmp', 'wb') as f:
+            f.write(self.to_bytes())
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a sketch written by save()"""
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Streaming statistics for crash point history"""
+
+import math
+
+import numpy as np
+
+PROFIT_CHUNK = 1 << 20
+
+
+def round_profits(values, stake=10.0):
+    """Profit of each round: (x - 1) * stake on a win, -stake on a loss"""
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(values > 1.0, (values - 1) * stake, -stake)
+
+
+class RunningStats:
+    """O(1) running statistics (Welford mean/variance plus higher moments)"""
+
+    def __init__(self):
+        self.reset()
+
+    @classmethod
+    def from_values(cls, values):
+        """Build accumulator from existing history"""
+        stats = cls()
+        stats.extend(values)
+        return stats
+
+    def reset(self):
+        """Forget every value"""
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.wins = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def push(self, point):
+        """Add one value in O(1)"""
+        point = float(point)
+        n1 = self.count
+        self.count += 1
+        n = self.count
+
+        delta = point - self.mean
+        delta_n = delta / n
+        delta_n2 = delta_n * delta_n
+        term1 = delta * delta_n * n1
+
+        self.mean += delta_n
+        self.m4 += (term1 * delta_n2 * (n * n - 3 * n + 3)
+                    + 6 * delta_n2 * self.m2 - 4 * delta_n * self.m3)
+        self.m3 += term1 * delta_n * (n - 2) - 3 * delta_n * self.m2
+        self.m2 += term1
+
+        if point > 1.0:
+            self.wins += 1
+        if point < self.min:
+            self.min = point
+        if point > self.max:
+            self.max = point
+
+    def extend(self, values):
+        """Add a batch of values (vectorized, then merged)"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size == 0:
+            return
+        if values.size == 1:
+            self.push(values[0])
+            return
+
+        batch = RunningStats()
+        batch.count = int(values.size)
+        batch.mean = float(values.mean())
+        centered = values - batch.mean
+        squared = centered * centered
+        batch.m2 = float(squared.sum())
+        batch.m3 = float((squared * centered).sum())
+        batch.m4 = float((squared * squared).sum())
+        wins = values > 1.0
+        batch.wins = int(np.count_nonzero(wins))
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other):
+        """Combine another accumulator into this one (Chan/Pebay)"""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean = other.count, other.mean
+            self.m2, self.m3, self.m4 = other.m2, other.m3, other.m4
+            self.wins, self.min, self.max = other.wins, other.min, other.max
+            return
+
+        na, nb = self.count, other.count
+        n = na + nb
+        delta = other.mean - self.mean
+        delta2 = delta * delta
+        delta3 = delta2 * delta
+        delta4 = delta2 * delta2
+
+        m2 = self.m2 + other.m2 + delta2 * na * nb / n
+        m3 = (self.m3 + other.m3
+              + delta3 * na * nb * (na - nb) / (n * n)
+              + 3 * delta * (na * other.m2 - nb * self.m2) / n)
+        m4 = (self.m4 + other.m4
+              + delta4 * na * nb * (na * na - na * nb + nb * nb) / (n ** 3)
+              + 6 * delta2 * (na * na * other.m2 + nb * nb * self.m2) / (n * n)
+              + 4 * delta * (na * other.m3 - nb * self.m3) / n)
+
+        self.mean += delta * nb / n
+        self.m2, self.m3, self.m4 = m2, m3, m4
+        self.count = n
+        self.wins += other.wins
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def win_rate(self):
+        """Win rate in percent"""
+        if not self.count:
+            return 0
+        return (self.wins / self.count) * 100
+
+    @property
+    def variance(self):
+        """Population variance (same as np.var)"""
+        if not self.count:
+            return 0
+        return max(self.m2, 0.0) / self.count
+
+    @property
+    def std(self):
+        """Population standard deviation (same as np.std)"""
+        return math.sqrt(self.variance)
+
+    @property
+    def skewness(self):
+        """Sample skewness (same as pandas Series.skew)"""
+        n = self.count
+        if n < 3:
+            return 0
+        m2 = self.m2 / n
+        if m2 <= 1e-14 * max(1.0, self.mean * self.mean):
+            return 0
+        g1 = (self.m3 / n) / m2 ** 1.5
+        return math.sqrt(n * (n - 1)) / (n - 2) * g1
+
+    @property
+    def kurtosis(self):
+        """Sample excess kurtosis (same as pandas Series.kurtosis)"""
+        n = self.count
+        if n < 4:
+            return 0
+        m2 = self.m2 / n
+        if m2 <= 1e-14 * max(1.0, self.mean * self.mean):
+            return 0
+        g2 = (self.m4 / n) / (m2 * m2) - 3
+        return ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3))
+
+    @property
+    def highest(self):
+        """Highest value or 0 when empty"""
+        return self.max if self.count else 0
+
+    @property
+    def lowest(self):
+        """Lowest value or 0 when empty"""
+        return self.min if self.count else 0
+
+    @property
+    def value_range(self):
+        """Spread between highest and lowest value"""
+        return self.highest - self.lowest
+
+
+class ProfitSeries:
+    """Per-round and cumulative profit, extended incrementally on append
+
+    With a `limit` only the most recent rounds (between limit and
+    2 * limit) are kept; the cumulative profit still covers every round.
+    """
+
+    def __init__(self, stake=10.0, limit=None):
+        self.stake = float(stake)
+        self.limit = limit
+        self.reset()
+
+    @classmethod
+    def from_values(cls, values, stake=10.0, limit=None, blocks=None):
+        """Build series from existing history"""
+        series = cls(stake, limit)
+        series.rebuild(values, blocks=blocks)
+        return series
+
+    def reset(self):
+        """Forget every round"""
+        self.offset = 0  # rounds dropped from the front
+        self.count = 0
+        self._base = 0.0  # profit of the dropped rounds
+        self._rounds = np.empty(1024, dtype=np.float64)
+        self._cumulative = np.empty(1024, dtype=np.float64)
+
+    def rebuild(self, values, stake=None, blocks=None):
+        """Recompute everything, e.g. after the stake changed
+
+        Rounds beyond the limit are only summed: from the block summaries of
+        `values` when given (crash_blocks.BlockIndex), otherwise a chunk at a
+        time, so a memory-mapped history is never copied whole.
+        """
+        if stake is not None:
+            self.stake = float(stake)
+        self.reset()
+        head = max(0, len(values) - self.limit) if self.limit else 0
+        if blocks is not None:
+            self._base = blocks.profit(values, head, self.stake)
+        else:
+            for start in range(0, head, PROFIT_CHUNK):
+                chunk = values[start:min(start + PROFIT_CHUNK, head)]
+                self._base += float(round_profits(chunk, self.stake).sum())
+        self.offset = head
+        self.extend(values[head:])
+
+    def extend(self, values):
+        """Append rounds in amortized O(len(values))"""
+        profits = round_profits(values, self.stake).ravel()
+        if not profits.size:
+            return
+        start, end = self.count, self.count + profits.size
+        if end > self._rounds.size:
+            capacity = max(end, self._rounds.size * 2)
+            self._rounds = self._grow(self._rounds, capacity)
+            self._cumulative = self._grow(self._cumulative, capacity)
+
+        self._rounds[start:end] = profits
+        np.cumsum(profits, out=self._cumulative[start:end])
+        self._cumulative[start:end] += self._cumulative[start - 1] if start else self._base
+        self.count = end
+
+        if self.limit and self.count > 2 * self.limit:
+            drop = self.count - self.limit
+            self._rounds[:self.limit] = self._rounds[drop:self.count]
+            self._cumulative[:self.limit] = self._cumulative[drop:self.count]
+            self.offset += drop
+            self.count = self.limit
+
+    def _grow(self, array, capacity):
+        grown = np.empty(capacity, dtype=np.float64)
+        grown[:self.count] = array[:self.count]
+        return grown
+
+    @property
+    def rounds(self):
+        """Profit of each kept round"""
+        return self._rounds[:self.count]
+
+    @property
+    def cumulative(self):
+        """Running total after each kept round"""
+        return self._cumulative[:self.count]
+
+    @property
+    def total(self):
+        """Net profit over all rounds"""
+        return float(self._cumulative[self.count - 1]) if self.count else self._base
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Append-only binary storage for crash point history
+
+File layout: a 32 byte header (magic, version, record count, session
+profit, last update as epoch seconds) followed by little-endian float64
+records. Appends write the record first and the header second, so a crash
+in between leaves a valid file whose count simply ignores the torn tail.
+
+Per-round metadata lives in side-car column files next to it
+(`<path>.times` int64 epoch-ns, `<path>.stakes` / `<path>.sources` uint8
+codes, `<path>.codes.json` for the stake code table). They are written
+before the records, and on load anything past or missing from them reads as
+0 ("unknown"), so the main file's count stays the single source of truth.
+`<path>.blocks` caches the per-block summaries behind full-history
+statistics; it is validated on load and rebuilt when stale. `<path>.sketch`
+holds the quantile sketch, saved with every completed block and caught up
+from the tail of the records on load.
+"""
+
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+from crash_blocks import BlockIndex
+from crash_sketch import QuantileSketch, SketchError
+from crash_trace import TRACER
+
+MAGIC = b'CRSH'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQdd')
+RECORD = np.dtype('<f8')
+META_COLUMNS = (('times', np.dtype('<i8')), ('stakes', np.dtype('<u1')),
+                ('sources', np.dtype('<u1')))
+
+DEFAULT_PATH = 'crash_data.bin'
+LEGACY_PATH = 'crash_data.json'
+
+
+class StoreError(Exception):
+    """Raised when a history file cannot be read"""
+
+
+class HistoryStore:
+    def __init__(self, path=DEFAULT_PATH, legacy_path=LEGACY_PATH):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.count = 0
+        self.profit = 0.0
+        self.last_update = 0.0
+        self._file = None
+        self._meta_files = {}
+        self.blocks = BlockIndex()
+        self.sketch = QuantileSketch()
+
+    def meta_path(self, name):
+        """Path of a side-car file"""
+        return f"{self.path}.{name}"
+
+    def load(self):
+        """Memory-map the history; returns (values, profit)"""
+        if not os.path.exists(self.path):
+            if self.legacy_path and os.path.exists(self.legacy_path):
+                self.migrate_legacy()
+            else:
+                self.count, self.profit, self.last_update = 0, 0.0, 0.0
+                self.blocks = BlockIndex()
+                self.sketch = QuantileSketch()
+                return np.empty(0, dtype=RECORD), self.profit
+
+        self.close()
+        with open(self.path, 'rb') as f:
+            raw = f.read(HEADER.size)
+        if len(raw) < HEADER.size:
+            raise StoreError(f"{self.path}: truncated header")
+        magic, version, _, count, profit, last_update = HEADER.unpack(raw)
+        if magic != MAGIC:
+            raise StoreError(f"{self.path}: not a crash history file")
+        if version != VERSION:
+            raise StoreError(f"{self.path}: unsupported version {version}")
+        available = (os.path.getsize(self.path) - HEADER.size) // RECORD.itemsize
+        if available < count:
+            raise StoreError(f"{self.path}: header lists {count} points, "
+                             f"file holds {available}")
+
+        self.count, self.profit, self.last_update = count, profit, last_update
+        values = self.column('values')
+        cache = self.meta_path('blocks')
+        self.blocks = BlockIndex.from_values(values, cache=cache)
+        try:
+            if not os.path.exists(cache) or os.path.getsize(cache) != self.blocks.records.nbytes:
+                self._save_blocks()
+        except OSError:
+            pass  # only a cache; read-only locations just rebuild it next time
+        self.sketch = self._load_sketch(values)
+        return values, profit
+
+    def column(self, name):
+        """Memory-mapped column of every stored round (values or a metadata column)"""
+        if name == 'values':
+            if not self.count:
+                return np.empty(0, dtype=RECORD)
+            return np.memmap(self.path, dtype=RECORD, mode='r',
+                             offset=HEADER.size, shape=(self.count,))
+        dtype = dict(META_COLUMNS)[name]
+        path = self.meta_path(name)
+        if self.count and os.path.exists(path) and os.path.getsize(path) >= self.count * dtype.itemsize:
+            return np.memmap(path, dtype=dtype, mode='r', shape=(self.count,))
+        column = np.zeros(self.count, dtype=dtype)
+        if os.path.exists(path):
+            stored = np.fromfile(path, dtype=dtype, count=self.count)
+            column[:stored.size] = stored
+        return column
+
+    def load_meta(self):
+        """Metadata columns for the loaded records; returns (columns, stake table)"""
+        columns = {name: self.column(name) for name, _ in META_COLUMNS}
+        try:
+            with open(self.meta_path('codes.json'), 'r', encoding='utf-8') as f:
+                stake_table = [float(stake) for stake in json.load(f)['stakes']]
+        except (OSError, ValueError, TypeError, KeyError):
+            stake_table = None
+        return columns, stake_table
+
+    def save_codes(self, stake_table):
+        """Atomically persist the stake code table"""
+        path = self.meta_path('codes.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'stakes': list(stake_table)}, f)
+        os.replace(path + '.tmp', path)
+
+    def migrate_legacy(self):
+        """Convert crash_data.json into the binary format (once)"""
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            values = np.asarray(data.get('history', []), dtype=RECORD)
+            profit = float(data.get('profit', 0))
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            raise StoreError(f"{self.legacy_path}: {e}") from e
+
+        self.rewrite(values, profit)
+        os.replace(self.legacy_path, self.legacy_path + '.migrated')
+
+    def quarantine(self):
+        """Move an unreadable file aside instead of overwriting it"""
+        self.close()
+        target = f"{self.path}.corrupt-{int(time.time())}"
+        if os.path.exists(self.path):
+            os.replace(self.path, target)
+        for name in [name for name, _ in META_COLUMNS] + ['codes.json', 'blocks', 'sketch']:
+            if os.path.exists(self.meta_path(name)):
+                os.replace(self.meta_path(name), f"{target}.{name}")
+        self.count, self.profit, self.last_update = 0, 0.0, 0.0
+        self.blocks = BlockIndex()
+        self.sketch = QuantileSketch()
+        return target
+
+    def append(self, point, profit, meta=None):
+        """Append one point in O(1)"""
+        self.extend([point], profit, meta)
+
+    def extend(self, points, profit, meta=None, header=True):
+        """Append a batch of points (meta: optional dict of metadata columns)
+
+        header=False leaves the header (point count, profit) to a later
+        save_header, for bulk appends made of many batches.
+        """
+        points = np.ascontiguousarray(points, dtype=RECORD)
+        if not os.path.exists(self.path):
+            self.rewrite(points, profit, meta)
+            return
+
+        written = 0
+        for name, dtype in META_COLUMNS:
+            f = self._open_meta(name)
+            f.seek(self.count * dtype.itemsize)
+            written += f.write(self._meta_column(meta, name, dtype, points.size).tobytes())
+            f.flush()
+        f = self._open()
+        f.seek(HEADER.size + self.count * RECORD.itemsize)
+        written += f.write(points.tobytes())
+        f.flush()
+        self.count += int(points.size)
+        if header:
+            self._write_header(f, profit)
+            written += HEADER.size
+        TRACER.count('bytes_written', written)
+
+        self.sketch.extend(points)
+        completed = self.blocks.extend(points)
+        if completed.size:
+            with open(self.meta_path('blocks'), 'ab') as f:
+                f.write(completed.tobytes())
+            self.sketch.save(self.meta_path('sketch'))
+
+    def save_header(self, profit):
+        """Persist profit and last update without touching the records"""
+        if not os.path.exists(self.path):
+            self.rewrite(np.empty(0, dtype=RECORD), profit)
+            return
+        self._write_header(self._open(), profit)
+        TRACER.count('bytes_written', HEADER.size)
+        self.sketch.save(self.meta_path('sketch'))
+
+    def rewrite(self, values, profit, meta=None):
+        """Atomically replace the whole file and its metadata columns"""
+        self.close()
+        values = np.ascontiguousarray(values, dtype=RECORD)
+        last_update = time.time()
+        written = 0
+        for name, dtype in META_COLUMNS:
+            path = self.meta_path(name)
+            with open(path + '.tmp', 'wb') as f:
+                written += f.write(self._meta_column(meta, name, dtype, values.size).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + '.tmp', path)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            written += f.write(HEADER.pack(MAGIC, VERSION, 0, values.size, profit, last_update))
+            written += f.write(values.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        TRACER.count('bytes_written', written)
+        self.count, self.profit, self.last_update = int(values.size), float(profit), last_update
+
+        self.blocks = BlockIndex.from_values(values)
+        self._save_blocks()
+        self.sketch = QuantileSketch.from_values(values)
+        self.sketch.save(self.meta_path('sketch'))
+
+    def clear(self, profit=0.0):
+        """Drop every record"""
+        self.rewrite(np.empty(0, dtype=RECORD), profit)
+
+    def close(self):
+        """Release the append handle"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        for f in self._meta_files.values():
+            f.close()
+        self._meta_files.clear()
+
+    def _load_sketch(self, values):
+        """Saved sketch caught up with unsaved rounds, or rebuilt when unusable"""
+        try:
+            sketch = QuantileSketch.load(self.meta_path('sketch'))
+            if sketch.count > self.count:
+                raise SketchError("sketch is ahead of the history")
+            sketch.extend(values[sketch.count:])
+            return sketch
+        except (OSError, SketchError, ValueError):  # ValueError: damaged settings
+            return QuantileSketch.from_values(values)
+
+    def _save_blocks(self):
+        path = self.meta_path('blocks')
+        with open(path + '.tmp', 'wb') as f:
+            f.write(self.blocks.records.tobytes())
+        os.replace(path + '.tmp', path)
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'r+b')
+        return self._file
+
+    def _open_meta(self, name):
+        if name not in self._meta_files:
+            path = self.meta_path(name)
+            self._meta_files[name] = open(path, 'r+b' if os.path.exists(path) else 'w+b')
+        return self._meta_files[name]
+
+    @staticmethod
+    def _meta_column(meta, name, dtype, size):
+        column = None if meta is None else meta.get(name)
+        if column is None:
+            return np.zeros(size, dtype=dtype)
+        return np.ascontiguousarray(np.broadcast_to(column, (size,)), dtype=dtype)
+
+    def _write_header(self, f, profit):
+        self.profit = float(profit)
+        self.last_update = time.time()
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, 0, self.count, self.profit, self.last_update))
+        f.flush()
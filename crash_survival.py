@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Empirical survival curve P(crash >= x) with bootstrap confidence bands
+
+Rounds are counted between consecutive points of a sorted, log-spaced grid
+of multipliers (one np.searchsorted + bincount per batch), so the curve is
+exact at every grid point, kept up to date as rounds arrive and costs
+O(grid) memory and time to evaluate whatever the history length.
+
+Resampling the rounds with replacement only changes how many of them fall
+between consecutive grid points, so the bootstrap draws those counts from a
+multinomial distribution instead of touching the rounds.
+"""
+
+import numpy as np
+
+from crash_jobs import checkpoint
+
+GRID_LOW = 1.01
+GRID_HIGH = 1000.0
+GRID_POINTS = 200
+MULTIPLIERS = (1.5, 2.0, 3.0, 5.0, 10.0, 20.0, 50.0, 100.0)  # always on the grid
+HOUSE_EDGE = 0.01  # P(crash >= x) = (1 - HOUSE_EDGE) / x for an honest game
+BOOTSTRAP = 1000
+CONFIDENCE = 0.95
+SCAN_CHUNK = 1 << 20
+
+
+def default_grid():
+    """Log-spaced multipliers from GRID_LOW to GRID_HIGH plus MULTIPLIERS, on whole cents
+
+    Crash points are recorded with two decimals, so the empirical curve only
+    steps at whole cents; between them it sits below the continuous theory.
+    """
+    grid = np.concatenate([np.geomspace(GRID_LOW, GRID_HIGH, GRID_POINTS), MULTIPLIERS])
+    return np.unique(np.round(grid * 100) / 100)
+
+
+def theoretical_survival(x, house_edge=HOUSE_EDGE):
+    """P(crash >= x) of an honest game with the given house edge"""
+    return np.minimum(1.0, (1 - house_edge) / np.asarray(x, dtype=np.float64))
+
+
+class SurvivalCounts:
+    """Rounds counted between consecutive points of a sorted multiplier grid
+
+    counts[i] holds the rounds with exactly i grid points at or below them.
+    """
+
+    def __init__(self, grid=None):
+        self.grid = default_grid() if grid is None else np.sort(np.asarray(grid, dtype=np.float64))
+        self.reset()
+
+    @classmethod
+    def from_values(cls, values, grid=None):
+        """Build from a (memory-mapped) history a chunk at a time"""
+        survival = cls(grid)
+        for start in range(0, len(values), SCAN_CHUNK):
+            checkpoint()
+            survival.extend(values[start:start + SCAN_CHUNK])
+        return survival
+
+    def reset(self):
+        """Forget every round"""
+        self.counts = np.zeros(self.grid.size + 1, dtype=np.int64)
+        self.count = 0
+
+    def extend(self, values):
+        """Add rounds in O(len(values) * log(grid))"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not values.size:
+            return
+        self.counts += np.bincount(np.searchsorted(self.grid, values, side='right'),
+                                   minlength=self.counts.size)
+        self.count += int(values.size)
+
+    def survival(self):
+        """P(crash >= x) at every grid point"""
+        return (self.count - np.cumsum(self.counts)[:-1]) / max(self.count, 1)
+
+    def curve(self, resamples=BOOTSTRAP, confidence=CONFIDENCE, house_edge=HOUSE_EDGE, seed=0):
+        """Empirical curve, bootstrap band and theoretical curve; None without rounds"""
+        if not self.count:
+            return None
+        rng = np.random.default_rng(seed)
+        samples = rng.multinomial(self.count, self.counts / self.count, size=resamples)
+        resampled = (self.count - np.cumsum(samples, axis=1)[:, :-1]) / self.count
+        tail = (1 - confidence) / 2 * 100
+        lower, upper = np.percentile(resampled, [tail, 100 - tail], axis=0)
+        return {
+            'count': self.count,
+            'confidence': confidence,
+            'house_edge': house_edge,
+            'x': self.grid,
+            'survival': self.survival(),
+            'lower': lower,
+            'upper': upper,
+            'theoretical': theoretical_survival(self.grid, house_edge)
+        }
+
+
+def curve_at(curve, multipliers=MULTIPLIERS):
+    """Curve rows for some multipliers (each read at the grid point at or below it)"""
+    rows = []
+    for multiplier in multipliers:
+        i = int(np.searchsorted(curve['x'], multiplier, side='right')) - 1
+        if i < 0:
+            continue
+        survival = float(curve['survival'][i])
+        rows.append({
+            'multiplier': float(curve['x'][i]),
+            'survival': survival,
+            'lower': float(curve['lower'][i]),
+            'upper': float(curve['upper'][i]),
+            'theoretical': float(curve['theoretical'][i]),
+            # House edge that would explain the observed frequency at this target
+            'implied_edge': 1 - float(curve['x'][i]) * survival
+        })
+    return rows
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Hot-path timings, counters and Chrome-trace export
+
+Functions wrapped with @timed() (or blocks run under span()) record their
+latency into a log-bucketed histogram, together with the history size at
+call time and whatever counters (e.g. bytes written) were bumped while they
+ran. Disabled, which is the default, a wrapped call costs one attribute
+check. Recent calls are kept as trace events that export() writes in the
+Chrome trace format (chrome://tracing, ui.perfetto.dev).
+
+    CRASH_ANALYZER_TRACE=1 python elegant_crash_analywer.py   # trace from startup
+"""
+
+import functools
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+TRACE_EVENTS = 100_000  # most recent calls kept for export
+BUCKETS_PER_DECADE = 20  # latency histogram resolution (~12% per bucket)
+
+
+class LatencyHistogram:
+    """Call count and log-spaced latency buckets of one traced function"""
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.rounds = None  # history size at the last call
+        self.buckets = {}  # bucket -> calls
+
+    def add(self, duration_ns, rounds=None):
+        self.calls += 1
+        self.total_ns += duration_ns
+        self.max_ns = max(self.max_ns, duration_ns)
+        self.rounds = rounds
+        bucket = int(math.log10(max(duration_ns, 1)) * BUCKETS_PER_DECADE)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, q):
+        """Latency (ns) below which a fraction q of the calls fall (bucket midpoint)"""
+        if not self.calls:
+            return 0.0
+        rank = q * self.calls
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(10 ** ((bucket + 0.5) / BUCKETS_PER_DECADE), self.max_ns)
+        return float(self.max_ns)
+
+
+class Tracer:
+    """Registry of latency histograms, counters and recent trace events"""
+
+    def __init__(self, events=TRACE_EVENTS):
+        self.enabled = False
+        self.size = None  # callable returning the history size recorded with each call
+        self.histograms = {}
+        self.counters = {}
+        self.events = deque(maxlen=events)
+        self.threads = {}  # thread id -> name, for the exported trace
+        self.origin = time.perf_counter_ns()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.events.clear()
+            self.threads.clear()
+
+    @contextmanager
+    def span(self, name):
+        """Time the enclosed block under `name`; yields its event arguments"""
+        if not self.enabled:
+            yield {}
+            return
+        stack = self._stack()
+        args = {}
+        if self.size is not None:
+            args['rounds'] = self.size()
+        stack.append(args)
+        start = time.perf_counter_ns()
+        try:
+            yield args
+        finally:
+            duration = time.perf_counter_ns() - start
+            stack.pop()
+            self.record(name, start, duration, args)
+
+    def count(self, name, amount=1):
+        """Add to a counter and to the calls currently open on this thread"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+        for args in self._stack():
+            args[name] = args.get(name, 0) + amount
+
+    def record(self, name, start, duration, args):
+        thread = threading.current_thread()
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.add(duration, args.get('rounds'))
+            self.threads[thread.ident] = thread.name
+            self.events.append((name, start, duration, thread.ident, args))
+
+    def summary(self):
+        """Per-function statistics, most total time first (milliseconds)"""
+        with self._lock:
+            rows = [{'name': name, 'calls': h.calls, 'p50_ms': h.percentile(0.5) / 1e6,
+                     'p99_ms': h.percentile(0.99) / 1e6, 'max_ms': h.max_ns / 1e6,
+                     'total_ms': h.total_ns / 1e6, 'rounds': h.rounds}
+                    for name, h in self.histograms.items()]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def chrome_trace(self):
+        """Recorded calls as a Chrome trace (a dict ready for json.dump)"""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self.threads)
+            counters = dict(self.counters)
+        trace = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                  'args': {'name': name}} for tid, name in threads.items()]
+        trace += [{'name': name, 'cat': 'crash', 'ph': 'X', 'pid': pid, 'tid': tid,
+                   'ts': (start - self.origin) / 1000, 'dur': duration / 1000, 'args': args}
+                  for name, start, duration, tid, args in events]
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms',
+                'otherData': {'summary': self.summary(), 'counters': counters}}
+
+    def export(self, path):
+        """Write the Chrome trace to `path`; returns the number of events"""
+        trace = self.chrome_trace()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f)
+        return sum(1 for event in trace['traceEvents'] if event['ph'] == 'X')
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+
+TRACER = Tracer()
+span = TRACER.span
+count = TRACER.count
+
+
+def timed(name=None):
+    """Decorator recording every call of a function under `name` (its name by default)"""
+    def decorate(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return func(*args, **kwargs)
+            with TRACER.span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def format_summary(rows, limit=12):
+    """Fixed-width table of the busiest traced functions for the overlay"""
+    lines = [f"{'function':<24}{'calls':>7}{'p50 ms':>9}{'p99 ms':>9}{'rounds':>11}"]
+    for row in rows[:limit]:
+        rounds = '' if row['rounds'] is None else row['rounds']
+        lines.append(f"{row['name'][:23]:<24}{row['calls']:>7}{row['p50_ms']:>9.2f}"
+                     f"{row['p99_ms']:>9.2f}{rounds:>11}")
+    return '\n'.join(lines)
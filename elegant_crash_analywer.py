@@ -2,21 +2,43 @@
 # -*- coding: utf-8 -*-
 
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.font_manager as fm
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 import numpy as np
-import pandas as pd
-import json
+import copy
+import math
 import os
-from datetime import datetime
+import sqlite3
 import threading
 import time
+from datetime import datetime
+
+import crash_engine
+from crash_blocks import BlockIndex
+from crash_columns import RECENT_ROUNDS, RoundColumns
+from crash_import import StreamingImporter, parse_text
+from crash_jobs import AnalysisExecutor
+from crash_rolling import RollingStats
+from crash_scheduler import RefreshScheduler
+from crash_sketch import QuantileSketch
+from crash_sessions import DEFAULT_TABLE, SessionStore, default_session
+from crash_stats import ProfitSeries, RunningStats, round_profits
+from crash_store import HistoryStore, StoreError
+from crash_survival import SurvivalCounts
+from crash_trace import TRACER, format_summary, timed
 
-# Configure fonts for better rendering
-plt.rcParams['font.family'] = 'DejaVu Sans'
-plt.rcParams['font.sans-serif'] = ['DejaVu Sans']
+ALL_SESSIONS = "All data (working history)"
+ROUNDLESS_CHARTS = ('distribution', 'risk')  # charts whose x axis is not the round number
+BACKGROUND_CHARTS = ('distribution', 'risk')  # whole-history charts computed off the Tk thread
+HISTORY_PANELS = ('stats', 'predictions', 'recent', 'chart')  # panels that read the rounds
+STAKE_PANELS = ('stats', 'recent', 'chart')  # panels that show profit
+
+# matplotlib is only imported once a chart is needed (see prewarm)
+PREWARM = os.environ.get('CRASH_ANALYZER_PREWARM', '1') != '0'
+FEED_POLL_MS = 100
+FEED_TICK_BATCHES = 32  # feed batches moved into the history per poll
+EXPORT_POLL_MS = 200
+TRACE = os.environ.get('CRASH_ANALYZER_TRACE', '0') != '0'  # record timings from startup
+OVERLAY_MS = 500
 
 class ElegantCrashAnalyzer:
     def __init__(self, root):
@@ -26,19 +48,39 @@ class ElegantCrashAnalyzer:
         self.root.configure(bg='#1a1a2e')
         
         # Load data
-        self.history = []
+        self.rounds = RoundColumns()
         self.session_profit = 0
         self.predictions = []
         self.risk_level = "Medium"
+        self.stats = RunningStats()
+        self.rolling = RollingStats(limit=RECENT_ROUNDS)
+        self.pnl = ProfitSeries(limit=RECENT_ROUNDS)
+        self.store = HistoryStore()
+        self.sessions = SessionStore()
+        self.scope = None  # session/table/date filter of the working history
+        self.scope_cache = None  # scope selector entries, dropped on every append
+        self.scope_blocks = BlockIndex()
+        self.scope_sketch = QuantileSketch()
+        self.survival = None  # survival curve counts, built on first use
+        self.feed = None  # live feed endpoint, started from Settings
+        self.feed_rounds = 0
+        self.jobs = AnalysisExecutor(root)  # analyses, heavy charts and exports, off the Tk thread
+        self.chart_stale = False  # rounds arrived while a background chart was computed
+        TRACER.size = lambda: self.rounds.total
+        TRACER.enabled = TRACE
+        self.trace_overlay = None
         self.load_data()
         
         # Setup interface
         self.setup_styles()
         self.setup_gui()
-        self.update_dashboard()
         
         # Start auto-update
         self.auto_update()
+        self.update_dashboard()
+        
+        if PREWARM:
+            self.root.after(1000, self.prewarm)
     
     def setup_styles(self):
         """Setup styles and formatting"""
@@ -106,7 +148,26 @@ class ElegantCrashAnalyzer:
         self.stats_cards_frame = ttk.Frame(self.dashboard_tab)
         self.stats_cards_frame.pack(fill='x', padx=20, pady=10)
         
-        # Cards will be created dynamically in update_dashboard
+        # Cards are built once; update_stat_cards only changes their values
+        stat_cards = [
+            ("Total Points", "#27AE60", "📊"),
+            ("Default Profit", "#3498DB", "💰"),
+            ("Win Rate", "#9B59B6", "📈"),
+            ("Highest Value", "#E74C3C", "🚀"),
+            ("Lowest Value", "#F39C12", "📉"),
+            ("Volatility", "#1ABC9C", "⚡")
+        ]
+        
+        self.stat_cards = []
+        for i, (title, color, icon) in enumerate(stat_cards):
+            row = i // 3
+            col = i % 3
+            card_frame = tk.Frame(self.stats_cards_frame, bg='#1a1a2e')
+            card_frame.grid(row=row, column=col, padx=10, pady=10, sticky='nsew')
+            card, value_label = self.create_stat_card(card_frame, title, "", color, icon)
+            card.pack(fill='both', expand=True)
+            self.stat_cards.append((card, value_label))
+        self.stat_card_values = [None] * len(self.stat_cards)
         
         # Quick actions area
         actions_frame = ttk.LabelFrame(self.dashboard_tab, text="🚀 Quick Actions", padding=15)
@@ -239,7 +300,8 @@ class ElegantCrashAnalyzer:
             ("⚡ Quick Analysis", self.quick_analysis),
             ("🔍 Pattern Analysis", self.pattern_analysis),
             ("💰 Profit Analysis", self.profitability_analysis),
-            ("🎲 Probability Analysis", self.probability_analysis)
+            ("🎲 Probability Analysis", self.probability_analysis), 
+            ("🧪 Backtest Signals", self.backtest_analysis)
         ]
         
         for i, (text, command) in enumerate(analysis_types):
@@ -290,9 +352,35 @@ class ElegantCrashAnalyzer:
                           width=18, height=2)
             btn.pack(side='left', expand=True, padx=5)
         
-        # Chart frame
+        # Round range: typed in, or followed from the chart's zoom/pan
+        range_frame = tk.Frame(main_frame, bg='#1a1a2e')
+        range_frame.pack(fill='x')
+        
+        self.range_start = tk.StringVar()
+        self.range_end = tk.StringVar()
+        for text, variable in (("Rounds from:", self.range_start), ("to:", self.range_end)):
+            tk.Label(range_frame, text=text, bg='#1a1a2e', fg='#e6e6e6', 
+                    font=('Arial', 10)).pack(side='left', padx=5)
+            entry = tk.Entry(range_frame, textvariable=variable, width=10)
+            entry.pack(side='left')
+            entry.bind('<Return>', lambda e: self.apply_range())
+        
+        tk.Button(range_frame, text="🔍 Zoom", command=self.apply_range, 
+                 font=('Arial', 10), bg='#3498DB', fg='white').pack(side='left', padx=5)
+        tk.Button(range_frame, text="↔️ Full Range", command=self.reset_range, 
+                 font=('Arial', 10), bg='#34495E', fg='white').pack(side='left', padx=5)
+        
+        self.range_label = tk.Label(range_frame, text="", bg='#1a1a2e', fg='#8ecae6', 
+                                   font=('Arial', 10), anchor='w')
+        self.range_label.pack(side='left', fill='x', expand=True, padx=10)
+        
+        # Chart frame (one persistent canvas per chart type)
         self.chart_frame = tk.Frame(main_frame, bg='white', relief='sunken', bd=2)
         self.chart_frame.pack(fill='both', expand=True, pady=10)
+        self.chart_busy = tk.Label(self.chart_frame, text="⏳ Computing chart...", bg='#16213e', 
+                                   fg='#e6e6e6', font=('Arial', 12), padx=15, pady=8)
+        self.charts = {}
+        self.current_chart = None
     
     def setup_settings_tab(self):
         """Setup settings tab"""
@@ -323,6 +411,17 @@ class ElegantCrashAnalyzer:
                                   values=["5", "10", "15", "20", "25"], 
                                   state="readonly", width=10)
         window_combo.pack(side='left', padx=10, pady=10)
+        window_combo.bind('<<ComboboxSelected>>', lambda e: self.scheduler.mark_dirty('chart'))
+        
+        tk.Label(analysis_settings, text="Stake per round:", 
+                bg='#16213e', fg='white', font=('Arial', 10)).pack(side='left', 
+                padx=10, pady=10)
+        
+        self.stake_var = tk.StringVar(value=f"{self.pnl.stake:g}")
+        stake_entry = tk.Entry(analysis_settings, textvariable=self.stake_var, width=10)
+        stake_entry.pack(side='left', padx=10, pady=10)
+        stake_entry.bind('<Return>', lambda e: self.apply_stake())
+        stake_entry.bind('<FocusOut>', lambda e: self.apply_stake())
         
         # Data settings
         data_settings = tk.LabelFrame(settings_frame, text="Data Management", 
@@ -345,6 +444,58 @@ class ElegantCrashAnalyzer:
                           font=('Arial', 10), bg='#34495E', fg='white', width=15)
             btn.pack(side='left', expand=True, padx=5)
         
+        # Session settings
+        session_settings = tk.LabelFrame(settings_frame, text="Sessions", 
+                                       bg='#16213e', fg='#8ecae6', 
+                                       font=('Arial', 12, 'bold'))
+        session_settings.pack(fill='x', padx=20, pady=10)
+        
+        current_row = tk.Frame(session_settings, bg='#16213e')
+        current_row.pack(fill='x')
+        scope_row = tk.Frame(session_settings, bg='#16213e')
+        scope_row.pack(fill='x')
+        
+        self.session_var = tk.StringVar(value=default_session())
+        self.table_var = tk.StringVar(value=DEFAULT_TABLE)
+        for text, variable in (("New rounds go to session:", self.session_var), 
+                               ("Table:", self.table_var)):
+            tk.Label(current_row, text=text, bg='#16213e', fg='white', 
+                    font=('Arial', 10)).pack(side='left', padx=10, pady=5)
+            tk.Entry(current_row, textvariable=variable, width=14).pack(side='left', pady=5)
+        
+        tk.Label(scope_row, text="Analyze:", bg='#16213e', fg='white', 
+                font=('Arial', 10)).pack(side='left', padx=10, pady=5)
+        self.scope_var = tk.StringVar(value=ALL_SESSIONS)
+        scope_combo = ttk.Combobox(scope_row, textvariable=self.scope_var, width=28, 
+                                  state="readonly", postcommand=lambda: scope_combo.configure(
+                                      values=self.scope_choices()))
+        scope_combo.pack(side='left', pady=5)
+        
+        self.scope_start = tk.StringVar()
+        self.scope_end = tk.StringVar()
+        for text, variable in (("From (YYYY-MM-DD):", self.scope_start), ("To:", self.scope_end)):
+            tk.Label(scope_row, text=text, bg='#16213e', fg='white', 
+                    font=('Arial', 10)).pack(side='left', padx=10, pady=5)
+            tk.Entry(scope_row, textvariable=variable, width=11).pack(side='left', pady=5)
+        
+        tk.Button(scope_row, text="🔍 Apply", command=self.apply_scope, font=('Arial', 10), 
+                 bg='#34495E', fg='white').pack(side='left', padx=10)
+        tk.Button(scope_row, text="↩️ All Data", command=self.reset_scope, font=('Arial', 10), 
+                 bg='#34495E', fg='white').pack(side='left')
+        
+        # Live feed settings
+        feed_settings = tk.LabelFrame(settings_frame, text="Live Feed", 
+                                    bg='#16213e', fg='#8ecae6', 
+                                    font=('Arial', 12, 'bold'))
+        feed_settings.pack(fill='x', padx=20, pady=10)
+        
+        self.feed_button = tk.Button(feed_settings, text="📡 Start Feed", command=self.toggle_feed, 
+                                    font=('Arial', 10), bg='#34495E', fg='white', width=15)
+        self.feed_button.pack(side='left', padx=10, pady=10)
+        self.feed_status = tk.Label(feed_settings, text="Stopped", bg='#16213e', 
+                                   fg='#e6e6e6', font=('Arial', 10))
+        self.feed_status.pack(side='left', padx=10, pady=10)
+        
         # UI settings
         ui_settings = tk.LabelFrame(settings_frame, text="Interface Settings", 
                                   bg='#16213e', fg='#8ecae6', 
@@ -358,6 +509,15 @@ class ElegantCrashAnalyzer:
                                       selectcolor='#16213e')
         auto_update_cb.pack(side='left', padx=10, pady=10)
         
+        self.trace_var = tk.BooleanVar(value=TRACER.enabled)
+        tk.Checkbutton(ui_settings, text="Performance Overlay", variable=self.trace_var, 
+                      command=self.toggle_trace, bg='#16213e', fg='white', 
+                      selectcolor='#16213e').pack(side='left', padx=10, pady=10)
+        tk.Button(ui_settings, text="💾 Export Trace", command=self.export_trace, 
+                 font=('Arial', 10), bg='#34495E', fg='white').pack(side='left', padx=10, pady=10)
+        if TRACER.enabled:
+            self.toggle_trace()
+        
         # System info
         info_frame = tk.LabelFrame(settings_frame, text="System Information", 
                                  bg='#16213e', fg='#8ecae6', 
@@ -366,7 +526,7 @@ class ElegantCrashAnalyzer:
         
         info_text = f"""
 Software Version: Ghost Crash Analyzer Pro v2.0
-Loaded Points: {len(self.history)}
+Loaded Points: {self.rounds.total}
 Last Update: {datetime.now().strftime('%Y-%m-%d %H:%M')}
 System Status: ✅ Active
 """
@@ -374,44 +534,48 @@ System Status: ✅ Active
                             fg='#e6e6e6', font=('Arial', 10), justify='left')
         info_label.pack(padx=10, pady=10)
     
+    @timed()
     def update_dashboard(self):
         """Update dashboard"""
-        # Clear old cards
-        for widget in self.stats_cards_frame.winfo_children():
-            widget.destroy()
-        
-        # Create new cards
+        self.scheduler.refresh_all()
+    
+    @timed()
+    def update_stat_cards(self):
+        """Update statistics cards"""
+        values = crash_engine.dashboard(self.stats, self.rounds.total, self.session_profit, 
+                                        self.rounds.tail(5))
         stats_data = [
-            ("Total Points", f"{len(self.history)}", "#27AE60", "📊"),
-            ("Default Profit", f"{self.session_profit:.2f} 💰", "#3498DB", "💰"),
-            ("Win Rate", f"{self.calculate_win_rate():.1f}%", "#9B59B6", "📈"),
-            ("Highest Value", f"{max(self.history) if self.history else 0:.2f}x", "#E74C3C", "🚀"),
-            ("Lowest Value", f"{min(self.history) if self.history else 0:.2f}x", "#F39C12", "📉"),
-            ("Volatility", f"{self.calculate_volatility():.3f}", "#1ABC9C", "⚡")
+            (f"{values['rounds']}", 'white'),
+            (f"{values['profit']:.2f} 💰", '#27AE60' if values['profit'] >= 0 else '#E74C3C'),
+            (f"{values['win_rate']:.1f}%", 'white'),
+            (f"{values['highest']:.2f}x", 'white'),
+            (f"{values['lowest']:.2f}x", 'white'),
+            (f"{values['volatility']:.3f}", self.volatility_color(values['volatility']))
         ]
         
-        self.stat_cards = []
-        for i, (title, value, color, icon) in enumerate(stats_data):
-            row = i // 3
-            col = i % 3
-            card_frame = tk.Frame(self.stats_cards_frame, bg='#1a1a2e')
-            card_frame.grid(row=row, column=col, padx=10, pady=10, sticky='nsew')
-            card, value_label = self.create_stat_card(card_frame, title, value, color, icon)
-            card.pack(fill='both', expand=True)
-            self.stat_cards.append((card, value_label))
-        
-        # Update live predictions
-        self.update_live_predictions()
-        
-        # Update recent data
-        self.update_recent_data()
+        # Only touch labels whose text or color actually changed
+        for i, ((card, value_label), value) in enumerate(zip(self.stat_cards, stats_data)):
+            if value != self.stat_card_values[i]:
+                text, color = value
+                value_label.config(text=text, fg=color)
+                self.stat_card_values[i] = value
     
+    def volatility_color(self, volatility):
+        """Card color for a volatility level"""
+        if volatility < 0.5:
+            return '#27AE60'
+        elif volatility < 1.0:
+            return '#F39C12'
+        else:
+            return '#E74C3C'
+    
+    @timed()
     def update_live_predictions(self):
         """Update live predictions"""
         self.predictions_text.config(state='normal')
         self.predictions_text.delete(1.0, tk.END)
         
-        if len(self.history) < 3:
+        if self.rounds.total < 3:
             self.predictions_text.insert(1.0, "Add at least 3 points for prediction...")
         else:
             prediction = self.smart_prediction()
@@ -429,19 +593,21 @@ System Status: ✅ Active
         
         self.predictions_text.config(state='disabled')
     
+    @timed()
     def update_recent_data(self):
         """Update recent data"""
         self.recent_text.config(state='normal')
         self.recent_text.delete(1.0, tk.END)
         
-        if not self.history:
+        if not self.rounds.total:
             self.recent_text.insert(1.0, "No data added yet...")
         else:
             recent_data = "📋 Recently Added Points:\n\n"
-            for i, point in enumerate(self.history[-10:][::-1], 1):  # Show last 10 points
-                profit = (point - 1) * 10 if point > 1 else -10
-                trend = "📈" if i > 1 and point > self.history[-i] else "📉"
-                recent_data += f"{trend} Point {len(self.history)-i+1}: {point:.2f}x | Profit: {profit:+.2f}\n"
+            recent_profits = self.pnl.rounds[-10:][::-1]
+            recent = self.rounds.tail(10)
+            for i, (point, profit) in enumerate(zip(recent[::-1], recent_profits), 1):  # Show last 10 points
+                trend = "📈" if i > 1 and point > recent[-i] else "📉"
+                recent_data += f"{trend} Point {self.rounds.total-i+1}: {point:.2f}x | Profit: {profit:+.2f}\n"
             
             self.recent_text.insert(1.0, recent_data)
         
@@ -460,69 +626,98 @@ System Status: ✅ Active
                 messagebox.showwarning("Warning", "Point must be greater than zero")
                 return
             
-            self.history.append(point)
+            self.add_points([point], source='manual')
             
-            # Calculate profit
+            # Profit of this round at the current stake (the scope may not include it)
             if point > 1.0:
-                profit = (point - 1) * 10
-                self.session_profit += profit
+                profit = float(round_profits(point, self.pnl.stake))
                 messagebox.showinfo("Success", f"✅ Point added: {point}x\n💰 Profit: +{profit:.2f}")
             else:
                 messagebox.showinfo("Success", f"✅ Point added: {point}x\n💸 Complete loss")
             
             self.quick_entry.delete(0, tk.END)
-            self.save_data()
-            self.update_dashboard()
             
         except ValueError:
             messagebox.showerror("Error", "❌ Please enter a valid number")
     
+    @property
+    def blocks(self):
+        """Block summaries of the working history"""
+        return self.store.blocks if self.scope is None else self.scope_blocks
+    
+    @property
+    def sketch(self):
+        """Quantile sketch of the working history"""
+        return self.store.sketch if self.scope is None else self.scope_sketch
+    
+    @property
+    def history(self):
+        """Every crash point of the working history (memory-mapped beyond the recent rounds)"""
+        return self.rounds.values
+    
+    @timed()
+    def add_points(self, points, source='unknown', times=None, session=None, table=None, 
+                   batch=False, runs=None):
+        """Append points to history, statistics and storage (times: epoch ns, 0 = unknown)
+        
+        Rounds go to the session and table chosen in Settings unless given,
+        or runs lists (start, stop, session, table) for consecutive rounds
+        from different sessions/tables (live feed batches).
+        batch: one part of a bulk append; the caller saves the header and
+        refreshes the panels once it is done.
+        """
+        columns = self.rounds.make_columns(points, times, self.pnl.stake, source)
+        if runs is None:
+            runs = [(0, columns['values'].size, session or self.session_var.get(), 
+                     table or self.table_var.get())]
+        # Rounds keep their arrival order; a scope only takes the runs it covers
+        accepted = [(start, stop) for start, stop, session, table in runs 
+                    if self.scope_accepts(session, table)]
+        if accepted:
+            if len(accepted) < len(runs):
+                rows = np.concatenate([np.arange(start, stop) for start, stop in accepted])
+                kept = {name: column[rows] for name, column in columns.items()}
+            else:
+                kept = columns
+            values = kept['values']
+            self.rounds.extend(kept)
+            if self.scope is not None:
+                self.scope_blocks.extend(values)
+                self.scope_sketch.extend(values)
+            self.stats.extend(values)
+            self.rolling.extend(values)
+            self.pnl.extend(values)
+            if self.survival is not None:
+                self.survival.extend(values)
+            self.session_profit = self.pnl.total
+            # Live feed rounds only redraw while Auto Update is on
+            if not batch:
+                self.scheduler.mark_dirty(*HISTORY_PANELS, automatic=source == 'feed')
+        self.append_data(columns, runs, header=not batch)
+    
     # Analysis methods (to be implemented)
     def calculate_win_rate(self):
         """Calculate win rate"""
-        if not self.history:
-            return 0
-        wins = len([x for x in self.history if x > 1.0])
-        return (wins / len(self.history)) * 100
+        return self.stats.win_rate
     
     def calculate_volatility(self):
         """Calculate volatility"""
-        if len(self.history) < 2:
-            return 0
-        return np.std(self.history)
+        return crash_engine.volatility(self.stats)
     
     def smart_prediction(self):
         """Smart prediction algorithm"""
-        if len(self.history) < 3:
+        prediction = crash_engine.smart_prediction(self.rounds.tail(5))
+        if prediction is None:
             return "N/A"
-        recent = self.history[-5:]
-        prediction = np.mean(recent) * 1.1
-        return f"{max(1.01, prediction):.2f}x"
+        return f"{prediction:.2f}x"
     
     def risk_analysis(self):
         """Risk analysis"""
-        if len(self.history) < 3:
-            return {"level": "Low", "icon": "🟢", "volatility": 0, "recommendation": "Add more data"}
-        
-        volatility = self.calculate_volatility()
-        if volatility < 0.5:
-            return {"level": "Low", "icon": "🟢", "volatility": volatility, "recommendation": "Safe to bet"}
-        elif volatility < 1.0:
-            return {"level": "Medium", "icon": "🟡", "volatility": volatility, "recommendation": "Bet with caution"}
-        else:
-            return {"level": "High", "icon": "🔴", "volatility": volatility, "recommendation": "Avoid betting"}
+        return crash_engine.risk_analysis(self.calculate_volatility(), self.rounds.total)
     
     def trading_signals(self):
         """Trading signals"""
-        if len(self.history) < 3:
-            return "N/A"
-        prediction = float(self.smart_prediction().replace('x', ''))
-        if prediction > 2.5:
-            return "🟢 STRONG BUY"
-        elif prediction > 1.8:
-            return "🟡 MODERATE BUY"
-        else:
-            return "🔴 AVOID"
+        return crash_engine.trading_signal(crash_engine.smart_prediction(self.rounds.tail(5)))
     
     def show_quick_input(self):
         """Show quick input tab"""
@@ -534,7 +729,7 @@ System Status: ✅ Active
     
     def quick_prediction(self):
         """Quick prediction"""
-        if len(self.history) < 3:
+        if self.rounds.total < 3:
             messagebox.showinfo("Prediction", "Add at least 3 points for prediction")
         else:
             prediction = self.smart_prediction()
@@ -544,131 +739,148 @@ System Status: ✅ Active
         """Run full analysis"""
         self.statistical_analysis()
     
+    @timed()
     def statistical_analysis(self):
         """Statistical analysis"""
-        self.analysis_text.config(state='normal')
-        self.analysis_text.delete(1.0, tk.END)
+        def compute(data):
+            report = crash_engine.statistical_report(data['history'], data['stats'], data['pnl'], 
+                                                     sketch=data['sketch'])
+            return crash_engine.format_statistical_report(report)
         
-        if len(self.history) < 3:
-            self.analysis_text.insert(1.0, "Add at least 3 points for analysis")
-        else:
-            analysis = f"""
-📊 Statistical Analysis Report
-{'='*40}
-
-Basic Statistics:
-├─ Total Points: {len(self.history)}
-├─ Mean: {np.mean(self.history):.3f}x
-├─ Median: {np.median(self.history):.3f}x
-├─ Standard Deviation: {np.std(self.history):.3f}
-├─ Variance: {np.var(self.history):.3f}
-└─ Range: {max(self.history) - min(self.history):.3f}
-
-Performance Metrics:
-├─ Win Rate: {self.calculate_win_rate():.1f}%
-├─ Profit Factor: {(self.session_profit/len(self.history)):.3f}
-└─ Risk/Reward Ratio: {(np.mean(self.history)/np.std(self.history)):.3f}
-
-Distribution Analysis:
-├─ Skewness: {self.calculate_skewness():.3f}
-├─ Kurtosis: {self.calculate_kurtosis():.3f}
-└─ Volatility Index: {self.calculate_volatility():.3f}
-"""
-            self.analysis_text.insert(1.0, analysis)
-        
-        self.analysis_text.config(state='disabled')
+        self.run_analysis("📊 Computing statistics", compute, 'stats', 'pnl', 'sketch')
     
     def calculate_skewness(self):
         """Calculate skewness"""
-        if len(self.history) < 3:
-            return 0
-        return float(pd.Series(self.history).skew())
+        return self.stats.skewness
     
     def calculate_kurtosis(self):
         """Calculate kurtosis"""
-        if len(self.history) < 4:
-            return 0
-        return float(pd.Series(self.history).kurtosis())
+        return self.stats.kurtosis
     
+    @timed()
     def trend_analysis(self):
         """Trend analysis"""
-        self.analysis_text.config(state='normal')
-        self.analysis_text.delete(1.0, tk.END)
-        
-        if len(self.history) < 5:
-            self.analysis_text.insert(1.0, "Add at least 5 points for trend analysis")
-        else:
-            # Implement trend analysis logic
-            analysis = "📈 Trend Analysis - Feature coming soon!"
-            self.analysis_text.insert(1.0, analysis)
+        def compute(data):
+            report = crash_engine.trend_report(data['rolling'], data['window'])
+            hourly = crash_engine.hourly_report(data['times'], data['history'])
+            return (crash_engine.format_trend_report(report) + 
+                    crash_engine.format_hourly_report(hourly))
         
-        self.analysis_text.config(state='disabled')
+        self.run_analysis("📈 Analyzing trends", compute, 'rolling')
     
     def quick_analysis(self):
         """Quick analysis"""
         self.statistical_analysis()
     
+    @timed()
     def pattern_analysis(self):
         """Pattern analysis"""
-        self.analysis_text.config(state='normal')
-        self.analysis_text.delete(1.0, tk.END)
-        self.analysis_text.insert(1.0, "🔍 Pattern Analysis - Feature coming soon!")
-        self.analysis_text.config(state='disabled')
+        self.run_analysis("🔍 Testing for patterns", lambda data: 
+                          crash_engine.format_pattern_report(
+                              crash_engine.pattern_report(data['history'])))
     
+    @timed()
     def profitability_analysis(self):
         """Profitability analysis"""
-        self.analysis_text.config(state='normal')
-        self.analysis_text.delete(1.0, tk.END)
-        self.analysis_text.insert(1.0, "💰 Profitability Analysis - Feature coming soon!")
-        self.analysis_text.config(state='disabled')
+        self.run_analysis("💰 Simulating sessions", lambda data: 
+                          crash_engine.format_profitability_report(
+                              crash_engine.profitability_report(data['history'], data['stake'])))
+    
+    @timed()
+    def backtest_analysis(self):
+        """Walk-forward backtest of the prediction and trading signals"""
+        self.run_analysis("🧪 Replaying rounds", lambda data: 
+                          crash_engine.format_backtest_report(
+                              crash_engine.backtest_report(data['history'], data['stake'])))
     
+    @timed()
     def probability_analysis(self):
         """Probability analysis"""
+        def compute(data):
+            report = None
+            if data['total'] >= 5:
+                report = crash_engine.probability_report(data['history'], 
+                                                         self.snapshot_survival(data))
+            return crash_engine.format_probability_report(report)
+        
+        self.run_analysis("🎲 Estimating probabilities", compute, 'survival')
+    
+    def snapshot(self, *parts):
+        """Frozen working history plus copies of the named summaries, for a background job"""
+        data = {'total': self.rounds.total, 'stake': self.pnl.stake, 
+                'window': self.analysis_window(), 
+                'history': self.rounds.frozen('values'), 'times': self.rounds.frozen('times')}
+        for part in parts:
+            data[part] = copy.deepcopy(getattr(self, part))
+        return data
+    
+    def snapshot_survival(self, data):
+        """Survival counts of a snapshot, built on the worker the first time"""
+        if data['survival'] is None:
+            data['survival'] = SurvivalCounts.from_values(data['history'])
+        return data['survival']
+    
+    def adopt_survival(self, data):
+        """Keep survival counts built in the background, caught up with the rounds added since"""
+        if self.survival is None and data['survival'] is not None:
+            data['survival'].extend(self.history[data['total']:self.rounds.total])
+            self.survival = data['survival']
+    
+    def run_analysis(self, title, compute, *parts):
+        """Run compute(snapshot) in the background and show the text it returns"""
+        data = self.snapshot(*parts)
+        self.show_analysis_text(f"⏳ {title}...")
+        self.jobs.submit('analysis', lambda: compute(data), 
+                         lambda text: self.finish_analysis(data, text), 
+                         lambda error: self.show_analysis_text(f"❌ Analysis failed: {error}"))
+    
+    def finish_analysis(self, data, text):
+        """Show a finished report, noting rounds that arrived while it was computed"""
+        if 'survival' in data:
+            self.adopt_survival(data)
+        arrived = self.rounds.total - data['total']
+        if arrived > 0:
+            text += (f"\n⏱️ Based on {data['total']} rounds; {arrived} arrived since "
+                     f"— run it again to include them.\n")
+        self.show_analysis_text(text)
+    
+    def show_analysis_text(self, text):
+        """Replace the contents of the analysis panel"""
         self.analysis_text.config(state='normal')
         self.analysis_text.delete(1.0, tk.END)
-        self.analysis_text.insert(1.0, "🎲 Probability Analysis - Feature coming soon!")
+        self.analysis_text.insert(1.0, text)
         self.analysis_text.config(state='disabled')
     
+    def cancel_jobs(self):
+        """Drop background work computed on a history that is being replaced
+        
+        Exports are kept: they write their own snapshot to a file the user chose.
+        """
+        if self.jobs.busy('analysis'):
+            self.show_analysis_text("⚠️ The data changed while analyzing — run it again.")
+        if self.jobs.busy('chart'):
+            self.chart_busy.place_forget()
+        self.jobs.cancel('analysis')
+        self.jobs.cancel('chart')
+    
     # Chart methods
     def plot_points_chart(self):
         """Plot points chart"""
-        self.clear_chart_frame()
-        if len(self.history) < 2:
+        if self.rounds.total < 2:
+            self.clear_chart_frame()
             messagebox.showwarning("Warning", "Add at least 2 points for chart")
             return
         
-        fig, ax = plt.subplots(figsize=(10, 6), facecolor='#1a1a2e')
-        ax.set_facecolor('#1a1a2e')
-        
-        points = self.history[-50:]
-        x = range(1, len(points) + 1)
-        
-        ax.plot(x, points, 'o-', color='#00b4d8', linewidth=2, markersize=4)
-        ax.set_xlabel('Round Number', color='white', fontsize=12)
-        ax.set_ylabel('Crash Point (x)', color='white', fontsize=12)
-        ax.set_title('📊 Crash Points History', color='white', fontsize=14, fontweight='bold')
-        ax.grid(True, alpha=0.3)
-        ax.tick_params(colors='white')
-        
-        self.embed_chart(fig)
+        self.show_chart('points')
     
     def plot_moving_average(self):
         """Plot moving average"""
-        self.clear_chart_frame()
-        if len(self.history) < 5:
+        if self.rounds.total < 5:
+            self.clear_chart_frame()
             messagebox.showwarning("Warning", "Add at least 5 points for moving average")
             return
         
-        fig, ax = plt.subplots(figsize=(10, 6), facecolor='#1a1a2e')
-        ax.set_facecolor('#1a1a2e')
-        
-        # Implement moving average logic
-        ax.text(0.5, 0.5, 'Moving Average Chart\nComing Soon!', 
-               horizontalalignment='center', verticalalignment='center',
-               transform=ax.transAxes, color='white', fontsize=16)
-        ax.set_facecolor('#1a1a2e')
-        
-        self.embed_chart(fig)
+        self.show_chart('moving_average')
     
     def plot_trend_analysis(self):
         """Plot trend analysis"""
@@ -676,131 +888,705 @@ Distribution Analysis:
     
     def plot_distribution(self):
         """Plot distribution"""
-        self.clear_chart_frame()
-        if len(self.history) < 5:
+        if self.rounds.total < 5:
+            self.clear_chart_frame()
             messagebox.showwarning("Warning", "Add at least 5 points for distribution")
             return
         
-        fig, ax = plt.subplots(figsize=(10, 6), facecolor='#1a1a2e')
-        ax.set_facecolor('#1a1a2e')
-        
-        ax.hist(self.history, bins=15, color='#00b4d8', alpha=0.7, edgecolor='white')
-        ax.set_xlabel('Crash Point (x)', color='white', fontsize=12)
-        ax.set_ylabel('Frequency', color='white', fontsize=12)
-        ax.set_title('📈 Points Distribution', color='white', fontsize=14, fontweight='bold')
-        ax.grid(True, alpha=0.3)
-        ax.tick_params(colors='white')
-        
-        self.embed_chart(fig)
+        self.show_chart('distribution')
     
     def plot_profit_trend(self):
         """Plot profit trend"""
-        self.clear_chart_frame()
-        if len(self.history) < 2:
+        if self.rounds.total < 2:
+            self.clear_chart_frame()
             messagebox.showwarning("Warning", "Add at least 2 points for profit analysis")
             return
         
-        fig, ax = plt.subplots(figsize=(10, 6), facecolor='#1a1a2e')
-        ax.set_facecolor('#1a1a2e')
-        
-        # Calculate cumulative profit
-        profits = []
-        cumulative = 0
-        for point in self.history:
-            profit = (point - 1) * 10 if point > 1 else -10
-            cumulative += profit
-            profits.append(cumulative)
-        
-        x = range(1, len(profits) + 1)
-        ax.plot(x, profits, 'o-', color='#27AE60', linewidth=2)
-        ax.set_xlabel('Round Number', color='white', fontsize=12)
-        ax.set_ylabel('Cumulative Profit', color='white', fontsize=12)
-        ax.set_title('💰 Cumulative Profit Trend', color='white', fontsize=14, fontweight='bold')
-        ax.grid(True, alpha=0.3)
-        ax.tick_params(colors='white')
-        
-        self.embed_chart(fig)
+        self.show_chart('profit')
     
     def plot_risk_analysis(self):
         """Plot risk analysis"""
-        self.plot_distribution()  # Temporary implementation
+        if self.rounds.total < 5:
+            self.clear_chart_frame()
+            messagebox.showwarning("Warning", "Add at least 5 points for risk analysis")
+            return
+        
+        self.show_chart('risk')
+    
+    def create_chart(self, name):
+        """Create the long-lived figure for a chart type"""
+        from crash_charts import make_chart
+        
+        view = make_chart(name)
+        self.embed_chart(view)
+        if name not in ROUNDLESS_CHARTS:
+            view.ax.callbacks.connect('xlim_changed', self.follow_chart_range)
+        self.charts[name] = view
+        return view
+    
+    def chart_data(self, name):
+        """Series shown by a chart type (background charts: see chart_job)"""
+        # A scoped history is kept whole in memory; the store's blocks cover all rounds
+        return crash_engine.chart_series(name, self.rounds, self.rolling, self.pnl, 
+                                         self.analysis_window(), 
+                                         None if self.scope else self.store.blocks)
+    
+    @timed()
+    def chart_job(self, name, data, bins):
+        """Data of a background chart computed on a snapshot (runs on the worker)"""
+        survival = self.snapshot_survival(data) if name == 'risk' else None
+        return crash_engine.background_chart(name, data['history'], data['stats'], bins, survival)
+    
+    def chart_first(self, name):
+        """Round number of the first value a chart shows (the profit curve carries its own)"""
+        if name == 'points':
+            return self.rounds.total - min(self.rounds.total, 50) + 1
+        elif name == 'moving_average':
+            return self.rolling.offset + 1
+        return 1
+    
+    def parse_range(self):
+        """Round range [start, end) from the Charts fields (blank means open-ended)"""
+        total = self.rounds.total
+        start = int(self.range_start.get()) - 1 if self.range_start.get().strip() else 0
+        end = int(self.range_end.get()) if self.range_end.get().strip() else total
+        return max(0, start), min(end, total)
+    
+    def apply_range(self):
+        """Zoom the chart to the chosen rounds and report on them"""
+        try:
+            start, end = self.parse_range()
+        except ValueError:
+            messagebox.showerror("Error", "❌ Rounds must be whole numbers")
+            return
+        if end <= start:
+            messagebox.showwarning("Warning", "The range holds no rounds")
+            return
+        
+        view = self.charts.get(self.current_chart)
+        if view is not None and self.current_chart not in ROUNDLESS_CHARTS:
+            view.set_x_range((start + 0.5, end + 0.5))
+            view.canvas.draw_idle()
+        self.show_range_report(start, end)
+    
+    def reset_range(self):
+        """Let the chart follow all of its data again"""
+        self.range_start.set("")
+        self.range_end.set("")
+        for view in self.charts.values():
+            view.set_x_range(None)
+        if self.current_chart is not None:
+            self.show_chart(self.current_chart)
+        self.show_range_report(0, self.rounds.total)
+    
+    def follow_chart_range(self, ax):
+        """Report on the rounds visible after a zoom or pan"""
+        low, high = ax.get_xlim()
+        start = max(0, math.ceil(low) - 1)
+        end = min(self.rounds.total, math.floor(high))
+        self.range_start.set(str(start + 1))
+        self.range_end.set(str(end))
+        self.show_range_report(start, end)
+    
+    @timed()
+    def show_range_report(self, start, end):
+        """Statistics of rounds [start, end) from the block index, instant on any size"""
+        report = crash_engine.range_report(self.blocks, self.history, start, end, self.pnl.stake)
+        self.range_label.config(text=crash_engine.format_range_report(report))
+    
+    def analysis_window(self):
+        """Rolling window size chosen in Settings"""
+        return int(self.window_size.get())
+    
+    @timed()
+    def show_chart(self, name):
+        """Show a chart, reusing its figure and canvas"""
+        view = self.charts.get(name) or self.create_chart(name)
+        if self.current_chart != name:
+            self.clear_chart_frame()
+            view.frame.pack(fill='both', expand=True)
+            self.current_chart = name
+        if name in BACKGROUND_CHARTS:
+            self.submit_chart(name, view)
+            return
+        view.refresh(self.chart_data(name), self.chart_first(name))
+    
+    def submit_chart(self, name, view):
+        """Compute a whole-history chart in the background, superseding any older one"""
+        data = self.snapshot('survival' if name == 'risk' else 'stats')
+        self.chart_stale = False
+        self.chart_busy.place(relx=0.5, rely=0.5, anchor='center')
+        self.chart_busy.lift()
+        bins = getattr(view, 'bins', None)
+        self.jobs.submit('chart', lambda: self.chart_job(name, data, bins), 
+                         lambda result: self.finish_chart(name, data, result), self.chart_failed)
+    
+    def finish_chart(self, name, data, result):
+        """Draw a finished background chart unless another chart is shown by now"""
+        self.chart_busy.place_forget()
+        if name == 'risk':
+            self.adopt_survival(data)
+        if self.current_chart != name:
+            return
+        self.charts[name].refresh(result, self.chart_first(name))
+        if self.chart_stale:
+            self.update_chart()
+    
+    def chart_failed(self, error):
+        """Report a background chart that could not be computed"""
+        self.chart_busy.place_forget()
+        messagebox.showerror("Error", f"Failed to draw chart: {error}")
+    
+    @timed()
+    def update_chart(self):
+        """Refresh the visible chart after data changes"""
+        if self.current_chart is None:
+            return
+        if self.rounds.total < self.charts[self.current_chart].min_points:
+            self.clear_chart_frame()
+            return
+        if self.current_chart in BACKGROUND_CHARTS and self.jobs.busy('chart'):
+            # Superseding a running job on every new round would never let one finish
+            self.chart_stale = True
+            return
+        self.show_chart(self.current_chart)
     
     def clear_chart_frame(self):
         """Clear chart frame"""
         for widget in self.chart_frame.winfo_children():
-            widget.destroy()
+            widget.pack_forget()
+        self.chart_busy.place_forget()
+        self.jobs.cancel('chart')
+        self.current_chart = None
     
-    def embed_chart(self, fig):
+    @timed()
+    def embed_chart(self, view):
         """Embed chart in interface"""
-        canvas = FigureCanvasTkAgg(fig, self.chart_frame)
-        canvas.draw()
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        
+        view.frame = tk.Frame(self.chart_frame, bg='#1a1a2e')
+        canvas = FigureCanvasTkAgg(view.figure, view.frame)
+        # Toolbar zoom/pan re-aggregates long series at the new resolution
+        toolbar = NavigationToolbar2Tk(canvas, view.frame, pack_toolbar=False)
+        toolbar.pack(side='bottom', fill='x')
         canvas.get_tk_widget().pack(fill='both', expand=True)
+        view.attach(canvas)
     
     def bulk_input(self):
         """Bulk input data"""
-        messagebox.showinfo("Bulk Input", "Bulk input feature coming soon!")
+        window = tk.Toplevel(self.root, bg='#1a1a2e')
+        window.title("📥 Bulk Add")
+        window.geometry("420x420")
+        
+        tk.Label(window, text="Paste crash points (one per line, or separated by commas):", 
+                bg='#1a1a2e', fg='#e6e6e6', font=('Arial', 10)).pack(padx=10, pady=10)
+        
+        text = scrolledtext.ScrolledText(window, height=15, font=('Arial', 11), 
+                                       bg='#16213e', fg='#e6e6e6', insertbackground='white')
+        text.pack(fill='both', expand=True, padx=10)
+        
+        def add():
+            values, report = parse_text(text.get(1.0, tk.END))
+            window.destroy()
+            if values.size:
+                # Pasted rounds happened at unknown times
+                self.add_points(values, source='bulk', times=0)
+            messagebox.showinfo("Bulk Input", report.summary())
+        
+        tk.Button(window, text="➕ Add Points", command=add, font=('Arial', 12, 'bold'), 
+                 bg='#27AE60', fg='white', width=15).pack(pady=10)
     
     def clear_history(self):
         """Clear history"""
         if messagebox.askyesno("Confirm", "Clear all data?"):
-            self.history.clear()
+            self.cancel_jobs()
+            self.scope = None
+            self.rounds.reset()
+            self.stats.reset()
+            self.rolling.reset()
+            self.pnl.reset()
+            self.survival = None
             self.session_profit = 0
-            self.save_data()
-            self.update_dashboard()
+            try:
+                self.store.clear()
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to save data: {e}")
+            # The session index only points into the history
+            self.sessions.delete()
+            self.scope_cache = None
+            self.scheduler.mark_dirty(*HISTORY_PANELS)
             messagebox.showinfo("Success", "All data cleared")
     
+    def apply_stake(self):
+        """Recompute profits for a new stake"""
+        try:
+            stake = float(self.stake_var.get())
+            if stake <= 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "❌ Stake must be a positive number")
+            self.stake_var.set(f"{self.pnl.stake:g}")
+            return
+        
+        if stake != self.pnl.stake:
+            self.pnl.rebuild(self.history, stake, None if self.scope else self.store.blocks)
+            self.session_profit = self.pnl.total
+            self.save_data()
+            self.scheduler.mark_dirty(*STAKE_PANELS)
+    
+    def scope_choices(self):
+        """Entries of the session scope selector"""
+        if self.scope_cache is None:
+            try:
+                sessions = self.sessions.sessions()
+            except sqlite3.Error as e:
+                messagebox.showerror("Error", f"Failed to query sessions: {e}")
+                return [ALL_SESSIONS]
+            self.scope_cache = [ALL_SESSIONS] + [f"{session} / {table} ({count})" 
+                                                 for session, table, count, _, _ in sessions]
+        return self.scope_cache
+    
+    def parse_scope(self):
+        """Scope filter from the Settings fields (None means everything)"""
+        choice = self.scope_var.get()
+        session = table = None
+        if choice != ALL_SESSIONS:
+            session, rest = choice.split(' / ', 1)
+            table = rest.rsplit(' (', 1)[0]
+        
+        start = end = None
+        if self.scope_start.get().strip():
+            start = time.mktime(time.strptime(self.scope_start.get().strip(), '%Y-%m-%d'))
+        if self.scope_end.get().strip():
+            # The end date is inclusive
+            end = time.mktime(time.strptime(self.scope_end.get().strip(), '%Y-%m-%d')) + 86400
+        
+        if session is None and start is None and end is None:
+            return None
+        return {'session': session, 'table': table, 'start': start, 'end': end}
+    
+    def scope_accepts(self, session, table):
+        """Whether a round recorded now belongs to the working history"""
+        if self.scope is None:
+            return True
+        return (self.scope['session'] in (None, session) and 
+                self.scope['table'] in (None, table) and 
+                (self.scope['end'] is None or self.scope['end'] > time.time()))
+    
+    def apply_scope(self):
+        """Analyze only the selected session/table/date range"""
+        try:
+            scope = self.parse_scope()
+        except ValueError:
+            messagebox.showerror("Error", "❌ Dates must look like 2024-01-31")
+            return
+        if scope is None:
+            self.reset_scope()
+            return
+        
+        try:
+            values, times = self.sessions.query_times(self.store.column('values'), 
+                                                      self.store.column('times'), **scope)
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"Failed to query sessions: {e}")
+            return
+        self.scope = scope
+        self.set_history(values, times)
+        messagebox.showinfo("Scope", f"Analyzing {len(values)} points")
+    
+    def reset_scope(self):
+        """Go back to the full working history"""
+        self.scope = None
+        self.scope_var.set(ALL_SESSIONS)
+        self.scope_start.set("")
+        self.scope_end.set("")
+        self.load_data()
+        self.scheduler.mark_dirty(*HISTORY_PANELS)
+    
+    @timed()
+    def set_history(self, values, times=None):
+        """Replace the working history and everything derived from it"""
+        self.cancel_jobs()
+        self.rounds = RoundColumns.from_columns({'values': values, 'times': times}, 
+                                                self.rounds.stake_table)
+        self.scope_blocks = BlockIndex.from_values(self.rounds.values)
+        self.scope_sketch = QuantileSketch.from_values(self.rounds.values)
+        self.survival = None
+        self.stats = RunningStats.from_values(values)
+        self.rolling = RollingStats.from_values(values, limit=RECENT_ROUNDS)
+        self.pnl = ProfitSeries.from_values(values, self.pnl.stake, RECENT_ROUNDS)
+        self.session_profit = self.pnl.total
+        self.scheduler.mark_dirty(*HISTORY_PANELS)
+    
     def clear_all_data(self):
         """Clear all data"""
         self.clear_history()
     
     def export_data(self):
-        """Export data"""
+        """Export rounds to Parquet, Arrow or CSV"""
+        import crash_export
+        
         self.save_data()
-        messagebox.showinfo("Export", f"Exported {len(self.history)} points")
+        window = tk.Toplevel(self.root, bg='#1a1a2e')
+        window.title("📥 Export Data")
+        window.transient(self.root)
+        form = tk.Frame(window, bg='#1a1a2e')
+        form.pack(padx=15, pady=10)
+        
+        formats = crash_export.available_formats()
+        format_var = tk.StringVar(value=formats[0])
+        compression_var = tk.StringVar(value=crash_export.COMPRESSION[formats[0]][0])
+        source_var = tk.StringVar(value=ALL_SESSIONS)
+        first_var = tk.StringVar()
+        last_var = tk.StringVar()
+        
+        def label(text, row):
+            tk.Label(form, text=text, bg='#1a1a2e', fg='#e6e6e6', 
+                    font=('Arial', 10)).grid(row=row, column=0, sticky='w', pady=4)
+        
+        label("Format:", 0)
+        format_combo = ttk.Combobox(form, textvariable=format_var, values=formats, 
+                                    state="readonly", width=12)
+        format_combo.grid(row=0, column=1, sticky='w')
+        label("Compression:", 1)
+        compression_combo = ttk.Combobox(form, textvariable=compression_var, state="readonly", 
+                                         values=crash_export.COMPRESSION[formats[0]], width=12)
+        compression_combo.grid(row=1, column=1, sticky='w')
+        
+        def format_changed(event):
+            codecs = crash_export.COMPRESSION[format_var.get()]
+            compression_combo.configure(values=codecs)
+            compression_var.set(codecs[0])
+        
+        format_combo.bind('<<ComboboxSelected>>', format_changed)
+        label("Rounds:", 2)
+        source_combo = ttk.Combobox(form, textvariable=source_var, width=28, state="readonly", 
+                                    values=self.scope_choices())
+        source_combo.grid(row=2, column=1, sticky='w')
+        label("From round / to round:", 3)
+        range_row = tk.Frame(form, bg='#1a1a2e')
+        range_row.grid(row=3, column=1, sticky='w')
+        tk.Entry(range_row, textvariable=first_var, width=10).pack(side='left')
+        tk.Entry(range_row, textvariable=last_var, width=10).pack(side='left', padx=5)
+        if 'parquet' not in formats:
+            tk.Label(window, text="Install pyarrow for Parquet and Arrow exports", bg='#1a1a2e', 
+                    fg='#F39C12', font=('Arial', 9)).pack()
+        status = tk.Label(window, text="", bg='#1a1a2e', fg='#8ecae6', font=('Arial', 10))
+        status.pack(pady=5)
+        
+        def start():
+            try:
+                first = int(first_var.get()) - 1 if first_var.get().strip() else 0
+                last = int(last_var.get()) if last_var.get().strip() else None
+            except ValueError:
+                messagebox.showerror("Error", "❌ Rounds must be whole numbers", parent=window)
+                return
+            fmt, compression = format_var.get(), compression_var.get()
+            extension = {'parquet': '.parquet', 'arrow': '.arrow', 'csv': '.csv'}[fmt]
+            if compression == 'gzip' and fmt == 'csv':
+                extension += '.gz'
+            path = filedialog.asksaveasfilename(parent=window, title="Export rounds", 
+                                                defaultextension=extension, 
+                                                initialfile=f"crash_rounds{extension}")
+            if not path:
+                return
+            
+            stake = self.pnl.stake
+            progress = {'rows': 0}
+            if source_var.get() == ALL_SESSIONS:
+                columns = crash_export.snapshot_rounds(self.rounds)
+                
+                def chunks():
+                    return crash_export.HISTORY_COLUMNS, crash_export.history_chunks(
+                        columns, stake, first, last)
+            else:
+                session, rest = source_var.get().split(' / ', 1)
+                table = rest.rsplit(' (', 1)[0]
+                try:
+                    ranges = self.sessions.ranges(session, table)
+                except sqlite3.Error as e:
+                    messagebox.showerror("Error", f"Failed to query sessions: {e}", parent=window)
+                    return
+                columns = {'values': self.store.column('values'), 
+                           'times': self.store.column('times')}
+                
+                def chunks():
+                    return crash_export.SESSION_COLUMNS, crash_export.session_chunks(
+                        columns, ranges, stake=stake, first_round=first, last_round=last)
+            
+            def compute():
+                kinds, rows = chunks()
+                return crash_export.export(path, kinds, rows, fmt, compression, 
+                                           lambda count: progress.update(rows=count))
+            
+            def done(rows):
+                window.destroy()
+                messagebox.showinfo("Export", 
+                                    f"✅ Exported {rows} rounds to {os.path.basename(path)}")
+            
+            def failed(error):
+                if window.winfo_exists():
+                    status.config(text="")
+                messagebox.showerror("Error", f"Failed to export data: {error}")
+            
+            def show_progress():
+                if self.jobs.busy('export') and window.winfo_exists():
+                    status.config(text=f"⏳ {progress['rows']} rounds written...")
+                    window.after(EXPORT_POLL_MS, show_progress)
+            
+            self.jobs.submit('export', compute, done, failed)
+            show_progress()
+        
+        tk.Button(window, text="📥 Export", command=start, font=('Arial', 12, 'bold'), 
+                 bg='#27AE60', fg='white', width=15).pack(pady=10)
     
     def import_data(self):
         """Import data"""
-        messagebox.showinfo("Import", "Import feature coming soon!")
+        path = filedialog.askopenfilename(title="Import rounds", filetypes=[
+            ("Round logs", "*.csv *.txt *.json *.jsonl *.ndjson"),
+            ("All files", "*.*")
+        ])
+        if not path:
+            return
+        
+        # Each parsed chunk goes straight to the history instead of piling up;
+        # the panels and the header are only refreshed once the import ends
+        def sink(values):
+            self.add_points(values, source='import', times=0, batch=True)
+        
+        try:
+            importer = StreamingImporter(path, sink=sink)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to import data: {e}")
+            return
+        
+        window = tk.Toplevel(self.root, bg='#1a1a2e')
+        window.title("📤 Importing...")
+        window.transient(self.root)
+        status = tk.Label(window, text=os.path.basename(path), bg='#1a1a2e', 
+                         fg='#e6e6e6', font=('Arial', 10))
+        status.pack(padx=20, pady=10)
+        progress = ttk.Progressbar(window, length=320, maximum=100)
+        progress.pack(padx=20, pady=10)
+        
+        # One chunk per event-loop tick keeps the window responsive
+        steps = importer.run()
+        cancelled = {'set': False}
+        
+        def cancel():
+            cancelled['set'] = True
+        
+        def finish():
+            steps.close()
+            window.destroy()
+            self.save_data()
+            if importer.report.accepted:
+                self.scheduler.mark_dirty(*HISTORY_PANELS)
+        
+        def step():
+            if cancelled['set']:
+                finish()
+                messagebox.showinfo("Import", f"Import cancelled: {importer.report.accepted} "
+                                              f"points were imported")
+                return
+            try:
+                fraction = next(steps)
+            except StopIteration:
+                finish()
+                messagebox.showinfo("Import", importer.report.summary())
+                return
+            except (OSError, UnicodeError, ValueError) as e:
+                finish()
+                messagebox.showerror("Error", f"Failed to import data: {e}\n"
+                                              f"{importer.report.accepted} points were "
+                                              f"imported before the error")
+                return
+            progress['value'] = fraction * 100
+            status.config(text=f"{os.path.basename(path)}: {importer.report.accepted} points")
+            window.after(1, step)
+        
+        tk.Button(window, text="Cancel", command=cancel, font=('Arial', 10), 
+                 bg='#E74C3C', fg='white', width=10).pack(pady=(0, 10))
+        window.protocol('WM_DELETE_WINDOW', cancel)
+        # Other edits would interleave with the imported rounds
+        window.grab_set()
+        window.after(1, step)
     
+    @timed()
     def load_data(self):
         """Load saved data"""
+        self.cancel_jobs()
+        # Only the recent rounds are copied into memory; older ones stay
+        # memory-mapped and full-history statistics come from block summaries
+        try:
+            state = crash_engine.load_working_state(self.store, self.pnl.stake)
+        except (StoreError, OSError) as e:
+            backup = self.store.quarantine()
+            state = crash_engine.working_state(np.empty(0), stake=self.pnl.stake)
+            messagebox.showerror("Error", f"Failed to load data: {e}\n"
+                                          f"The unreadable file was kept as {backup}")
+        self.rounds, self.stats = state['rounds'], state['stats']
+        self.rolling, self.pnl = state['rolling'], state['pnl']
+        self.session_profit = self.pnl.total
+        self.survival = None
+        del state
+        
+        # Rounds the index does not cover yet (recorded before sessions existed)
+        # are indexed as one imported range, on the index thread
+        self.scope_cache = None
         try:
-            if os.path.exists('crash_data.json'):
-                with open('crash_data.json', 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.history = data.get('history', [])
-                    self.session_profit = data.get('profit', 0)
-        except:
-            self.history = []
+            self.sessions.sync(self.store.count, self.store.column('times'))
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"Failed to index sessions: {e}")
     
+    @timed()
     def save_data(self):
         """Save data"""
         try:
-            data = {
-                'history': self.history,
-                'profit': self.session_profit,
-                'last_update': datetime.now().isoformat()
-            }
-            with open('crash_data.json', 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
+            self.store.save_header(self.session_profit)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save data: {e}")
+    
+    @timed()
+    def append_data(self, columns, runs, header=True):
+        """Append new rounds (a dict of columns) to storage
+        
+        runs: (start, stop, session, table) of the rounds, indexed one range each.
+        """
+        first = self.store.count
+        try:
+            self.store.extend(columns['values'], self.session_profit, columns, header)
+            if self.rounds.codes_changed:
+                self.store.save_codes(self.rounds.stake_table)
+                self.rounds.codes_changed = False
+            # Only the round range is queued; the index thread writes it
+            self.scope_cache = None
+            for start, stop, session, table in runs:
+                self.sessions.append(first + start, stop - start, session, table, 
+                                     ts=columns['times'][start:stop] / 1e9)
+        except (OSError, sqlite3.Error) as e:
             messagebox.showerror("Error", f"Failed to save data: {e}")
     
+    def toggle_feed(self):
+        """Start or stop the live feed endpoint"""
+        import crash_feed
+        
+        if self.feed is not None and self.feed.running:
+            self.feed.stop()
+            self.feed_button.config(text="📡 Start Feed")
+            self.feed_status.config(text=f"Stopped ({self.feed_rounds} rounds received)")
+            return
+        
+        port = int(os.environ.get('CRASH_ANALYZER_FEED_PORT', crash_feed.FEED_PORT))
+        self.feed = crash_feed.FeedServer(port=port)
+        try:
+            self.feed.start()
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to start the feed: {e}")
+            return
+        self.feed_rounds = 0
+        self.feed_button.config(text="⏹️ Stop Feed")
+        self.feed_status.config(text=f"Listening on {self.feed.address}")
+        self.root.after(FEED_POLL_MS, self.poll_feed)
+    
+    def poll_feed(self):
+        """Move rounds received by the feed into the history (on the Tk loop)"""
+        import crash_feed
+        
+        if self.feed is None or not self.feed.running:
+            return
+        batch = crash_feed.drain(self.feed.batches, FEED_TICK_BATCHES)
+        if batch is not None:
+            self.add_points(batch['values'], source='feed', times=batch['times'], 
+                            runs=crash_feed.runs(batch))
+            self.feed_rounds += batch['values'].size
+            self.feed_status.config(text=f"Listening on {self.feed.address} | "
+                                         f"{self.feed.connections} connected | "
+                                         f"{self.feed_rounds} rounds | "
+                                         f"{self.feed.report.rejected} rejected")
+        self.root.after(FEED_POLL_MS, self.poll_feed)
+    
+    def toggle_trace(self):
+        """Record timings and show them over the window, or stop both"""
+        TRACER.enabled = self.trace_var.get()
+        if not TRACER.enabled:
+            if self.trace_overlay is not None:
+                self.trace_overlay.destroy()
+                self.trace_overlay = None
+            return
+        if self.trace_overlay is None:
+            self.trace_overlay = tk.Label(self.root, bg='#0f0f1e', fg='#8ecae6', 
+                                          font=('Courier', 9), justify='left', anchor='nw')
+            self.trace_overlay.place(relx=1.0, rely=1.0, x=-20, y=-20, anchor='se')
+            self.refresh_trace_overlay()
+    
+    def refresh_trace_overlay(self):
+        """Redraw the p50/p99 table while the overlay is shown"""
+        if self.trace_overlay is None:
+            return
+        written = TRACER.counters.get('bytes_written', 0)
+        self.trace_overlay.config(text=format_summary(TRACER.summary()) + 
+                                  f"\nbytes written: {written:,}")
+        self.trace_overlay.lift()
+        self.root.after(OVERLAY_MS, self.refresh_trace_overlay)
+    
+    def export_trace(self):
+        """Save the recorded calls as a Chrome trace (chrome://tracing, Perfetto)"""
+        path = filedialog.asksaveasfilename(title="Export trace", defaultextension='.json', 
+                                            initialfile='crash_trace.json', 
+                                            filetypes=[("Chrome trace", "*.json")])
+        if not path:
+            return
+        try:
+            events = TRACER.export(path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to export trace: {e}")
+            return
+        if not events:
+            messagebox.showinfo("Trace", "Nothing recorded yet: turn on the Performance Overlay "
+                                         "and use the app first")
+            return
+        messagebox.showinfo("Trace", f"Exported {events} calls to {os.path.basename(path)}")
+    
+    def prewarm(self):
+        """Import the charting stack in the background once the window is up"""
+        def load():
+            import crash_charts
+            import matplotlib.backends.backend_tkagg
+        
+        threading.Thread(target=load, daemon=True).start()
+    
     def auto_update(self):
         """Auto-update system"""
-        def update():
-            while True:
-                if self.auto_update_var.get():
-                    self.update_dashboard()
-                time.sleep(5)  # Update every 5 seconds
-        
-        thread = threading.Thread(target=update, daemon=True)
-        thread.start()
+        # Panels are redrawn on the Tk loop only after their data changed;
+        # several changes within one tick share a single redraw
+        self.scheduler = RefreshScheduler(self.root, [
+            ('stats', self.update_stat_cards),
+            ('predictions', self.update_live_predictions),
+            ('recent', self.update_recent_data),
+            ('chart', self.update_chart)
+        ], enabled=self.auto_update_var.get)
+        self.auto_update_var.trace_add('write', lambda *args: self.toggle_auto_update())
+    
+    def toggle_auto_update(self):
+        """Apply the Auto Update setting (it only pauses redraws for live feed rounds)"""
+        if self.auto_update_var.get():
+            self.scheduler.schedule()  # draw feed rounds that arrived while paused
+        else:
+            self.scheduler.cancel()
 
 def main():
     root = tk.Tk()
     app = ElegantCrashAnalyzer(root)
+    if os.environ.get('CRASH_ANALYZER_STARTUP_PROBE'):
+        # Used by `crash_bench.py startup`: report the first frame and quit
+        root.update()
+        print(f"first_frame {time.time()}", flush=True)
+        root.destroy()
+        return
     root.mainloop()
+    app.jobs.shutdown()
+    app.sessions.close()
 
 if __name__ == "__main__":
     main()
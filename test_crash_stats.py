@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""RunningStats against numpy and pandas on the same values"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from crash_stats import RunningStats
+
+
+def crash_points(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.floor(np.maximum(1.0, 0.99 / (1 - rng.random(size))) * 100) / 100
+
+
+def assert_matches(stats, values):
+    series = pd.Series(values)
+    assert stats.count == values.size
+    assert stats.mean == pytest.approx(np.mean(values), rel=1e-12)
+    assert stats.variance == pytest.approx(np.var(values), rel=1e-9)
+    assert stats.std == pytest.approx(np.std(values), rel=1e-9)
+    assert stats.skewness == pytest.approx(series.skew(), rel=1e-7)
+    assert stats.kurtosis == pytest.approx(series.kurt(), rel=1e-7)
+    assert stats.win_rate == pytest.approx(np.mean(values > 1.0) * 100)
+    assert stats.highest == values.max()
+    assert stats.lowest == values.min()
+
+
+def test_push():
+    values = crash_points(2000)
+    stats = RunningStats()
+    for value in values:
+        stats.push(value)
+    assert_matches(stats, values)
+
+
+def test_extend_in_batches():
+    values = crash_points(100_000, seed=1)
+    stats = RunningStats()
+    for batch in np.array_split(values, [1, 2, 10, 5000, 5001, 60_000]):
+        stats.extend(batch)
+    assert_matches(stats, values)
+
+
+def test_merge():
+    values = crash_points(50_000, seed=2)
+    left = RunningStats.from_values(values[:123])
+    right = RunningStats.from_values(values[123:])
+    left.merge(right)
+    assert_matches(left, values)
+    left.merge(RunningStats())
+    assert_matches(left, values)
+    empty = RunningStats()
+    empty.merge(right)
+    assert_matches(empty, values[123:])
+
+
+def test_push_then_extend():
+    values = crash_points(10_000, seed=3)
+    stats = RunningStats()
+    for value in values[:100]:
+        stats.push(value)
+    stats.extend(values[100:])
+    assert_matches(stats, values)
+
+
+def test_constant_values_have_no_shape():
+    stats = RunningStats.from_values(np.full(10, 2.0))
+    assert stats.variance == 0
+    assert stats.skewness == 0
+    assert stats.kurtosis == 0
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Survival curve checks on simulated honest games"""
+
+import numpy as np
+
+from crash_survival import HOUSE_EDGE, SurvivalCounts, default_grid
+
+
+def honest_rounds(size, seed):
+    """Crash points of an honest game, unrounded"""
+    rng = np.random.default_rng(seed)
+    return np.maximum(1.0, (1 - HOUSE_EDGE) / (1 - rng.random(size)))
+
+
+def test_grid_is_on_whole_cents():
+    grid = default_grid()
+    assert np.array_equal(grid, np.round(grid * 100) / 100)
+
+
+def test_cent_rounding_does_not_move_the_curve():
+    values = honest_rounds(200_000, seed=0)
+    exact = SurvivalCounts.from_values(values).survival()
+    cents = SurvivalCounts.from_values(np.floor(values * 100) / 100).survival()
+    assert np.array_equal(exact, cents)
+
+
+def test_honest_cent_rounded_data_stays_inside_the_band():
+    outside = []
+    for seed in range(5):
+        values = np.floor(honest_rounds(1_000_000, seed) * 100) / 100
+        curve = SurvivalCounts.from_values(values).curve(seed=seed)
+        theory = curve['theoretical']
+        outside.append(np.mean((theory < curve['lower']) | (theory > curve['upper'])))
+    # A pointwise 95% band misses the truth at about 5% of the points on average
+    assert np.mean(outside) <= 0.1